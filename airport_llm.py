@@ -2,19 +2,19 @@
 """
 Airport LLM Assistant - Natural language airport discovery using DeepSeek
 """
-import aiohttp
 import asyncio
 import json
-import os
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 
+from llm_client import LLMClient, LLMError
+
 load_dotenv()
 
 class AirportLLMAssistant:
-    def __init__(self):
-        self.deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
-        self.deepseek_base_url = "https://api.deepseek.com/v1/chat/completions"
+    def __init__(self, llm: Optional[LLMClient] = None):
+        # Shared cached client; repeated questions never reach the API
+        self.llm = llm or LLMClient()
         
         # Enhanced airport database with traffic info and specialties
         self.airport_database = {
@@ -52,7 +52,7 @@ class AirportLLMAssistant:
     
     async def ask_deepseek(self, query: str) -> str:
         """Query DeepSeek API for airport recommendations"""
-        if not self.deepseek_api_key:
+        if not self.llm.configured:
             return "DeepSeek API key not configured"
             
         # Create airport database context for the LLM
@@ -78,30 +78,14 @@ Example response format:
 • DXB (Dubai International) - Highest traffic in Dubai, major Emirates hub
 • DWC (Dubai World Central) - Secondary option, more cargo focused"""
 
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query}
+        ]
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "Authorization": f"Bearer {self.deepseek_api_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "model": "deepseek-chat",
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": query}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 500
-                }
-                
-                async with session.post(self.deepseek_base_url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data['choices'][0]['message']['content'].strip()
-                    else:
-                        return f"DeepSeek API error: {response.status}"
-                        
+            return await self.llm.complete(messages, temperature=0.3, max_tokens=500)
+        except LLMError as e:
+            return str(e)
         except Exception as e:
             return f"Error querying DeepSeek: {str(e)}"
     
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Arrival Predictor - Arrivals estimated from live positions, no FIDS call needed
+
+For each monitored airport the predictor sweeps the latest OpenSky snapshot
+for airborne aircraft that are close, pointed at the field and descending
+(or already low on final). ETA is great-circle distance over ground speed,
+stretched a little for the approach path. Predictions come out in the same
+shape as converted AeroDataBox arrivals, so they go through the existing
+evaluate_window / post_alert path unchanged.
+"""
+import math
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flight_snapshot import FlightSnapshot, haversine_km
+
+def bearing_deg(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Initial great-circle bearing from point 1 to point 2, degrees true"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlon = math.radians(lon2 - lon1)
+    x = math.sin(dlon) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlon)
+    return math.degrees(math.atan2(x, y)) % 360
+
+def _registration(flight: dict) -> str:
+    return ((flight.get("aircraft") or {}).get("registration") or "").upper().replace("-", "")
+
+def merge_arrivals(fids: List[dict], predicted: List[dict]) -> List[dict]:
+    """FIDS arrivals plus the predicted ones FIDS doesn't list.
+
+    When both know the same aircraft (hex, else registration), the FIDS entry
+    keeps its flight number, airline and origin but takes the live-position
+    ETA, and the prediction is dropped so the arrival alerts once.
+    """
+    by_hex = {p["icao24"]: p for p in predicted if p.get("icao24")}
+    by_reg = {_registration(p): p for p in predicted if _registration(p)}
+    merged, used = [], set()
+    for flight in fids:
+        prediction = by_hex.get(flight.get("icao24")) or by_reg.get(_registration(flight))
+        if prediction is not None and id(prediction) in used:
+            prediction = None
+        if prediction is not None:
+            used.add(id(prediction))
+            flight = dict(flight, icao24=prediction["icao24"],
+                          arrival=dict(flight.get("arrival") or {}, estimated=prediction["arrival"]["estimated"]))
+        merged.append(flight)
+    merged.extend(p for p in predicted if id(p) not in used)
+    return merged
+
+class ArrivalPredictor:
+    def __init__(self, airport_coords: Dict[str, Tuple[float, float]], aircraft_db: Dict[str, dict],
+                 radius_km: float = 200, max_heading_error: float = 30, min_descent_ms: float = 1.5,
+                 final_altitude_m: float = 1500, final_radius_km: float = 40,
+                 max_final_climb_ms: float = 1.0, min_speed_ms: float = 40, path_factor: float = 1.15):
+        self.airport_coords = airport_coords
+        self.aircraft_db = aircraft_db
+        self.radius_km = radius_km                  # look this far out
+        self.max_heading_error = max_heading_error  # track must point at the field within this
+        self.min_descent_ms = min_descent_ms        # sink rate that counts as descending
+        self.final_altitude_m = final_altitude_m    # level but this low and close = on approach
+        self.final_radius_km = final_radius_km
+        self.max_final_climb_ms = max_final_climb_ms  # climbing faster than this is a departure
+        self.min_speed_ms = min_speed_ms            # ignore hovering/very slow targets
+        self.path_factor = path_factor              # approach path vs straight line
+
+    def eta_seconds(self, snapshot: FlightSnapshot, i: int, lat: float, lon: float) -> Optional[float]:
+        """Seconds until row i lands at (lat, lon), or None if it isn't arriving there"""
+        speed = snapshot.velocity[i]
+        alt = snapshot.altitude[i]
+        vrate = snapshot.vertical_rate[i]
+        if snapshot.on_ground[i] or not speed >= self.min_speed_ms or alt != alt:
+            return None
+        dist = haversine_km(snapshot.latitude[i], snapshot.longitude[i], lat, lon)
+        if dist > self.radius_km:
+            return None
+
+        heading = snapshot.heading[i]
+        if heading == heading:
+            error = abs((bearing_deg(snapshot.latitude[i], snapshot.longitude[i], lat, lon) - heading + 180) % 360 - 180)
+            if error > self.max_heading_error:
+                return None
+
+        eta = dist * 1000 * self.path_factor / speed
+        descending = vrate == vrate and vrate <= -self.min_descent_ms
+        # Low and close but climbing is a departure or go-around; unknown vrate gets the benefit of the doubt
+        on_final = (alt <= self.final_altitude_m and dist <= self.final_radius_km
+                    and not vrate > self.max_final_climb_ms)
+        if not (descending or on_final):
+            return None
+        # A shallow descent that won't reach the ground for a long way is a step-down, not an arrival
+        if descending and not on_final and alt / -vrate > 3 * eta + 300:
+            return None
+        return eta
+
+    def flight(self, snapshot: FlightSnapshot, i: int, code: str, eta: float) -> dict:
+        """Predicted arrival in the converted-FIDS shape used by the airport watch"""
+        icao24 = snapshot.icao24[i]
+        info = self.aircraft_db.get(icao24, {})
+        callsign = snapshot.callsign[i] or icao24.upper()
+        eta_iso = datetime.fromtimestamp(snapshot.fetched_at + eta, timezone.utc).isoformat()
+        return {
+            "flight": {"iata": callsign, "number": callsign},
+            "airline": {"name": info.get("operator") or "Unknown Airline"},
+            "departure": {"iata": ""},
+            "arrival": {"iata": code, "estimated": eta_iso, "predicted": True},
+            "aircraft": {
+                "registration": info.get("registration", ""),
+                "icao": info.get("type", ""),
+                "iata": "",
+                "model": info.get("model", ""),
+            },
+            "icao24": icao24,
+        }
+
+    def predict(self, snapshot: FlightSnapshot, codes: Iterable[str]) -> Dict[str, List[dict]]:
+        """Predicted arrivals per airport, soonest first"""
+        results: Dict[str, List[dict]] = {}
+        lats, lons = snapshot.latitude, snapshot.longitude
+        for code in codes:
+            code = code.upper()
+            coords = self.airport_coords.get(code)
+            if coords is None:
+                continue
+            lat, lon = coords
+            # Cheap latitude band before any trigonometry
+            band = self.radius_km / 111.0
+            found = []
+            for i in range(len(snapshot)):
+                if abs(lats[i] - lat) > band or lons[i] != lons[i]:
+                    continue
+                eta = self.eta_seconds(snapshot, i, lat, lon)
+                if eta is not None:
+                    found.append((eta, i))
+            results[code] = [self.flight(snapshot, i, code, eta) for eta, i in sorted(found)]
+        return results
+
+if __name__ == "__main__":
+    t = 1_700_000_000
+    snapshot = FlightSnapshot.from_opensky({'time': t, 'states': [
+        # 40 km west of ABE heading east, descending at 5 m/s
+        ['a1b2c3', 'UAL123', 'United States', t, t, -75.91, 40.65, 2500, False, 110, 90, -5],
+        # Same spot, cruising away
+        ['d4e5f6', 'DAL9', 'United States', t, t, -75.91, 40.65, 10500, False, 230, 270, 0],
+    ]}, fetched_at=t)
+    predictor = ArrivalPredictor({'ABE': (40.6522, -75.4402)}, {'a1b2c3': {'type': 'B738'}})
+    for flight in predictor.predict(snapshot, ['ABE'])['ABE']:
+        print(flight['flight']['iata'], flight['aircraft']['icao'], flight['arrival']['estimated'])
@@ -1,14 +1,20 @@
 # build_rarity_json.py
 import csv, json, sys
 
+from rarity import CATALOG_COLUMNS, rarity_from_ftea
+
 # Adjust these to match your CSV column headers:
 COL_ICAO = "ICAO Code"   # e.g., B738
 COL_IATA = None          # Not present in this CSV
 COL_RARITY = "Rarity"    # numeric rarity, if present
 COL_FTEA = "Observed Aircraft"  # Using observed aircraft count as FTEA
+COL_NAME = "Aircraft"
+COL_CATEGORY = "Category"
+COL_SUBCATEGORY = "Subcategory"
 
 in_csv = sys.argv[1] if len(sys.argv) > 1 else "aircraft_list.csv"
 by_rarity, by_ftea = {}, {}
+catalog_rows = []
 
 with open(in_csv, newline='', encoding="utf-8") as f:
     r = csv.DictReader(f)
@@ -19,18 +25,40 @@ with open(in_csv, newline='', encoding="utf-8") as f:
             if k: dct[k] = v
             elif iata: dct[iata] = v
 
+        rarity = None
         if row.get(COL_RARITY):
             try:
-                put(by_rarity, icao, float(row[COL_RARITY]))
+                rarity = float(row[COL_RARITY])
+                put(by_rarity, icao, rarity)
             except: pass
 
         if row.get(COL_FTEA):
             try:
-                put(by_ftea, icao, float(row[COL_FTEA]))
+                ftea = float(row[COL_FTEA])
+                put(by_ftea, icao, ftea)
+                if rarity is None:
+                    rarity = rarity_from_ftea(ftea)
             except: pass
 
+        # Catalog row, rarity precomputed so the bot never recomputes it
+        if (icao or iata) and rarity is not None:
+            catalog_rows.append([
+                icao or iata,
+                iata,
+                (row.get(COL_NAME) or "").strip(),
+                (row.get(COL_CATEGORY) or "").strip(),
+                (row.get(COL_SUBCATEGORY) or "").strip(),
+                round(rarity, 2),
+            ])
+
 with open("rarity.json", "w", encoding="utf-8") as f:
     json.dump(by_rarity, f, indent=2)
 with open("ftea.json", "w", encoding="utf-8") as f:
     json.dump(by_ftea, f, indent=2)
-print(f"wrote rarity.json ({len(by_rarity)} types) and ftea.json ({len(by_ftea)} types)")
\ No newline at end of file
+with open("rarity_catalog.json", "w", encoding="utf-8") as f:
+    # One row per line keeps the file diffable without indenting every cell
+    f.write('{"columns": ' + json.dumps(CATALOG_COLUMNS) + ', "rows": [\n')
+    f.write(",\n".join(json.dumps(r, ensure_ascii=False) for r in catalog_rows))
+    f.write("\n]}\n")
+print(f"wrote rarity.json ({len(by_rarity)} types), ftea.json ({len(by_ftea)} types) "
+      f"and rarity_catalog.json ({len(catalog_rows)} types)")
@@ -7,6 +7,8 @@ import json
 import os
 from datetime import datetime
 
+from alias_resolver import build_token_index
+
 # Increase CSV field size limit
 csv.field_size_limit(1000000)
 
@@ -103,6 +105,10 @@ def convert_to_production_format():
         print(f"  All rare aircraft: {len(rare_aircraft_db)}")
         print(f"  YOUR target aircraft: {len(user_target_aircraft)}")
         
+        # Model/manufacturer token -> typecode counts for offline alias lookups
+        alias_index = build_token_index(aircraft_db)
+        print(f"  Alias index tokens: {len(alias_index):,}")
+        
         # Create production database structure
         production_db = {
             'metadata': {
@@ -116,7 +122,8 @@ def convert_to_production_format():
             },
             'aircraft': aircraft_db,
             'rare_aircraft': rare_aircraft_db,
-            'user_targets': user_target_aircraft
+            'user_targets': user_target_aircraft,
+            'alias_index': alias_index
         }
         
         # Save production database
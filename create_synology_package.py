@@ -30,10 +30,28 @@ def create_deployment_package():
         "user_airports.py", 
         "airport_llm.py",
         "alert_tracker.py",
+        "flight_snapshot.py",
+        "subscriptions.py",
+        "registry_index.py",
+        "rarity_feed.py",
+        "dedupe_cache.py",
+        "track_buffer.py",
+        "state_store.py",
+        "alert_dispatcher.py",
+        "http_pool.py",
+        "alert_webhooks.py",
+        "fids_client.py",
+        "fids_scheduler.py",
+        "arrival_predictor.py",
+        "llm_client.py",
+        "alias_resolver.py",
+        "type_completer.py",
         "requirements.txt",
         ".env",
         "rarity.json",
-        "ftea.json"
+        "ftea.json",
+        "rarity_catalog.json",
+        "aliases.json"
     ]
     
     copied_files = 0
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Dedupe Cache - Bounded alert memory for the hunter
+
+Each entry is a fixed set of numbers (key hash, last alert, last seen,
+lat/lon/alt) stored in parallel arrays and reused through a free list.
+Entries expire on a time wheel: one bucket per ``slot_seconds``, and only
+the buckets that have come due since the last call are swept, so expiry
+never scans the whole cache.
+"""
+import time
+from array import array
+from typing import Dict, List, Optional
+
+class DedupeCache:
+    def __init__(self, realert_seconds: int = 1800, ghost_seconds: int = 600,
+                 ttl_seconds: int = 3 * 3600, slot_seconds: int = 60,
+                 max_entries: int = 20000):
+        self.realert_seconds = realert_seconds  # same aircraft/term alerts at most this often
+        self.ghost_seconds = ghost_seconds      # unchanged position for this long = ghost
+        self.slot_seconds = slot_seconds
+        self.max_entries = max_entries
+        # Entries not seen for ttl_seconds are forgotten; longer than the
+        # re-alert window so parked ghosts stay suppressed while they persist
+        self.n_slots = max(1, -(-ttl_seconds // slot_seconds))
+
+        # key hash -> slot in the arrays below
+        self._slot_of: Dict[int, int] = {}
+        self._key = array('q')
+        self._last_alert = array('d')
+        self._last_seen = array('d')
+        self._lat = array('d')
+        self._lon = array('d')
+        self._alt = array('d')
+        self._placed = array('q')  # wheel tick the slot was last filed under
+        self._live = bytearray()
+        self._free: List[int] = []
+
+        self._wheel: List[List[int]] = [[] for _ in range(self.n_slots)]
+        self._tick: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: str) -> bool:
+        return hash(key) in self._slot_of
+
+    def _release(self, slot: int):
+        self._live[slot] = 0
+        del self._slot_of[self._key[slot]]
+        self._free.append(slot)
+
+    def _sweep(self, t: int) -> int:
+        """Expire everything still filed under the bucket for tick ``t``"""
+        n, placed, live = self.n_slots, self._placed, self._live
+        bucket = self._wheel[t % n]
+        released = 0
+        for slot in bucket:
+            # A refreshed entry was re-filed in a newer bucket; skip stale refs
+            if live[slot] and placed[slot] % n == t % n and placed[slot] < t:
+                self._release(slot)
+                released += 1
+        bucket.clear()
+        return released
+
+    def _advance(self, now: float):
+        tick = int(now // self.slot_seconds)
+        if self._tick is None:
+            self._tick = tick
+            return
+        steps = min(tick - self._tick, self.n_slots)
+        for t in range(tick - steps + 1, tick + 1):
+            self._sweep(t)
+        self._tick = max(self._tick, tick)
+
+    def _file(self, slot: int):
+        if self._placed[slot] != self._tick:
+            self._placed[slot] = self._tick
+            self._wheel[self._tick % self.n_slots].append(slot)
+
+    def _evict_oldest(self):
+        """Cache is full: expire the oldest non-empty bucket early"""
+        for t in range(self._tick + 1, self._tick + 1 + self.n_slots):
+            if self._sweep(t):
+                return
+
+    def check(self, key: str, lat: Optional[float], lon: Optional[float],
+              alt: Optional[float], now: Optional[float] = None) -> Optional[str]:
+        """'ghost' or 'recent' if this alert should be suppressed, else None"""
+        now = now or time.time()
+        self._advance(now)
+        slot = self._slot_of.get(hash(key))
+        if slot is None:
+            return None
+
+        self._last_seen[slot] = now
+        self._file(slot)
+        age = now - self._last_alert[slot]
+
+        # Same exact position as the last alert, long after it: stale feed
+        if (lat and lon and alt is not None and age > self.ghost_seconds
+                and self._lat[slot] == lat and self._lon[slot] == lon and self._alt[slot] == alt):
+            return 'ghost'
+        if age < self.realert_seconds:
+            return 'recent'
+        return None
+
+    def record(self, key: str, lat: Optional[float], lon: Optional[float],
+               alt: Optional[float], now: Optional[float] = None):
+        """Remember that we alerted for ``key`` at this position"""
+        now = now or time.time()
+        self._advance(now)
+        h = hash(key)
+        slot = self._slot_of.get(h)
+        if slot is None:
+            if len(self._slot_of) >= self.max_entries:
+                self._evict_oldest()
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._key)
+                for column in (self._key, self._placed):
+                    column.append(0)
+                for column in (self._last_alert, self._last_seen, self._lat, self._lon, self._alt):
+                    column.append(0.0)
+                self._live.append(0)
+            self._key[slot] = h
+            self._placed[slot] = -1
+            self._live[slot] = 1
+            self._slot_of[h] = slot
+
+        self._last_alert[slot] = now
+        self._last_seen[slot] = now
+        self._lat[slot] = lat if lat is not None else float('nan')
+        self._lon[slot] = lon if lon is not None else float('nan')
+        self._alt[slot] = alt if alt is not None else float('nan')
+        self._file(slot)
+
+if __name__ == "__main__":
+    cache = DedupeCache(ttl_seconds=600, slot_seconds=60)
+    t = 1_700_000_000
+    cache.record("ae1234_RCH817_C17", 40.1, -75.2, 5000, now=t)
+    print("5 min later:", cache.check("ae1234_RCH817_C17", 40.2, -75.3, 5100, now=t + 300))
+    print("Entries:", len(cache))
+    cache.check("other", None, None, None, now=t + 3600)
+    print("Entries after an hour:", len(cache))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+FIDS Scheduler - Poll each airport only when an arrival is about to matter
+
+Each airport's last FIDS response is cached. After every fetch the
+scheduler works out when the next arrival will enter the alert window
+(ETA minus the window's upper bound) and schedules the next poll shortly
+before that, so the alert sees a fresh ETA. Busy airports are polled at most
+every ``min_interval_seconds``; quiet ones at least every
+``max_stale_seconds`` to pick up newly filed flights. Between polls the
+watch loop evaluates the cached arrivals.
+"""
+import time
+from typing import Dict, Iterable, List, Optional, Union
+
+from alert_window import parse_iso_epoch, pick_eta
+from fids_client import FidsClient
+
+class AirportSchedule:
+    def __init__(self):
+        self.flights: List[dict] = []
+        self.fetched_at = 0.0
+        self.next_poll_at = 0.0  # due immediately
+        self.polls = 0
+
+class FidsScheduler:
+    def __init__(self, client: FidsClient, win_min: int, win_max: int,
+                 min_interval_seconds: float = 300, max_stale_seconds: float = 4 * 3600,
+                 lead_seconds: float = 120):
+        self.client = client
+        self.win_min = win_min                            # alert window, minutes before ETA
+        self.win_max = win_max
+        self.min_interval_seconds = min_interval_seconds  # never poll one airport faster
+        self.max_stale_seconds = max_stale_seconds        # never trust a response longer
+        self.lead_seconds = lead_seconds                  # poll this long before a window opens
+        self.airports: Dict[str, AirportSchedule] = {}
+
+    def _schedule(self, code: str) -> AirportSchedule:
+        return self.airports.setdefault(code.upper(), AirportSchedule())
+
+    def next_poll_at(self, flights: List[dict], now: float) -> float:
+        """When to fetch this airport again, given its newest arrivals"""
+        soonest = now + self.max_stale_seconds
+        for flight in flights:
+            eta = parse_iso_epoch(pick_eta(flight.get("arrival") or {}))
+            if eta is None:
+                continue
+            mins = (eta - now) / 60  # against the given now, not the wall clock
+            if mins < self.win_min:
+                continue  # landed, or too close to alert
+            opens_at = now + (mins - self.win_max) * 60
+            if opens_at <= now:
+                # Already inside the window: keep its ETA fresh while it is alertable
+                soonest = min(soonest, now + self.min_interval_seconds)
+            else:
+                soonest = min(soonest, opens_at - self.lead_seconds)
+        return max(soonest, now + self.min_interval_seconds)
+
+    def due(self, codes: Iterable[str], now: Optional[float] = None) -> List[str]:
+        now = now or time.time()
+        return [code.upper() for code in codes if self._schedule(code).next_poll_at <= now]
+
+    def next_wakeup(self) -> Optional[float]:
+        """Earliest scheduled poll across all airports"""
+        return min((s.next_poll_at for s in self.airports.values()), default=None)
+
+    async def refresh(self, codes: Iterable[str], now: Optional[float] = None) -> Dict[str, Union[List[dict], Exception]]:
+        """Arrivals for every airport: fetched if due, otherwise from the cache"""
+        codes = list(dict.fromkeys(code.upper() for code in codes))
+        now = now or time.time()
+        due = self.due(codes, now)
+        fetched = await self.client.fetch_many(due) if due else {}
+
+        results: Dict[str, Union[List[dict], Exception]] = {}
+        for code in codes:
+            schedule = self._schedule(code)
+            result = fetched.get(code)
+            if isinstance(result, Exception):
+                # Keep serving the old response; try again after the minimum interval
+                schedule.next_poll_at = now + self.min_interval_seconds
+                results[code] = result if not schedule.fetched_at else schedule.flights
+                continue
+            if result is not None:
+                schedule.flights = result
+                schedule.fetched_at = now
+                schedule.polls += 1
+                schedule.next_poll_at = self.next_poll_at(result, now)
+            results[code] = schedule.flights
+        return results
+
+    def status(self, now: Optional[float] = None) -> Dict[str, dict]:
+        now = now or time.time()
+        return {
+            code: {'polls': s.polls, 'cached': len(s.flights),
+                   'next_poll_min': round(max(0.0, s.next_poll_at - now) / 60, 1)}
+            for code, s in self.airports.items()
+        }
+
+if __name__ == "__main__":
+    import asyncio
+    from datetime import datetime, timedelta, timezone
+
+    async def demo():
+        eta = (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+
+        async def fetch(code):
+            return [{'arrival': {'iata': code, 'estimated': eta}}] if code == "ABE" else []
+
+        scheduler = FidsScheduler(FidsClient(fetch, rate_per_second=10), win_min=10, win_max=30)
+        await scheduler.refresh(["ABE", "UKT"])
+        print(scheduler.status())  # ABE again ~88 min from now, UKT in 4 hours
+
+    asyncio.run(demo())
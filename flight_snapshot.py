@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Flight Snapshot - Column-oriented view of one OpenSky states/all poll
+"""
+import math
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+EARTH_RADIUS_KM = 6371.0
+METERS_TO_FEET = 3.28084
+MS_TO_KNOTS = 1.94384
+
+NAN = float("nan")
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in km"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = (math.sin(delta_lat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class FlightSnapshot:
+    """One poll of live state vectors, stored column-wise.
+
+    Numeric columns are typed arrays in OpenSky units (meters, m/s) with NaN
+    for missing values, so filters can sweep a single column without building
+    a dict per aircraft. Row ``i`` is the same aircraft in every column.
+    """
+
+    def __init__(self, fetched_at: Optional[float] = None):
+        self.fetched_at = fetched_at or time.time()
+        self.icao24: List[str] = []
+        self.callsign: List[str] = []
+        self.origin_country: List[str] = []
+        self.latitude = array("d")
+        self.longitude = array("d")
+        self.altitude = array("d")       # meters (barometric, geometric fallback)
+        self.velocity = array("d")       # m/s
+        self.heading = array("d")        # degrees true
+        self.vertical_rate = array("d")  # m/s
+        self.last_contact = array("d")   # unix seconds
+        self.on_ground = bytearray()
+        self.row_of: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.icao24)
+
+    @classmethod
+    def from_opensky(cls, data: Optional[dict], fetched_at: Optional[float] = None) -> "FlightSnapshot":
+        """Build a snapshot from a raw states/all JSON response"""
+        snapshot = cls(fetched_at or (data or {}).get("time"))
+        for state in (data or {}).get("states") or []:
+            snapshot.append_state(state)
+        return snapshot
+
+    def append_state(self, state: list) -> bool:
+        """Append one OpenSky state vector; skips rows without a position"""
+        if not state or len(state) < 12:
+            return False
+        if state[5] is None or state[6] is None:
+            return False
+
+        icao24 = (state[0] or "").lower()
+        altitude = state[7] if state[7] is not None else (state[13] if len(state) > 13 else None)
+
+        self.row_of[icao24] = len(self.icao24)
+        self.icao24.append(icao24)
+        self.callsign.append((state[1] or "").strip().upper())
+        self.origin_country.append(state[2] or "")
+        self.longitude.append(state[5])
+        self.latitude.append(state[6])
+        self.altitude.append(NAN if altitude is None else altitude)
+        self.velocity.append(NAN if state[9] is None else state[9])
+        self.heading.append(NAN if state[10] is None else state[10])
+        self.vertical_rate.append(NAN if state[11] is None else state[11])
+        self.last_contact.append(NAN if state[4] is None else state[4])
+        self.on_ground.append(1 if state[8] else 0)
+        return True
+
+    def all_rows(self) -> range:
+        return range(len(self.icao24))
+
+    @staticmethod
+    def _value(x: float) -> Optional[float]:
+        return None if x != x else x
+
+    def record(self, i: int) -> Dict:
+        """Row ``i`` as the aircraft dict used throughout the hunter"""
+        return {
+            'icao24': self.icao24[i],
+            'callsign': self.callsign[i],
+            'origin_country': self.origin_country[i],
+            'longitude': self.longitude[i],
+            'latitude': self.latitude[i],
+            'altitude': self._value(self.altitude[i]),  # meters
+            'velocity': self._value(self.velocity[i]),  # m/s
+            'heading': self._value(self.heading[i]),
+            'vertical_rate': self._value(self.vertical_rate[i]),
+            'last_contact': self._value(self.last_contact[i]),
+            'detected_at': datetime.fromtimestamp(self.fetched_at, timezone.utc).isoformat()
+        }
+
+    def records(self, rows: Optional[Iterable[int]] = None) -> List[Dict]:
+        rows = self.all_rows() if rows is None else rows
+        return [self.record(i) for i in rows]
+
+    def distances_km(self, rows: Iterable[int], lat: float, lon: float) -> Dict[int, float]:
+        """Great-circle distance from (lat, lon) for the given rows"""
+        lats, lons = self.latitude, self.longitude
+        return {i: haversine_km(lat, lon, lats[i], lons[i]) for i in rows}
+
+    def delta_rows(self, previous: Optional["FlightSnapshot"], cell_deg: float = 1.0) -> List[int]:
+        """Rows that are new since ``previous`` or moved into another grid cell"""
+        if previous is None:
+            return list(self.all_rows())
+        prev_row, prev_lat, prev_lon = previous.row_of, previous.latitude, previous.longitude
+        lats, lons = self.latitude, self.longitude
+        rows = []
+        for i, icao24 in enumerate(self.icao24):
+            j = prev_row.get(icao24)
+            if (j is None
+                    or math.floor(lats[i] / cell_deg) != math.floor(prev_lat[j] / cell_deg)
+                    or math.floor(lons[i] / cell_deg) != math.floor(prev_lon[j] / cell_deg)):
+                rows.append(i)
+        return rows
+
+
+class SnapshotService:
+    """Keeps the latest and previous snapshot and notifies listeners on each poll.
+
+    The hunter publishes every OpenSky poll here; anything else that needs live
+    positions (subscriptions, mission search, rankings) reads from it instead
+    of polling OpenSky again.
+    """
+
+    def __init__(self, cell_deg: float = 1.0):
+        self.cell_deg = cell_deg
+        self.current: Optional[FlightSnapshot] = None
+        self.previous: Optional[FlightSnapshot] = None
+        self._delta: Optional[List[int]] = None
+        self._listeners = []
+
+    def add_listener(self, callback) -> None:
+        """callback(snapshot, previous) runs synchronously after each publish"""
+        self._listeners.append(callback)
+
+    def publish(self, snapshot: FlightSnapshot) -> None:
+        self.previous, self.current = self.current, snapshot
+        self._delta = None
+        for callback in self._listeners:
+            try:
+                callback(snapshot, self.previous)
+            except Exception as e:
+                print(f"Snapshot listener error: {e}")
+
+    def delta_rows(self) -> List[int]:
+        """Rows of the current snapshot that are new or changed cell since the last one"""
+        if self.current is None:
+            return []
+        if self._delta is None:
+            self._delta = self.current.delta_rows(self.previous, self.cell_deg)
+        return self._delta
+
+    def age_seconds(self) -> Optional[float]:
+        if self.current is None:
+            return None
+        return time.time() - self.current.fetched_at
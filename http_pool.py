@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+HTTP Pool - One shared aiohttp session for the bot's outbound HTTP
+
+Opening a ClientSession per request throws away the connection pool, so
+every call pays DNS + TCP + TLS again. Components ask for the shared session
+instead; it is created lazily on the running event loop and recreated if
+that loop has changed (each test run, bot restart). RateLimiter spaces out
+requests to providers with a per-second quota.
+"""
+import asyncio
+import time
+from typing import Optional
+
+import aiohttp
+
+_SESSION: Optional[aiohttp.ClientSession] = None
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+def get_session(limit: int = 20, timeout_seconds: float = 30) -> aiohttp.ClientSession:
+    """The shared session for the running loop. Must be called from a coroutine."""
+    global _SESSION, _LOOP
+    loop = asyncio.get_running_loop()
+    if _SESSION is None or _SESSION.closed or _LOOP is not loop:
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=limit, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=timeout_seconds),
+        )
+        _LOOP = loop
+    return _SESSION
+
+async def close_session():
+    """Close the shared session (shutdown, end of a test)"""
+    global _SESSION, _LOOP
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+    _LOOP = None
+
+class RateLimiter:
+    """Token bucket shared by every request to one provider"""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        """Wait until one request may start"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+if __name__ == "__main__":
+    async def demo():
+        session = get_session()
+        print("Same session:", session is get_session())
+        await close_session()
+
+    asyncio.run(demo())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+LLM Client - Cached, coalesced DeepSeek chat completions
+
+Answers are keyed on the normalized prompt (case and whitespace folded, plus
+the model and sampling settings) and kept on disk with a TTL and LRU
+eviction, so a repeated ``!add chinook`` or ``!airports_llm`` question is
+answered from the cache. Identical requests already in flight share one API
+call, at most ``max_concurrent`` calls run at once, and each call has a hard
+timeout over the shared HTTP session.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from http_pool import get_session
+from state_store import STORE, StateStore
+
+DEEPSEEK_URL = "https://api.deepseek.com/v1/chat/completions"
+
+class LLMError(Exception):
+    """The API could not produce an answer (HTTP error, timeout, bad payload)"""
+
+def normalize_prompt(text: str) -> str:
+    """'Find  Dubai airport\\n' and 'find dubai airport' are the same question"""
+    return " ".join((text or "").split()).casefold()
+
+def cache_key(model: str, messages: List[dict], temperature: float, max_tokens: int) -> str:
+    parts = [model, f"{temperature:g}", str(max_tokens)]
+    parts += [f"{m['role']}:{normalize_prompt(m['content'])}" for m in messages]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+class LLMCache:
+    def __init__(self, path: str = "llm_cache.json", ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 1000, store: Optional[StateStore] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key -> [stored_at, answer]; dict order is LRU order, oldest first
+        self.state = (store or STORE).collection(path, dict)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def entries(self) -> Dict[str, list]:
+        return self.state.data
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[str]:
+        now = now or time.time()
+        entry = self.entries.pop(key, None)
+        if entry is None or now - entry[0] > self.ttl_seconds:
+            self.misses += 1
+            if entry is not None:
+                self.state.save()
+            return None
+        self.entries[key] = entry  # most recently used
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, answer: str, now: Optional[float] = None):
+        entries = self.entries
+        entries.pop(key, None)
+        entries[key] = [now or time.time(), answer]
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+        self.state.save()
+
+class LLMClient:
+    def __init__(self, api_key: Optional[str] = None, url: str = DEEPSEEK_URL,
+                 model: str = "deepseek-chat", cache: Optional[LLMCache] = None,
+                 max_concurrent: int = 2, timeout_seconds: float = 20):
+        self.api_key = api_key if api_key is not None else os.getenv("DEEPSEEK_API_KEY", "")
+        self.url = url
+        self.model = model
+        self.cache = cache if cache is not None else LLMCache()
+        self.max_concurrent = max_concurrent
+        self.timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        self._semaphore: "asyncio.Semaphore | None" = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.requests = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    async def _post(self, messages: List[dict], temperature: float, max_tokens: int) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        async with self._semaphore:
+            self.requests += 1
+            try:
+                async with get_session().post(self.url, json=payload, headers=headers,
+                                              timeout=self.timeout) as response:
+                    if response.status != 200:
+                        raise LLMError(f"DeepSeek API error: {response.status}")
+                    data = await response.json()
+            except asyncio.TimeoutError:
+                raise LLMError(f"DeepSeek timed out after {self.timeout.total:g}s")
+            except aiohttp.ClientError as e:
+                raise LLMError(f"DeepSeek request failed: {e}")
+        try:
+            return data['choices'][0]['message']['content'].strip()
+        except (KeyError, IndexError, TypeError):
+            raise LLMError("DeepSeek returned no answer")
+
+    async def _complete(self, key: str, messages: List[dict], temperature: float, max_tokens: int) -> str:
+        answer = await self._post(messages, temperature, max_tokens)
+        self.cache.put(key, answer)
+        return answer
+
+    async def complete(self, messages: List[dict], temperature: float = 0.3, max_tokens: int = 500) -> str:
+        """Answer for a chat prompt: cached, shared with an identical call in flight, or fetched"""
+        if not self.api_key:
+            raise LLMError("DeepSeek API key not configured")
+        key = cache_key(self.model, messages, temperature, max_tokens)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._complete(key, messages, temperature, max_tokens))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {'cached': len(self.cache), 'hits': self.cache.hits,
+                'misses': self.cache.misses, 'requests': self.requests}
+
+if __name__ == "__main__":
+    async def demo():
+        client = LLMClient(cache=LLMCache("demo_llm_cache.json", store=StateStore(flush_delay=0.1)))
+        if not client.configured:
+            print("❌ DEEPSEEK_API_KEY not set")
+            return
+        messages = [{"role": "user", "content": "Name three aircraft nicknamed after animals."}]
+        for _ in range(2):
+            started = time.monotonic()
+            answer = await client.complete(messages, max_tokens=60)
+            print(f"✅ {time.monotonic() - started:.3f}s: {answer[:60]}")
+        print(client.stats())
+
+    asyncio.run(demo())
@@ -1,20 +1,263 @@
 #!/usr/bin/env python3
 """
 Mission Finder - Find flights meeting specific mission criteria near airports
+
+Searches are written in a small query language, e.g.
+
+    speed>400 alt>35000 type=B77* within 150km of PHL
+
+Each query is compiled once into a MissionPlan: an ordered list of column
+filters that runs the cheapest, most selective predicates first and narrows a
+list of surviving rows over a FlightSnapshot, so extra criteria only ever look
+at the aircraft that survived the earlier ones.
 """
 import aiohttp
 import asyncio
+import fnmatch
 import math
+import operator
+import re
+from collections import OrderedDict
 from typing import List, Dict, Tuple, Optional
-from datetime import datetime, timezone
 import os
 import json
 from dotenv import load_dotenv
 
+from flight_snapshot import FlightSnapshot, SnapshotService, haversine_km, METERS_TO_FEET, MS_TO_KNOTS
+
 load_dotenv()
 
+KM_PER_DEG_LAT = 111.32
+UNIT_TO_KM = {'km': 1.0, 'nm': 1.852, 'mi': 1.609344}
+
+_OPS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '=': operator.eq,
+}
+
+
+class Predicate:
+    """One filter step of a mission plan.
+
+    ``cost`` is the relative per-row work and ``selectivity`` the estimated
+    fraction of rows that survive; the plan runs predicates by ascending
+    cost / (1 - selectivity).
+    """
+    cost = 1.0
+    selectivity = 0.5
+
+    def apply(self, snapshot: FlightSnapshot, rows, finder: "MissionFinder") -> List[int]:
+        raise NotImplementedError
+
+    @property
+    def rank(self) -> float:
+        return self.cost / max(1.0 - self.selectivity, 1e-3)
+
+    def __repr__(self) -> str:
+        return self.label
+
+
+class NumericPredicate(Predicate):
+    """Compare one numeric column against a constant (already in column units)"""
+    # Rough ceilings used to estimate how many aircraft pass a threshold
+    _SPANS = {'velocity': 550 / MS_TO_KNOTS, 'altitude': 45000 / METERS_TO_FEET}
+
+    def __init__(self, column: str, op: str, value: float, label: str):
+        self.column = column
+        self.op = op
+        self.compare = _OPS[op]
+        self.value = value
+        self.label = label
+
+        fraction = min(max(value / self._SPANS.get(column, value or 1.0), 0.0), 1.0)
+        if op in ('>', '>='):
+            self.selectivity = 1.0 - fraction
+        elif op in ('<', '<='):
+            self.selectivity = fraction
+        else:
+            self.selectivity = 0.01
+
+    def apply(self, snapshot, rows, finder):
+        col = getattr(snapshot, self.column)
+        compare, value = self.compare, self.value
+        # NaN (unknown) never satisfies a comparison, so missing data drops out
+        return [i for i in rows if compare(col[i], value)]
+
+
+class BoundingBoxPredicate(Predicate):
+    """Cheap lat/lon box around a point; always runs before the exact radius"""
+    cost = 1.0
+
+    def __init__(self, lat: float, lon: float, radius_km: float):
+        d_lat = radius_km / KM_PER_DEG_LAT
+        d_lon = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+        self.lat_min, self.lat_max = lat - d_lat, lat + d_lat
+        self.lon_min, self.lon_max = lon - d_lon, lon + d_lon
+        self.selectivity = min((radius_km / 1500.0) ** 2, 0.95)
+        self.label = f"bbox({radius_km:.0f}km)"
+
+    def apply(self, snapshot, rows, finder):
+        lats, lons = snapshot.latitude, snapshot.longitude
+        lat_min, lat_max = self.lat_min, self.lat_max
+        lon_min, lon_max = self.lon_min, self.lon_max
+        return [i for i in rows
+                if lat_min <= lats[i] <= lat_max and lon_min <= lons[i] <= lon_max]
+
+
+class RadiusPredicate(Predicate):
+    """Exact great-circle distance check"""
+    cost = 12.0
+    selectivity = 0.78  # circle inside its bounding box
+
+    def __init__(self, lat: float, lon: float, radius_km: float):
+        self.lat, self.lon, self.radius_km = lat, lon, radius_km
+        self.label = f"within({radius_km:.0f}km)"
+
+    def apply(self, snapshot, rows, finder):
+        lats, lons = snapshot.latitude, snapshot.longitude
+        lat, lon, radius = self.lat, self.lon, self.radius_km
+        return [i for i in rows if haversine_km(lat, lon, lats[i], lons[i]) <= radius]
+
+
+class TypePredicate(Predicate):
+    """ICAO type code glob(s) resolved through the local aircraft database"""
+    cost = 3.0
+    selectivity = 0.02
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self.regex = re.compile("|".join(fnmatch.translate(p) for p in patterns))
+        self._memo: Dict[str, bool] = {}
+        self.label = f"type={','.join(patterns)}"
+
+    def matches(self, type_code: str) -> bool:
+        hit = self._memo.get(type_code)
+        if hit is None:
+            hit = self._memo[type_code] = bool(self.regex.match(type_code))
+        return hit
+
+    def apply(self, snapshot, rows, finder):
+        if not finder.aircraft_db:
+            raise ValueError("type= needs the aircraft database, which isn't loaded")
+        db, icao24, matches = finder.aircraft_db, snapshot.icao24, self.matches
+        out = []
+        for i in rows:
+            info = db.get(icao24[i])
+            if info and matches(info.get('type', '')):
+                out.append(i)
+        return out
+
+
+class CallsignPredicate(Predicate):
+    """Callsign glob(s); plain prefixes use str.startswith"""
+    cost = 2.0
+    selectivity = 0.05
+
+    def __init__(self, patterns: List[str]):
+        self.label = f"callsign={','.join(patterns)}"
+        if all(p.endswith('*') and not any(c in p[:-1] for c in '*?[') for p in patterns):
+            self.prefixes = tuple(p[:-1] for p in patterns)
+            self.regex = None
+        else:
+            self.prefixes = None
+            self.regex = re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+    def apply(self, snapshot, rows, finder):
+        callsigns = snapshot.callsign
+        if self.prefixes is not None:
+            prefixes = self.prefixes
+            return [i for i in rows if callsigns[i].startswith(prefixes)]
+        match = self.regex.match
+        return [i for i in rows if match(callsigns[i])]
+
+
+class CountryPredicate(Predicate):
+    """Origin country membership (also backs transpacific/transatlantic)"""
+    cost = 1.0
+    selectivity = 0.1
+
+    def __init__(self, countries, label: str):
+        self.countries = frozenset(c.upper() for c in countries)
+        self.label = label
+
+    def apply(self, snapshot, rows, finder):
+        countries, wanted = snapshot.origin_country, self.countries
+        return [i for i in rows if countries[i].upper() in wanted]
+
+
+class ManufacturerPredicate(Predicate):
+    """Manufacturer name from the aircraft database, or its known type family"""
+    cost = 4.0
+    selectivity = 0.3
+
+    def __init__(self, name: str, type_codes: List[str]):
+        self.name = name.upper()
+        self.type_codes = frozenset(type_codes)
+        self.label = f"manufacturer={name.lower()}"
+
+    def apply(self, snapshot, rows, finder):
+        if not finder.aircraft_db:
+            raise ValueError("manufacturer= needs the aircraft database, which isn't loaded")
+        db, icao24 = finder.aircraft_db, snapshot.icao24
+        name, type_codes = self.name, self.type_codes
+        out = []
+        for i in rows:
+            info = db.get(icao24[i])
+            if not info:
+                continue
+            if info.get('type', '') in type_codes or name in (info.get('manufacturer') or '').upper():
+                out.append(i)
+        return out
+
+
+class MissionPlan:
+    """A compiled mission query: ordered predicates plus an optional search center"""
+
+    def __init__(self, text: str, predicates: List[Predicate], airport_code: Optional[str] = None,
+                 center: Optional[Tuple[float, float]] = None, radius_km: Optional[float] = None):
+        self.text = text
+        self.predicates = sorted(predicates, key=lambda p: p.rank)
+        self.airport_code = airport_code
+        self.center = center
+        self.radius_km = radius_km
+        self.criteria_labels = [p.label for p in predicates
+                                if not isinstance(p, (BoundingBoxPredicate, RadiusPredicate))]
+
+    def describe(self) -> str:
+        """Execution order, e.g. 'bbox(150km) → type=B77* → speed>400'"""
+        return " → ".join(p.label for p in self.predicates)
+
+
+# Clauses of the query language. Legacy forms ("speed >400 ABE",
+# "manufacturer boeing JFK", "route transpacific LAX") parse as well.
+_CLAUSE = re.compile(r"""
+    (?P<field>speed|spd|kts|alt|altitude)\s*(?P<op>>=|<=|>|<|=)\s*(?P<num>\d+(?:\.\d+)?)(?P<k>k)?(?=\s|$)
+  | within\s+(?P<radius>\d+(?:\.\d+)?)\s*(?P<unit>km|nm|mi)?\s+(?:of\s+)?(?P<within_ap>[a-z]{3,4})(?=\s|$)
+  | near\s+(?P<near_ap>[a-z]{3,4})(?=\s|$)
+  | (?P<kfield>type|ac|callsign|cs|country|manufacturer|mfr)(?:\s*[=:]\s*|\s+)(?P<kval>\S+)
+  | (?P<route>transpacific|transatlantic)(?=\s|$)
+  | (?P<word>\S+)
+""", re.IGNORECASE | re.VERBOSE)
+
+_NOISE_WORDS = {'!find', 'find', 'route', 'flights', 'aircraft', 'and'}
+
+
 class MissionFinder:
-    def __init__(self):
+    def __init__(self, aircraft_db: Optional[Dict[str, dict]] = None,
+                 snapshots: Optional[SnapshotService] = None):
+        # icao24 -> {'type', 'registration', 'manufacturer', ...} from the production database
+        self.aircraft_db = aircraft_db or {}
+        # Reuse the hunter's latest poll when it is fresh enough
+        self.snapshots = snapshots
+        self.max_snapshot_age = 120
+        self.default_radius_km = 200
+        self.max_results = 10
+        self.max_plans = 256  # compiled queries kept, least recently used dropped
+        self._plans: "OrderedDict[str, MissionPlan]" = OrderedDict()
+
         # Airport coordinates (basic set - could be expanded)
         self.airport_coords = {
             'ABE': (40.6522, -75.4402),  # Allentown
@@ -55,25 +298,14 @@ class MissionFinder:
         
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two coordinates in km"""
-        R = 6371  # Earth's radius in kilometers
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
-        
-        a = (math.sin(delta_lat / 2) ** 2 + 
-             math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        return R * c
+        return haversine_km(lat1, lon1, lat2, lon2)
     
     def get_airport_coordinates(self, airport_code: str) -> Optional[Tuple[float, float]]:
         """Get airport coordinates"""
         return self.airport_coords.get(airport_code.upper())
     
-    async def fetch_live_flights(self) -> List[Dict]:
-        """Fetch live flight data using OpenSky Network"""
+    async def fetch_snapshot(self) -> FlightSnapshot:
+        """Fetch live flight data from OpenSky Network as a column snapshot"""
         try:
             opensky_config = os.getenv("OPENSKY_API", "{}")
             config = json.loads(opensky_config)
@@ -86,173 +318,188 @@ class MissionFinder:
                 url = "https://opensky-network.org/api/states/all"
                 async with session.get(url) as response:
                     if response.status == 200:
-                        data = await response.json()
-                        
-                        flights = []
-                        if data and 'states' in data and data['states']:
-                            for state in data['states']:
-                                if len(state) >= 12 and state[1]:  # Has callsign
-                                    # Convert from OpenSky units
-                                    altitude_m = state[7] if state[7] else 0
-                                    velocity_ms = state[9] if state[9] else 0
-                                    
-                                    flight = {
-                                        'callsign': state[1].strip(),
-                                        'icao24': state[0],
-                                        'origin_country': state[2] or '',
-                                        'longitude': state[5],
-                                        'latitude': state[6], 
-                                        'altitude_ft': int(altitude_m * 3.28084) if altitude_m else 0,  # Convert to feet
-                                        'velocity_kts': int(velocity_ms * 1.94384) if velocity_ms else 0,  # Convert to knots
-                                        'heading': state[10],
-                                    }
-                                    
-                                    # Only include flights with valid position
-                                    if flight['latitude'] and flight['longitude']:
-                                        flights.append(flight)
-                        
-                        return flights
+                        return FlightSnapshot.from_opensky(await response.json())
                     
         except Exception as e:
             print(f"Error fetching flights: {e}")
             
-        return []
+        return FlightSnapshot()
     
-    def matches_manufacturer(self, callsign: str, manufacturer: str) -> bool:
-        """Check if flight callsign suggests specific manufacturer"""
-        # This is basic - in reality you'd need aircraft type data
-        manufacturer = manufacturer.upper()
-        if manufacturer in self.manufacturers:
-            # Basic callsign pattern matching (limited without real aircraft type data)
-            # This is a simplified approach
-            return True  # Would need real aircraft database
-        return False
+    async def latest_snapshot(self) -> FlightSnapshot:
+        """Shared hunter snapshot if recent, otherwise a fresh poll"""
+        if self.snapshots is not None:
+            age = self.snapshots.age_seconds()
+            if age is not None and age <= self.max_snapshot_age:
+                return self.snapshots.current
+        return await self.fetch_snapshot()
+
+    def _route_countries(self, route_type: str) -> List[str]:
+        if route_type.lower() == 'transpacific':
+            return self.transpacific_countries
+        if route_type.lower() == 'transatlantic':
+            return self.transatlantic_countries
+        raise ValueError(f"Unknown route type '{route_type}'")
     
-    def matches_route_type(self, origin_country: str, route_type: str) -> bool:
-        """Check if flight matches transpacific or transatlantic route"""
-        country = origin_country.upper()
+    def _location_predicates(self, airport_code: str, radius_km: float) -> List[Predicate]:
+        lat, lon = self.airport_coords[airport_code]
+        return [BoundingBoxPredicate(lat, lon, radius_km), RadiusPredicate(lat, lon, radius_km)]
         
-        if route_type.lower() == 'transpacific':
-            return country in self.transpacific_countries
-        elif route_type.lower() == 'transatlantic':
-            return country in self.transatlantic_countries
+    def compile_query(self, text: str) -> MissionPlan:
+        """Parse a mission query into an ordered plan (cached per query text)"""
+        key = " ".join(text.lower().split())
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = self._compile(text)
+            if len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        else:
+            self._plans.move_to_end(key)
+        return plan
             
-        return False
+    def _compile(self, text: str) -> MissionPlan:
+        predicates: List[Predicate] = []
+        airport_code = None
+        radius_km = None
+
+        for m in _CLAUSE.finditer(text.strip()):
+            if m.group('field'):
+                field = m.group('field').lower()
+                value = float(m.group('num')) * (1000 if m.group('k') else 1)
+                op = m.group('op')
+                if field in ('speed', 'spd', 'kts'):
+                    predicates.append(NumericPredicate('velocity', op, value / MS_TO_KNOTS, f"speed{op}{value:g}"))
+                else:
+                    predicates.append(NumericPredicate('altitude', op, value / METERS_TO_FEET, f"alt{op}{value:g}"))
+
+            elif m.group('within_ap') or m.group('near_ap'):
+                code = (m.group('within_ap') or m.group('near_ap')).upper()
+                if code not in self.airport_coords:
+                    raise ValueError(f"Airport {code} not found in database")
+                airport_code = code
+                if m.group('radius'):
+                    radius_km = float(m.group('radius')) * UNIT_TO_KM[(m.group('unit') or 'km').lower()]
+
+            elif m.group('kfield'):
+                field = m.group('kfield').lower()
+                value = m.group('kval')
+                if field in ('type', 'ac'):
+                    predicates.append(TypePredicate([p for p in value.upper().split(',') if p]))
+                elif field in ('callsign', 'cs'):
+                    predicates.append(CallsignPredicate([p for p in value.upper().split(',') if p]))
+                elif field == 'country':
+                    countries = [c.replace('_', ' ') for c in value.split(',') if c]
+                    predicates.append(CountryPredicate(countries, f"country={value.lower()}"))
+                else:
+                    predicates.append(ManufacturerPredicate(value, self.manufacturers.get(value.upper(), [])))
+
+            elif m.group('route'):
+                route = m.group('route').lower()
+                predicates.append(CountryPredicate(self._route_countries(route), route))
+
+            else:
+                word = m.group('word')
+                if word.lower() in _NOISE_WORDS:
+                    continue
+                if word.upper() in self.airport_coords:
+                    airport_code = word.upper()
+                    continue
+                raise ValueError(f"Don't understand '{word}'")
+
+        if not predicates:
+            raise ValueError("No search criteria given")
+
+        center = None
+        if airport_code:
+            radius_km = radius_km or self.default_radius_km
+            center = self.airport_coords[airport_code]
+            predicates.extend(self._location_predicates(airport_code, radius_km))
+
+        return MissionPlan(text.strip(), predicates, airport_code, center, radius_km)
+
+    def plan_from_criteria(self, airport_code: str, criteria: Dict, max_distance_km: float) -> MissionPlan:
+        """Build a plan from the legacy single-criterion dict"""
+        predicates: List[Predicate] = []
+        if 'min_speed' in criteria:
+            predicates.append(NumericPredicate('velocity', '>=', criteria['min_speed'] / MS_TO_KNOTS, f"speed>={criteria['min_speed']}"))
+        if 'max_speed' in criteria:
+            predicates.append(NumericPredicate('velocity', '<=', criteria['max_speed'] / MS_TO_KNOTS, f"speed<={criteria['max_speed']}"))
+        if 'min_altitude' in criteria:
+            predicates.append(NumericPredicate('altitude', '>=', criteria['min_altitude'] / METERS_TO_FEET, f"alt>={criteria['min_altitude']}"))
+        if 'max_altitude' in criteria:
+            predicates.append(NumericPredicate('altitude', '<=', criteria['max_altitude'] / METERS_TO_FEET, f"alt<={criteria['max_altitude']}"))
+        if 'route_type' in criteria:
+            predicates.append(CountryPredicate(self._route_countries(criteria['route_type']), criteria['route_type']))
+        if 'manufacturer' in criteria:
+            name = criteria['manufacturer']
+            predicates.append(ManufacturerPredicate(name, self.manufacturers.get(name.upper(), [])))
+
+        airport_code = airport_code.upper()
+        predicates.extend(self._location_predicates(airport_code, max_distance_km))
+        return MissionPlan(f"{criteria} {airport_code}", predicates, airport_code,
+                           self.airport_coords[airport_code], max_distance_km)
+
+    def execute_plan(self, plan: MissionPlan, snapshot: FlightSnapshot, limit: Optional[int] = None) -> List[Dict]:
+        """Run a compiled plan over one snapshot; nearest matches first"""
+        rows = snapshot.all_rows()
+        for predicate in plan.predicates:
+            rows = predicate.apply(snapshot, rows, self)
+            if not rows:
+                return []
+
+        if plan.center:
+            distances = snapshot.distances_km(rows, *plan.center)
+            rows = sorted(rows, key=distances.__getitem__)
+        else:
+            distances = {}
+
+        results = []
+        for i in rows[:limit or self.max_results]:
+            altitude = snapshot.altitude[i]
+            velocity = snapshot.velocity[i]
+            info = self.aircraft_db.get(snapshot.icao24[i]) or {}
+            results.append({
+                'callsign': snapshot.callsign[i] or snapshot.icao24[i].upper(),
+                'icao24': snapshot.icao24[i],
+                'origin_country': snapshot.origin_country[i],
+                'latitude': snapshot.latitude[i],
+                'longitude': snapshot.longitude[i],
+                'altitude_ft': int(altitude * METERS_TO_FEET) if altitude == altitude else 0,
+                'velocity_kts': int(velocity * MS_TO_KNOTS) if velocity == velocity else 0,
+                'heading': snapshot.heading[i] if snapshot.heading[i] == snapshot.heading[i] else None,
+                'type': info.get('type', ''),
+                'registration': info.get('registration', ''),
+                'distance_from_target': round(distances[i], 1) if i in distances else None,
+                'target_airport': plan.airport_code,
+            })
+        return results
+
+    async def run_query(self, query: str, snapshot: Optional[FlightSnapshot] = None) -> Tuple[MissionPlan, List[Dict]]:
+        """Compile (or reuse) a query plan and run it against a fresh snapshot"""
+        plan = self.compile_query(query)
+        snapshot = snapshot if snapshot is not None else await self.latest_snapshot()
+        return plan, self.execute_plan(plan, snapshot)
     
     async def find_flights_by_criteria(self, airport_code: str, criteria: Dict, max_distance_km: int = 200) -> List[Dict]:
         """Find flights meeting mission criteria near specified airport"""
-        coords = self.get_airport_coordinates(airport_code)
-        if not coords:
+        if not self.get_airport_coordinates(airport_code):
             return []  # Airport not found
             
-        target_lat, target_lon = coords
-        flights = await self.fetch_live_flights()
-        matching_flights = []
-        
-        for flight in flights:
-            # Calculate distance from target airport
-            distance = self.calculate_distance(
-                target_lat, target_lon,
-                flight['latitude'], flight['longitude']
-            )
-            
-            if distance <= max_distance_km:
-                # Check if flight matches criteria
-                matches = True
-                
-                # Speed filter
-                if 'min_speed' in criteria:
-                    if flight['velocity_kts'] < criteria['min_speed']:
-                        matches = False
-                        
-                if 'max_speed' in criteria:
-                    if flight['velocity_kts'] > criteria['max_speed']:
-                        matches = False
-                
-                # Altitude filter
-                if 'min_altitude' in criteria:
-                    if flight['altitude_ft'] < criteria['min_altitude']:
-                        matches = False
-                        
-                if 'max_altitude' in criteria:
-                    if flight['altitude_ft'] > criteria['max_altitude']:
-                        matches = False
-                
-                # Route type filter
-                if 'route_type' in criteria:
-                    if not self.matches_route_type(flight['origin_country'], criteria['route_type']):
-                        matches = False
-                
-                # Manufacturer filter (basic implementation)
-                if 'manufacturer' in criteria:
-                    if not self.matches_manufacturer(flight['callsign'], criteria['manufacturer']):
-                        matches = False
-                
-                if matches:
-                    flight['distance_from_target'] = round(distance, 1)
-                    flight['target_airport'] = airport_code
-                    matching_flights.append(flight)
-        
-        # Sort by distance and limit to 10 results
-        matching_flights.sort(key=lambda x: x['distance_from_target'])
-        return matching_flights[:10]
-
-# Utility functions for parsing search commands
-def parse_mission_command(command: str) -> Tuple[str, Dict, str]:
-    """Parse mission search command"""
-    # Example: "!find speed >400 ABE"
-    # Example: "!find altitude >35000 PHL" 
-    # Example: "!find transpacific JFK"
-    
-    parts = command.split()
-    if len(parts) < 3:
-        return "", {}, ""
-        
-    criteria_type = parts[1].lower()  # speed, altitude, transpacific, etc
-    airport_code = parts[-1].upper()  # Last part is airport
-    
-    criteria = {}
-    
-    if criteria_type == 'speed':
-        # Parse speed criteria: >400, <500, etc
-        speed_part = parts[2]
-        if speed_part.startswith('>'):
-            criteria['min_speed'] = int(speed_part[1:])
-        elif speed_part.startswith('<'):
-            criteria['max_speed'] = int(speed_part[1:])
-            
-    elif criteria_type == 'altitude':
-        # Parse altitude criteria: >35000, <40000, etc
-        alt_part = parts[2]
-        if alt_part.startswith('>'):
-            criteria['min_altitude'] = int(alt_part[1:])
-        elif alt_part.startswith('<'):
-            criteria['max_altitude'] = int(alt_part[1:])
-            
-    elif criteria_type in ['transpacific', 'transatlantic']:
-        criteria['route_type'] = criteria_type
-        
-    elif criteria_type == 'manufacturer':
-        # !find manufacturer bombardier ABE
-        if len(parts) >= 4:
-            criteria['manufacturer'] = parts[2]
-    
-    return criteria_type, criteria, airport_code
+        plan = self.plan_from_criteria(airport_code, criteria, max_distance_km)
+        return self.execute_plan(plan, await self.latest_snapshot())
 
 if __name__ == "__main__":
     async def test_mission_finder():
         finder = MissionFinder()
         
-        # Test speed search
-        print("Testing speed >400 near ABE...")
-        criteria = {'min_speed': 400}
-        flights = await finder.find_flights_by_criteria('ABE', criteria)
+        query = "speed>400 alt>30000 within 150km of PHL"
+        plan, flights = await finder.run_query(query)
+        print(f"Plan: {plan.describe()}")
         
-        print(f"Found {len(flights)} flights >400kts near ABE:")
+        print(f"Found {len(flights)} flights for '{query}':")
         for flight in flights:
             callsign = flight['callsign']
             speed = flight['velocity_kts']
             distance = flight['distance_from_target']
-            print(f"  {callsign} - {speed}kts - {distance}km from ABE")
+            print(f"  {callsign} - {speed}kts - {distance}km from PHL")
     
-    asyncio.run(test_mission_finder())
\ No newline at end of file
+    asyncio.run(test_mission_finder())
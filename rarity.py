@@ -1,47 +1,139 @@
 # rarity.py
 import json
 import math
-from typing import Optional, Tuple
+from array import array
+from typing import Dict, List, Optional, Tuple
 
-class RarityLookup:
-    """Loads rarity or FTEA tables and returns a numeric rarity score.
+# (minimum score, emoji, label), rarest first
+TIERS = (
+    (7.0, "💎", "Ultra-rare"),
+    (5.0, "🟣", "Rare"),
+    (3.0, "🔵", "Uncommon"),
+    (float("-inf"), "⚪", "Common"),
+)
+ULTRA, RARE, UNCOMMON, COMMON = range(len(TIERS))
 
-    rarity = 7.5 - ln(FTEA)  (natural log)
+CATALOG_COLUMNS = ["icao", "iata", "name", "category", "subcategory", "rarity"]
+
+def rarity_from_ftea(ftea: float) -> float:
+    return 7.5 - math.log(max(ftea, 1e-6))
+
+def tier_index(score: float) -> int:
+    for i, (minimum, _, _) in enumerate(TIERS):
+        if score >= minimum:
+            return i
+    return COMMON
+
+def rarity_tier(score: float) -> Tuple[str, str]:
+    _, emoji, label = TIERS[tier_index(score)]
+    return (emoji, label)
+
+def normalize_name(name: str) -> str:
+    """'AIRBUS A340-200' -> 'AIRBUSA340200'"""
+    return "".join(c for c in (name or "").upper() if c.isalnum())
+
+class RarityCatalog:
+    """Compiled Skycards catalog, one row per aircraft type.
+
+    Rows live in parallel columns with rarity and tier precomputed by
+    build_rarity_json.py; ``index`` maps ICAO code, IATA code and normalized
+    name to a row, so every lookup is a single dict probe. Falls back to the
+    older rarity.json/ftea.json pair when no compiled catalog is present.
     """
-    def __init__(self, rarity_file: str = "rarity.json", ftea_file: str = "ftea.json"):
-        self.by_rarity: dict[str, float] = {}
-        self.by_ftea: dict[str, float] = {}
+    def __init__(self, catalog_file: str = "rarity_catalog.json",
+                 rarity_file: str = "rarity.json", ftea_file: str = "ftea.json"):
+        self.icao: List[str] = []
+        self.name: List[str] = []
+        self.category: List[str] = []
+        self.subcategory: List[str] = []
+        self.rarity = array("d")
+        self.tier = bytearray()
+        self.index: Dict[str, int] = {}
         try:
-            with open(rarity_file, "r", encoding="utf-8") as f:
-                self.by_rarity = {k.upper(): float(v) for k, v in json.load(f).items()}
+            with open(catalog_file, "r", encoding="utf-8") as f:
+                self.load(json.load(f))
+        except FileNotFoundError:
+            self.load_legacy(rarity_file, ftea_file)
+        except Exception as e:
+            print(f"Error loading rarity catalog: {e}")
+            self.load_legacy(rarity_file, ftea_file)
+
+    def __len__(self) -> int:
+        return len(self.icao)
+
+    def add(self, icao: str, rarity: float, iata: str = "", name: str = "",
+            category: str = "", subcategory: str = "") -> int:
+        """Append one type and index it under every code it is known by"""
+        row = len(self.icao)
+        self.icao.append(icao.upper())
+        self.name.append(name)
+        self.category.append(category)
+        self.subcategory.append(subcategory)
+        self.rarity.append(rarity)
+        self.tier.append(tier_index(rarity))
+        for key in (icao.upper(), (iata or "").upper(), normalize_name(name)):
+            if key:
+                self.index.setdefault(key, row)
+        return row
+
+    def load(self, data: dict):
+        """Load a compiled catalog ({'columns': [...], 'rows': [[...], ...]})"""
+        col = {name: i for i, name in enumerate(data["columns"])}
+        for values in data["rows"]:
+            self.add(values[col["icao"]], float(values[col["rarity"]]), values[col["iata"]],
+                     values[col["name"]], values[col["category"]], values[col["subcategory"]])
+
+    def load_legacy(self, rarity_file: str, ftea_file: str):
+        """Build rows from rarity.json, filling gaps from ftea.json"""
+        scores: Dict[str, float] = {}
+        try:
+            with open(ftea_file, "r", encoding="utf-8") as f:
+                scores.update({k.upper(): rarity_from_ftea(float(v)) for k, v in json.load(f).items()})
         except Exception:
             pass
         try:
-            with open(ftea_file, "r", encoding="utf-8") as f:
-                self.by_ftea = {k.upper(): float(v) for k, v in json.load(f).items()}
+            with open(rarity_file, "r", encoding="utf-8") as f:
+                scores.update({k.upper(): float(v) for k, v in json.load(f).items()})
         except Exception:
             pass
+        for code, score in scores.items():
+            self.add(code, score)
 
-    @staticmethod
-    def rarity_from_ftea(ftea: float) -> float:
-        return 7.5 - math.log(max(ftea, 1e-6))
-
-    def get(self, icao: Optional[str], iata: Optional[str]) -> Optional[float]:
-        for code in [icao, iata]:
+    def row(self, *codes: Optional[str]) -> Optional[int]:
+        """Row for the first code (ICAO, IATA or aircraft name) that is known"""
+        index = self.index
+        for code in codes:
             if not code:
                 continue
-            code = code.upper()
-            if code in self.by_rarity:
-                return float(self.by_rarity[code])
-            if code in self.by_ftea:
-                return float(self.rarity_from_ftea(self.by_ftea[code]))
+            row = index.get(code.upper())
+            if row is None:
+                row = index.get(normalize_name(code))
+            if row is not None:
+                return row
         return None
 
-def rarity_tier(score: float) -> Tuple[str, str]:
-    if score >= 7.0:
-        return ("💎", "Ultra-rare")
-    if score >= 5.0:
-        return ("🟣", "Rare")
-    if score >= 3.0:
-        return ("🔵", "Uncommon")
-    return ("⚪", "Common")
\ No newline at end of file
+    def get(self, icao: Optional[str], iata: Optional[str] = None) -> Optional[float]:
+        row = self.row(icao, iata)
+        return None if row is None else self.rarity[row]
+
+    def tier_of(self, row: int) -> Tuple[str, str]:
+        _, emoji, label = TIERS[self.tier[row]]
+        return (emoji, label)
+
+    def entry(self, *codes: Optional[str]) -> Optional[dict]:
+        row = self.row(*codes)
+        if row is None:
+            return None
+        emoji, label = self.tier_of(row)
+        return {
+            'icao': self.icao[row],
+            'name': self.name[row],
+            'category': self.category[row],
+            'subcategory': self.subcategory[row],
+            'rarity': self.rarity[row],
+            'tier': label,
+            'emoji': emoji,
+        }
+
+# Older name, kept for existing callers
+RarityLookup = RarityCatalog
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Subscription Engine - Per-user watches fanned out from one pass over the snapshot
+
+Each Discord user keeps their own aircraft types, registrations, ICAO24 hexes
+and regions (airport + radius). Watches are held in inverted indexes
+(key -> subscribers), so a cycle probes each aircraft a fixed number of times
+and only does work for actual matches, however many users or rules exist.
+Hex/type/registration watches are probed for every aircraft in the snapshot;
+region watches fire when an aircraft crosses into the radius (or on the first
+cycle after the user changes their watches).
+"""
+import math
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from flight_snapshot import FlightSnapshot, haversine_km
+from registry_index import RegistrationIndex, normalize_registration
+from state_store import STORE, StateStore
+
+KINDS = ('types', 'registrations', 'hexes', 'regions')
+
+class SubscriptionEngine:
+    def __init__(self, config_file: str = "subscriptions.json",
+                 airport_coords: Optional[Dict[str, Tuple[float, float]]] = None,
+                 cell_deg: float = 1.0,
+                 registration_index: Optional[RegistrationIndex] = None,
+                 store: Optional[StateStore] = None):
+        self.config_file = config_file
+        self.store = store or STORE
+        self.airport_coords = airport_coords or {}
+        # Resolves tail-number watches to hexes; without it registrations are
+        # matched through the registry on every row instead
+        self.registration_index = registration_index
+        self.cell_deg = cell_deg
+        self.max_rules_per_user = 25
+        self.default_radius_km = 100
+        self.realert_seconds = 1800  # same aircraft to same user at most every 30 minutes
+        self.last_alert: Dict[Tuple[str, str], float] = {}
+        # Users whose region watches changed: matched against positions, not crossings, once
+        self.rescan_users: Set[str] = set()
+
+        # user_id (str) -> {'channel_id': int, 'types': [...], 'registrations': [...], 'hexes': [...], 'regions': [...]}
+        self.users: Dict[str, dict] = self.load_config()
+
+        # Inverted indexes: match key -> subscriber ids (hexes: subscriber -> reason)
+        self.by_type: Dict[str, Set[str]] = {}
+        self.by_registration: Dict[str, Set[str]] = {}
+        self.by_icao24: Dict[str, Dict[str, str]] = {}
+        self.by_cell: Dict[Tuple[int, int], List[Tuple[str, dict]]] = {}
+        self.rebuild_index()
+
+    def load_config(self) -> Dict[str, dict]:
+        """Load subscriptions through the shared state store"""
+        self.state = self.store.collection(self.config_file, dict)
+        return self.state.data
+
+    def save_config(self):
+        """Save subscriptions (debounced, written off the event loop)"""
+        self.state.save()
+
+    def _cells_for_region(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, int]]:
+        d_lat = radius_km / 111.32
+        d_lon = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+        size = self.cell_deg
+        return [(cy, cx)
+                for cy in range(math.floor((lat - d_lat) / size), math.floor((lat + d_lat) / size) + 1)
+                for cx in range(math.floor((lon - d_lon) / size), math.floor((lon + d_lon) / size) + 1)]
+
+    def rebuild_index(self):
+        """Rebuild all inverted indexes from the per-user lists"""
+        self.by_type, self.by_registration, self.by_icao24, self.by_cell = {}, {}, {}, {}
+        for user_id, sub in self.users.items():
+            for code in sub.get('types', []):
+                self.by_type.setdefault(code, set()).add(user_id)
+            for reg in sub.get('registrations', []):
+                icao24 = self.registration_index.lookup(reg) if self.registration_index else None
+                if icao24:
+                    self.by_icao24.setdefault(icao24, {})[user_id] = f"Registration {reg}"
+                else:
+                    self.by_registration.setdefault(normalize_registration(reg), set()).add(user_id)
+            for hex_code in sub.get('hexes', []):
+                self.by_icao24.setdefault(hex_code, {})[user_id] = f"Hex {hex_code.upper()}"
+            for region in sub.get('regions', []):
+                for cell in self._cells_for_region(region['lat'], region['lon'], region['radius_km']):
+                    self.by_cell.setdefault(cell, []).append((user_id, region))
+
+    def get_user(self, user_id) -> dict:
+        return self.users.get(str(user_id), {kind: [] for kind in KINDS})
+
+    def get_channel_for_user(self, user_id) -> Optional[int]:
+        return self.users.get(str(user_id), {}).get('channel_id')
+
+    def rule_count(self, user_id) -> int:
+        sub = self.users.get(str(user_id), {})
+        return sum(len(sub.get(kind, [])) for kind in KINDS)
+
+    def _parse_value(self, kind: str, value: str, radius_km: Optional[float]):
+        value = value.strip()
+        if kind == 'types':
+            return value.upper()
+        if kind == 'registrations':
+            return normalize_registration(value)
+        if kind == 'hexes':
+            hex_code = value.lower()
+            if len(hex_code) != 6 or any(c not in "0123456789abcdef" for c in hex_code):
+                raise ValueError(f"**{value}** is not a 6-digit ICAO24 hex")
+            return hex_code
+        if kind == 'regions':
+            code = value.upper()
+            if code not in self.airport_coords:
+                raise ValueError(f"Airport **{code}** not found in database.")
+            lat, lon = self.airport_coords[code]
+            return {'name': code, 'lat': lat, 'lon': lon, 'radius_km': float(radius_km or self.default_radius_km)}
+        raise ValueError(f"Unknown subscription kind '{kind}'")
+
+    def add(self, user_id, kind: str, value: str, channel_id: int, radius_km: Optional[float] = None) -> Tuple[bool, str]:
+        """Add a watch for a user. Returns (success, message)"""
+        user_id = str(user_id)
+        try:
+            entry = self._parse_value(kind, value, radius_km)
+        except ValueError as e:
+            return False, f"❌ {e}"
+
+        sub = self.users.setdefault(user_id, {'channel_id': channel_id, **{k: [] for k in KINDS}})
+        sub['channel_id'] = channel_id  # alerts follow the channel the user last subscribed from
+
+        existing = sub.setdefault(kind, [])
+        name = entry['name'] if kind == 'regions' else entry
+        if any((e['name'] if kind == 'regions' else e) == name for e in existing):
+            return False, f"❌ You're already watching **{name}**."
+        if self.rule_count(user_id) >= self.max_rules_per_user:
+            return False, f"❌ You already have {self.max_rules_per_user} watches (max limit)."
+
+        existing.append(entry)
+        self.rebuild_index()
+        self.rescan_users.add(user_id)
+        self.save_config()
+        label = f"{name} within {entry['radius_km']:.0f}km" if kind == 'regions' else name
+        if kind == 'registrations' and self.registration_index is not None:
+            icao24 = self.registration_index.lookup(entry)
+            label += f" (hex {icao24.upper()})" if icao24 else " (not in the aircraft database yet)"
+        return True, f"✅ Now watching **{label}** for you."
+
+    def remove(self, user_id, kind: str, value: str) -> Tuple[bool, str]:
+        """Remove one watch. Returns (success, message)"""
+        sub = self.users.get(str(user_id))
+        if not sub:
+            return False, "❌ You have no watches."
+        value = value.strip()
+        key = {
+            'types': value.upper(),
+            'registrations': normalize_registration(value),
+            'hexes': value.lower(),
+            'regions': value.upper(),
+        }.get(kind, value)
+        entries = sub.get(kind, [])
+        kept = [e for e in entries if (e['name'] if kind == 'regions' else e) != key]
+        if len(kept) == len(entries):
+            return False, f"❌ **{key}** is not in your watches."
+        sub[kind] = kept
+        self.rebuild_index()
+        self.save_config()
+        return True, f"✅ Stopped watching **{key}**."
+
+    def clear(self, user_id) -> Tuple[bool, str]:
+        """Remove every watch for a user"""
+        count = self.rule_count(user_id)
+        if self.users.pop(str(user_id), None) is None:
+            return False, "❌ You have no watches."
+        self.rebuild_index()
+        self.save_config()
+        return True, f"✅ Cleared {count} watches."
+
+    def match(self, snapshot: FlightSnapshot, aircraft_db: Dict[str, dict],
+              previous: Optional[FlightSnapshot] = None,
+              now: Optional[float] = None) -> Dict[str, List[Tuple[int, str]]]:
+        """Fan one pass over the snapshot out to subscribers.
+
+        Returns user_id -> [(row, reason), ...]; each aircraft appears at most
+        once per user even if several of their watches hit it, and is not
+        repeated to the same user within ``realert_seconds``. Region watches
+        only fire for aircraft that were outside the radius (or absent) in
+        ``previous``.
+        """
+        by_type, by_reg, by_hex, by_cell = self.by_type, self.by_registration, self.by_icao24, self.by_cell
+        size = self.cell_deg
+        now = now or time.time()
+        last_alert, cutoff = self.last_alert, now - self.realert_seconds
+        fanout: Dict[str, List[Tuple[int, str]]] = {}
+
+        def hit(user_id: str, row: int, reason: str, seen: Set[str]):
+            if user_id in seen:
+                return
+            seen.add(user_id)
+            key = (user_id, snapshot.icao24[row])
+            if last_alert.get(key, 0) > cutoff:
+                return
+            last_alert[key] = now
+            fanout.setdefault(user_id, []).append((row, reason))
+
+        # Drop expired suppression entries so the map only holds recent alerts
+        for key in [k for k, t in last_alert.items() if t <= cutoff]:
+            del last_alert[key]
+
+        prev_row = previous.row_of if previous is not None else {}
+        rescan = self.rescan_users
+
+        def crossed_in(user_id: str, region: dict, icao24: str) -> bool:
+            j = prev_row.get(icao24)
+            if previous is None or j is None or user_id in rescan:
+                return True
+            return haversine_km(region['lat'], region['lon'],
+                                previous.latitude[j], previous.longitude[j]) > region['radius_km']
+
+        for i in snapshot.all_rows():
+            icao24 = snapshot.icao24[i]
+            seen: Set[str] = set()
+
+            watchers = by_hex.get(icao24)
+            if watchers:
+                for user_id, reason in watchers.items():
+                    hit(user_id, i, reason, seen)
+
+            info = aircraft_db.get(icao24)
+            if info:
+                type_code = info.get('type', '')
+                for user_id in by_type.get(type_code, ()):
+                    hit(user_id, i, f"Type {type_code}", seen)
+                if by_reg:
+                    reg = normalize_registration(info.get('registration', ''))
+                    for user_id in by_reg.get(reg, ()):
+                        hit(user_id, i, f"Registration {info.get('registration')}", seen)
+
+            if by_cell:
+                lat, lon = snapshot.latitude[i], snapshot.longitude[i]
+                for user_id, region in by_cell.get((math.floor(lat / size), math.floor(lon / size)), ()):
+                    if (user_id not in seen
+                            and haversine_km(region['lat'], region['lon'], lat, lon) <= region['radius_km']
+                            and crossed_in(user_id, region, icao24)):
+                        hit(user_id, i, f"Near {region['name']}", seen)
+
+        self.rescan_users = set()
+        return fanout
+
+if __name__ == "__main__":
+    engine = SubscriptionEngine("test_subscriptions.json", {'ABE': (40.6522, -75.4402)})
+    print(engine.add(1234, 'types', 'ab18', 1427823232446238803))
+    print(engine.add(1234, 'regions', 'ABE', 1427823232446238803, 50))
+    print(f"Index: {len(engine.by_type)} types, {len(engine.by_cell)} cells")
+    os.remove("test_subscriptions.json")
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Alert Dispatcher - Queued, coalesced, rate-limit-aware delivery of alerts
+
+Producers (hunt cycle, subscriptions, airport watch, reminders) submit
+AlertJobs and return immediately. Each destination channel has its own
+worker and bounded queue, so a flooded or rate-limited channel never holds
+up another user's alerts. A worker takes its most urgent job, packs other
+queued jobs into the same message (up to 10 embeds, or text lines up to
+Discord's 2000 characters) and sends it. Waiting is driven by Discord's
+rate-limit headers, not fixed sleeps.
+
+Text lines sent with a key (icao24) stay live for a while: later updates
+for the same aircraft rewrite that line and the message is edited in
+place, at most once per ``min_edit_seconds``, instead of posting again.
+
+Channels in digest mode hold their less urgent text alerts, one line per
+aircraft, and post them as a single summary whenever flush_digests runs;
+more urgent alerts still go out immediately.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Lower sends first
+PRIORITY_HIGH = 0    # user targets, personal subscriptions, glow
+PRIORITY_ULTRA = 1
+PRIORITY_MEDIUM = 2  # database rare types
+PRIORITY_LOW = 3     # callsign-prefix matches
+
+MAX_EMBEDS = 10
+MAX_CHARS = 2000
+
+class AlertJob:
+    """One alert waiting to be delivered to one channel"""
+
+    def __init__(self, channel_id: int, priority: int, text: Optional[str] = None, embed=None,
+                 mention: Optional[str] = None, reaction: Optional[str] = None,
+                 on_sent: Optional[Callable[[object], None]] = None,
+                 key: Optional[str] = None, context: Optional[dict] = None,
+                 on_dropped: Optional[Callable[[], None]] = None):
+        self.channel_id = channel_id
+        self.priority = priority
+        self.text = text          # one line of a packed text message
+        self.embed = embed        # or one embed of a packed embed message
+        self.mention = mention    # content for embed messages (role/user pings)
+        self.reaction = reaction  # added once to the message carrying this job
+        # Called with the sent message, or when a full queue drops the job;
+        # lists because a merged job carries the callbacks of every line in it
+        self.on_sent: List[Callable[[object], None]] = [on_sent] if on_sent else []
+        self.on_dropped: List[Callable[[], None]] = [on_dropped] if on_dropped else []
+        self.key = key            # icao24 of a text line that may be edited in place later
+        self.context = context    # whatever the producer needs to re-render that line
+        self.created_at = time.time()
+        self.seq = 0              # submission order, set by the dispatcher
+
+    @property
+    def kind(self) -> str:
+        return 'embed' if self.embed is not None else 'text'
+
+    def dropped(self):
+        """Tell the producer this job will never be sent"""
+        for callback in self.on_dropped:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Alert on_dropped callback failed: {e}")
+
+class RouteBuckets:
+    """Per-route rate-limit state taken from Discord response headers"""
+
+    def __init__(self):
+        # route -> (requests remaining, epoch when the bucket resets)
+        self.buckets: Dict[str, Tuple[int, float]] = {}
+
+    def update(self, route: str, headers, now: Optional[float] = None):
+        """Record X-RateLimit-* / Retry-After headers from one response"""
+        now = now or time.time()
+        headers = headers or {}
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            self.buckets[route] = (0, now + float(retry_after))
+            return
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+        if remaining is not None and reset_after is not None:
+            self.buckets[route] = (int(float(remaining)), now + float(reset_after))
+
+    def delay(self, route: str, now: Optional[float] = None) -> float:
+        """Seconds to wait before the next request on this route"""
+        now = now or time.time()
+        remaining, reset_at = self.buckets.get(route, (1, 0.0))
+        if remaining > 0 or reset_at <= now:
+            return 0.0
+        return reset_at - now
+
+    async def wait(self, route: str):
+        delay = self.delay(route)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def pack(jobs: List[AlertJob]) -> Tuple[List[AlertJob], List[AlertJob]]:
+    """Split jobs (same channel, most urgent first) into one message's worth and the rest"""
+    first = jobs[0]
+    taken, rest = [first], []
+    if first.kind == 'embed':
+        for job in jobs[1:]:
+            if job.kind == 'embed' and len(taken) < MAX_EMBEDS:
+                taken.append(job)
+            else:
+                rest.append(job)
+    else:
+        size = len(first.text)
+        for job in jobs[1:]:
+            if job.kind == 'text' and size + 1 + len(job.text) <= MAX_CHARS:
+                taken.append(job)
+                size += 1 + len(job.text)
+            else:
+                rest.append(job)
+    return taken, rest
+
+def render(jobs: List[AlertJob]) -> Tuple[Optional[str], list]:
+    """(content, embeds) for one packed message"""
+    if jobs[0].kind == 'embed':
+        mentions = list(dict.fromkeys(job.mention for job in jobs if job.mention))
+        return (" ".join(mentions) or None), [job.embed for job in jobs]
+    return "\n".join(job.text for job in jobs), []
+
+class LiveMessage:
+    """A sent text message whose lines can still be rewritten"""
+
+    def __init__(self, channel_id: int, message, lines: List[str]):
+        self.channel_id = channel_id
+        self.message = message
+        self.lines = lines
+        self.dirty = False
+        self.edited_at = 0.0
+
+class LiveEntry:
+    def __init__(self, live: LiveMessage, index: int, context: Optional[dict], now: float):
+        self.live = live
+        self.index = index        # which line of the message is this aircraft's
+        self.context = context
+        self.updated_at = now
+
+class LiveMessages:
+    """(channel, icao24) -> the line that alerted it, kept while the aircraft keeps updating"""
+
+    def __init__(self, ttl_seconds: float = 1800, min_edit_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds            # forget lines not updated for this long
+        self.min_edit_seconds = min_edit_seconds  # edit one message at most this often
+        self.entries: Dict[Tuple[int, str], LiveEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def track(self, message, jobs: List[AlertJob], now: Optional[float] = None):
+        """Remember the keyed lines of a text message that was just sent"""
+        if jobs[0].kind != 'text' or not any(job.key for job in jobs):
+            return
+        now = now or time.time()
+        live = LiveMessage(jobs[0].channel_id, message, [job.text for job in jobs])
+        live.edited_at = now
+        for index, job in enumerate(jobs):
+            if job.key:
+                self.entries[(job.channel_id, job.key)] = LiveEntry(live, index, job.context, now)
+
+    def expire(self, now: Optional[float] = None):
+        now = now or time.time()
+        for k in [k for k, e in self.entries.items() if now - e.updated_at > self.ttl_seconds]:
+            del self.entries[k]
+
+    def items(self) -> List[Tuple[Tuple[int, str], Optional[dict]]]:
+        """((channel_id, key), context) for every live line"""
+        self.expire()
+        return [(k, e.context) for k, e in self.entries.items()]
+
+    def context(self, channel_id: int, key: str, now: Optional[float] = None) -> Optional[dict]:
+        """Context of the live line for key, or None if nothing is live for it"""
+        entry = self.entries.get((channel_id, key))
+        if entry is None or (now or time.time()) - entry.updated_at > self.ttl_seconds:
+            return None
+        return entry.context or {}
+
+    def update(self, channel_id: int, key: str, text: str, context: Optional[dict] = None,
+               now: Optional[float] = None) -> bool:
+        """Rewrite a live line; False if there is none and a new alert should be posted"""
+        now = now or time.time()
+        entry = self.entries.get((channel_id, key))
+        if entry is None or now - entry.updated_at > self.ttl_seconds:
+            self.entries.pop((channel_id, key), None)
+            return False
+        entry.updated_at = now
+        if context is not None:
+            entry.context = context
+        if entry.live.lines[entry.index] != text:
+            entry.live.lines[entry.index] = text
+            entry.live.dirty = True
+        return True
+
+    def due(self, now: Optional[float] = None) -> List[LiveMessage]:
+        """Changed messages whose edit throttle has passed"""
+        now = now or time.time()
+        pending = {id(e.live): e.live for e in self.entries.values() if e.live.dirty}
+        return [live for live in pending.values() if now - live.edited_at >= self.min_edit_seconds]
+
+class DigestBuffer:
+    """Less urgent text alerts for one channel, held until the next summary"""
+
+    def __init__(self, channel_id: int, from_priority: int):
+        self.channel_id = channel_id
+        self.from_priority = from_priority  # jobs at this priority or less urgent are held
+        self.jobs: Dict[str, AlertJob] = {}  # icao24 (or the line itself) -> latest job
+        self.since = time.time()
+        self.held = 0
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def accepts(self, job: AlertJob) -> bool:
+        return job.kind == 'text' and job.priority >= self.from_priority
+
+    def add(self, job: AlertJob):
+        """Hold a job; a repeat sighting of the same aircraft replaces the earlier line"""
+        previous = self.jobs.pop(job.key or job.text, None)
+        if previous is not None:
+            job.seq = previous.seq  # keep its place in the summary
+        self.jobs[job.key or job.text] = job
+        self.held += 1
+
+    def summary(self, now: Optional[float] = None) -> Optional[str]:
+        """One compact message for everything held, oldest most-urgent first; empties the buffer"""
+        if not self.jobs:
+            return None
+        now = now or time.time()
+        jobs = sorted(self.jobs.values(), key=lambda job: (job.priority, job.seq))
+        lines = [f"📋 **Digest** - {len(jobs)} aircraft since <t:{int(self.since)}:t>"]
+        size = len(lines[0])
+        for shown, job in enumerate(jobs):
+            more = f"…and {len(jobs) - shown} more"
+            if size + 1 + len(job.text) + 1 + len(more) > MAX_CHARS:
+                lines.append(more)
+                break
+            lines.append(job.text)
+            size += 1 + len(job.text)
+        self.jobs = {}
+        self.since = now
+        return "\n".join(lines)
+
+class ChannelWorker:
+    """Bounded priority queue plus the task that drains it, for one channel"""
+
+    def __init__(self, dispatcher: "AlertDispatcher", channel_id: int, max_queue: int):
+        self.dispatcher = dispatcher
+        self.channel_id = channel_id
+        self.max_queue = max_queue
+        self.heap: List[Tuple[int, int, AlertJob]] = []
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.merged = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def _push(self, job: AlertJob):
+        heapq.heappush(self.heap, (job.priority, job.seq, job))
+        self.wake.set()
+
+    def _drop(self, job: AlertJob):
+        self.dropped += 1
+        job.dropped()
+
+    def put(self, job: AlertJob):
+        """Queue a job; when full, the least urgent job is merged or dropped"""
+        if len(self.heap) < self.max_queue:
+            self._push(job)
+            return
+        worst = max(self.heap)
+        if (job.priority, job.seq) > worst[:2]:
+            # The newcomer is the least urgent: fold it into the worst text line or drop it
+            queued = worst[2]
+            if (job.kind == 'text' and queued.kind == 'text'
+                    and len(queued.text) + 1 + len(job.text) <= MAX_CHARS):
+                queued.text = f"{queued.text}\n{job.text}"
+                queued.key = None  # a multi-line job can no longer be edited line by line
+                queued.on_sent += job.on_sent
+                queued.on_dropped += job.on_dropped
+                self.merged += 1
+            else:
+                self._drop(job)
+            return
+        self.heap.remove(worst)
+        heapq.heapify(self.heap)
+        self._drop(worst[2])
+        self._push(job)
+
+    def requeue(self, jobs: List[AlertJob]):
+        """Put jobs back in their original order (rate limited); never drops"""
+        for job in jobs:
+            self._push(job)
+
+    def take(self) -> List[AlertJob]:
+        """Pop the next message's worth of jobs, most urgent first"""
+        jobs = [heapq.heappop(self.heap)[2] for _ in range(len(self.heap))]
+        taken, rest = pack(jobs)
+        self.heap = [(job.priority, job.seq, job) for job in rest]  # already sorted, so a valid heap
+        return taken
+
+    async def run(self):
+        while True:
+            if not self.heap:
+                self.wake.clear()
+                await self.wake.wait()
+                continue
+            try:
+                await self.dispatcher.deliver(self.take())
+            except Exception as e:
+                print(f"Alert worker for {self.channel_id} failed: {e}")
+
+class AlertDispatcher:
+    def __init__(self, send: Callable[[int, Optional[str], list], Awaitable[Tuple[object, Optional[dict]]]],
+                 max_queue: int = 50,
+                 edit: Optional[Callable[[object, str], Awaitable[Optional[dict]]]] = None,
+                 live: Optional[LiveMessages] = None):
+        # send(channel_id, content, embeds) -> (message, response headers or None).
+        # Raises on failure; a 429 carries .status and .response.headers like
+        # discord.HTTPException does.
+        self.send = send
+        self.max_queue = max_queue
+        # edit(message, content) -> response headers or None; without it nothing is live
+        self.edit = edit
+        self.live = live if live is not None else LiveMessages()
+        self.buckets = RouteBuckets()
+        self.workers: Dict[int, ChannelWorker] = {}
+        self._seq = itertools.count()
+        self.sent_messages = 0
+        self.sent_alerts = 0
+        self.failed_alerts = 0
+        self.edits = 0
+        self.digests: Dict[int, DigestBuffer] = {}
+
+    def set_digest(self, channel_id: int, from_priority: Optional[int]):
+        """Hold this channel's text alerts at from_priority or below for flush_digests (None: off)"""
+        if from_priority is None:
+            self.digests.pop(channel_id, None)
+        else:
+            self.digests[channel_id] = DigestBuffer(channel_id, from_priority)
+
+    def flush_digests(self) -> int:
+        """Queue one summary message per channel with held alerts"""
+        flushed = 0
+        for buffer in self.digests.values():
+            summary = buffer.summary()
+            if summary:
+                self.submit(AlertJob(buffer.channel_id, buffer.from_priority, text=summary), digest=False)
+                flushed += 1
+        return flushed
+
+    def submit(self, job: AlertJob, digest: bool = True):
+        """Queue an alert on its channel's worker (or its digest); never blocks. Needs a running loop."""
+        job.seq = next(self._seq)
+        buffer = self.digests.get(job.channel_id) if digest else None
+        if buffer is not None and buffer.accepts(job):
+            buffer.add(job)
+            return
+        worker = self.workers.get(job.channel_id)
+        if worker is None:
+            worker = self.workers[job.channel_id] = ChannelWorker(self, job.channel_id, self.max_queue)
+        if worker.task is None or worker.task.done():
+            # One task per channel: a slow or rate-limited channel only delays itself
+            worker.task = asyncio.get_running_loop().create_task(worker.run())
+        worker.put(job)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'channels': len(self.workers),
+            'queued': sum(len(w) for w in self.workers.values()),
+            'dropped': sum(w.dropped for w in self.workers.values()),
+            'merged': sum(w.merged for w in self.workers.values()),
+            'sent_messages': self.sent_messages,
+            'sent_alerts': self.sent_alerts,
+            'failed_alerts': self.failed_alerts,
+            'live': len(self.live),
+            'edits': self.edits,
+            'digested': sum(b.held for b in self.digests.values()),
+        }
+
+    def update_live(self, channel_id: int, key: str, text: str, context: Optional[dict] = None) -> bool:
+        """Rewrite the live line for key in place; False if a new alert is needed"""
+        return self.edit is not None and self.live.update(channel_id, key, text, context)
+
+    async def refresh_live(self) -> int:
+        """Push pending line rewrites to Discord, respecting each message's throttle"""
+        if self.edit is None:
+            return 0
+        edited = 0
+        for live in self.live.due():
+            route = f"edit:{live.channel_id}"
+            await self.buckets.wait(route)
+            content = "\n".join(live.lines)
+            live.dirty = False
+            live.edited_at = time.time()
+            if len(content) > MAX_CHARS:
+                continue
+            try:
+                self.buckets.update(route, await self.edit(live.message, content))
+                edited += 1
+            except Exception as e:
+                response = getattr(e, 'response', None)
+                self.buckets.update(route, getattr(response, 'headers', None))
+                if getattr(e, 'status', None) == 429:
+                    live.dirty = True  # retried on the next refresh
+                else:
+                    print(f"Error editing live alert in {live.channel_id}: {e}")
+        self.edits += edited
+        return edited
+
+    async def deliver(self, jobs: List[AlertJob]) -> Optional[object]:
+        """Send one packed message; on a 429 the jobs are requeued, on any other error dropped"""
+        route = f"channel:{jobs[0].channel_id}"
+        await self.buckets.wait(route)
+        content, embeds = render(jobs)
+        try:
+            message, headers = await self.send(jobs[0].channel_id, content, embeds)
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            self.buckets.update(route, getattr(response, 'headers', None))
+            if getattr(e, 'status', None) == 429:
+                self.workers[jobs[0].channel_id].requeue(jobs)
+                return None
+            print(f"Error delivering {len(jobs)} alerts to {jobs[0].channel_id}: {e}")
+            self.failed_alerts += len(jobs)
+            for job in jobs:
+                job.dropped()
+            return None
+
+        self.buckets.update(route, headers)
+        self.sent_messages += 1
+        self.sent_alerts += len(jobs)
+        if self.edit is not None:
+            self.live.track(message, jobs)
+        for callback in [callback for job in jobs for callback in job.on_sent]:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Alert on_sent callback failed: {e}")
+        for reaction in dict.fromkeys(job.reaction for job in jobs if job.reaction):
+            try:
+                await message.add_reaction(reaction)
+            except Exception as e:
+                print(f"Error adding reaction: {e}")
+        return message
+
+    def close(self):
+        """Stop every channel worker (queued alerts are discarded)"""
+        for worker in self.workers.values():
+            if worker.task:
+                worker.task.cancel()
+
+if __name__ == "__main__":
+    async def demo():
+        async def send(channel_id, content, embeds):
+            print(f"-> #{channel_id}:\n{content}")
+            return None, {'X-RateLimit-Remaining': '4', 'X-RateLimit-Reset-After': '2.0'}
+
+        dispatcher = AlertDispatcher(send, max_queue=3)
+        for i in range(5):
+            dispatcher.submit(AlertJob(1, PRIORITY_MEDIUM, embed=f"F16 #{i}"))
+        dispatcher.submit(AlertJob(1, PRIORITY_HIGH, text="🎯 **LVABC** (AB18) - your target"))
+        dispatcher.submit(AlertJob(2, PRIORITY_LOW, text="🎯 **RCH1** (RCH)"))
+        await asyncio.sleep(0.1)
+        dispatcher.close()
+        print(dispatcher.stats())
+
+    asyncio.run(demo())
@@ -1,35 +1,181 @@
 #!/usr/bin/env python3
 """
 Alert Acknowledgment System - Track and remind about unacknowledged aircraft alerts
+
+State changes are appended to a JSON-lines log by a background writer thread,
+so the event loop never waits on disk. The log is compacted (rewritten with
+one record per live alert) once it grows well past the number of alerts.
+Reminders sit on a min-heap keyed by due time, so the bot can sleep until
+exactly the next deadline instead of polling.
 """
+import heapq
 import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
 
 class AlertTracker:
     def __init__(self, alerts_file: str = "pending_alerts.json"):
         self.alerts_file = alerts_file
         self.reminder_delay_minutes = 30
+        self.reminder_retry_seconds = 60  # a due reminder not marked sent comes back after this
+        self.compact_min_records = 200
+        self._log_records = 0
         self.pending_alerts = self.load_alerts()
-    
+
+        # Reminder schedule: heap of (due epoch, alert_id); entries whose
+        # alert was acknowledged/reminded/removed are skipped when they surface
+        self._reminders: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}
+        self.on_schedule: Optional[Callable[[], None]] = None  # called when the next deadline moves earlier
+        self._rebuild_schedule()
+
+        # Discord message id (alert or reminder) -> alert_id, for reactions
+        # One message can carry several alerts when the dispatcher packs embeds
+        self.message_index: Dict[int, List[str]] = {}
+        for alert_id, info in self.pending_alerts.items():
+            for message_id in info.get('message_ids', []):
+                self.message_index.setdefault(message_id, []).append(alert_id)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="alert-log-writer", daemon=True)
+        self._writer.start()
+        if self._log_records > len(self.pending_alerts):
+            self.save_alerts()
+
     def load_alerts(self) -> Dict[str, dict]:
-        """Load pending alerts from file"""
-        if os.path.exists(self.alerts_file):
+        """Replay the alert log (or import an old single-document JSON file)"""
+        alerts: Dict[str, dict] = {}
+        if not os.path.exists(self.alerts_file):
+            return alerts
+        try:
+            with open(self.alerts_file, 'r') as f:
+                text = f.read()
+        except Exception as e:
+            print(f"Error loading alerts: {e}")
+            return alerts
+
+        try:
+            legacy = json.loads(text)
+            if isinstance(legacy, dict) and 'op' not in legacy:
+                self._log_records = len(legacy) + 1  # force a rewrite in log format
+                return legacy
+        except ValueError:
+            pass
+
+        for line in text.splitlines():
             try:
-                with open(self.alerts_file, 'r') as f:
-                    return json.load(f)
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted append
+            self._log_records += 1
+            self._apply(alerts, record)
+        return alerts
+
+    @staticmethod
+    def _apply(alerts: Dict[str, dict], record: dict):
+        op, alert_id = record.get('op'), record.get('id')
+        if op == 'put':
+            alerts[alert_id] = record['alert']
+        elif op == 'set' and alert_id in alerts:
+            alerts[alert_id][record['field']] = record['value']
+        elif op == 'del':
+            alerts.pop(alert_id, None)
+
+    def _write_loop(self):
+        """Background writer: appends log lines and performs compactions"""
+        fh = None
+        held = None
+        while True:
+            kind, payload = held or self._queue.get()
+            held = None
+            try:
+                if kind == 'stop':
+                    break
+                if kind == 'append':
+                    # Coalesce appends already queued into one write, stopping
+                    # at the first compaction so ordering is preserved
+                    lines = [payload]
+                    while held is None:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item[0] == 'append':
+                            lines.append(item[1])
+                            self._queue.task_done()
+                        else:
+                            held = item
+                    if fh is None:
+                        fh = open(self.alerts_file, 'a')
+                    fh.write(''.join(lines))
+                    fh.flush()
+                elif kind == 'compact':
+                    if fh is not None:
+                        fh.close()
+                        fh = None
+                    tmp = self.alerts_file + '.tmp'
+                    with open(tmp, 'w') as f:
+                        f.write(payload)
+                    os.replace(tmp, self.alerts_file)
             except Exception as e:
-                print(f"Error loading alerts: {e}")
-        return {}
-    
+                print(f"Error writing alert log: {e}")
+            finally:
+                self._queue.task_done()
+        if fh is not None:
+            fh.close()
+
+    def _log(self, record: dict):
+        """Queue one state change for the writer thread"""
+        self._queue.put(('append', json.dumps(record) + '\n'))
+        self._log_records += 1
+        if self._log_records > max(self.compact_min_records, 4 * len(self.pending_alerts)):
+            self.save_alerts()
+
+    @staticmethod
+    def _epoch(iso_utc: str) -> float:
+        return datetime.fromisoformat(iso_utc).replace(tzinfo=timezone.utc).timestamp()
+
+    def _rebuild_schedule(self):
+        """Re-derive the reminder heap from pending_alerts"""
+        self._due = {alert_id: self._epoch(info['reminder_at'])
+                     for alert_id, info in self.pending_alerts.items()
+                     if not info['acknowledged'] and not info['reminded']}
+        self._reminders = [(due, alert_id) for alert_id, due in self._due.items()]
+        heapq.heapify(self._reminders)
+
+    def _schedule(self, alert_id: str, due: float):
+        earliest = self.next_reminder_at()
+        self._due[alert_id] = due
+        heapq.heappush(self._reminders, (due, alert_id))
+        if self.on_schedule and (earliest is None or due < earliest):
+            self.on_schedule()
+
+    def next_reminder_at(self) -> Optional[float]:
+        """Epoch seconds of the next live reminder, or None"""
+        heap = self._reminders
+        while heap and self._due.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)  # cancelled or rescheduled
+        return heap[0][0] if heap else None
+
     def save_alerts(self):
-        """Save pending alerts to file"""
-        try:
-            with open(self.alerts_file, 'w') as f:
-                json.dump(self.pending_alerts, f, indent=2)
-        except Exception as e:
-            print(f"Error saving alerts: {e}")
+        """Compact the log down to one record per pending alert (the reminder schedule is left as is)"""
+        lines = [json.dumps({'op': 'put', 'id': alert_id, 'alert': alert_info}) + '\n'
+                 for alert_id, alert_info in self.pending_alerts.items()]
+        self._queue.put(('compact', ''.join(lines)))
+        self._log_records = len(lines)
+
+    def flush(self):
+        """Block until every queued write has reached the file"""
+        self._queue.join()
+
+    def close(self):
+        """Flush and stop the writer thread"""
+        self._queue.put(('stop', None))
+        self._writer.join()
     
     def add_alert(self, alert_id: str, aircraft_data: dict, channel_id: int, user: str = None):
         """Add new alert to tracking system"""
@@ -45,30 +191,68 @@ class AlertTracker:
         }
         
         self.pending_alerts[alert_id] = alert_info
-        self.save_alerts()
+        self._log({'op': 'put', 'id': alert_id, 'alert': alert_info})
+        self._schedule(alert_id, self._epoch(alert_info['reminder_at']))
         
         print(f"Added alert tracking for {aircraft_data.get('callsign', 'Unknown')} - reminder in {self.reminder_delay_minutes}min")
     
+    def attach_message(self, alert_id: str, message_id: int):
+        """Remember which Discord message carries this alert (or its reminder)"""
+        alert_info = self.pending_alerts.get(alert_id)
+        if alert_info is None:
+            return
+        message_ids = alert_info.setdefault('message_ids', [])
+        message_ids.append(message_id)
+        self.message_index.setdefault(message_id, []).append(alert_id)
+        self._log({'op': 'set', 'id': alert_id, 'field': 'message_ids', 'value': message_ids})
+
+    def alerts_for_message(self, message_id: int) -> List[str]:
+        """alert_ids posted in this message that are still tracked"""
+        return list(self.message_index.get(message_id, []))
+
+    def remove_alert(self, alert_id: str) -> bool:
+        """Stop tracking an alert (expired, or never delivered)"""
+        alert_info = self.pending_alerts.pop(alert_id, None)
+        if alert_info is None:
+            return False
+        for message_id in alert_info.get('message_ids', []):
+            carried = self.message_index.get(message_id, [])
+            if alert_id in carried:
+                carried.remove(alert_id)
+            if not carried:
+                self.message_index.pop(message_id, None)
+        self._due.pop(alert_id, None)  # cancels the pending reminder
+        self._log({'op': 'del', 'id': alert_id})
+        return True
+
     def acknowledge_alert(self, alert_id: str) -> bool:
         """Mark alert as acknowledged"""
         if alert_id in self.pending_alerts:
             self.pending_alerts[alert_id]['acknowledged'] = True
-            self.save_alerts()
+            self._due.pop(alert_id, None)  # cancels the pending reminder
+            self._log({'op': 'set', 'id': alert_id, 'field': 'acknowledged', 'value': True})
             return True
         return False
     
-    def get_alerts_needing_reminder(self) -> List[tuple]:
-        """Get alerts that need reminder (past reminder time, not reminded, not acknowledged)"""
-        now = datetime.utcnow()
+    def get_alerts_needing_reminder(self, now: Optional[float] = None) -> List[tuple]:
+        """Alerts whose reminder is due (not reminded, not acknowledged).
+
+        Each stays scheduled until mark_reminded; if delivery fails it is
+        returned again after ``reminder_retry_seconds``.
+        """
+        now = now or time.time()
         reminders_needed = []
+        retry = now + self.reminder_retry_seconds
         
-        for alert_id, alert_info in self.pending_alerts.items():
-            if alert_info['acknowledged'] or alert_info['reminded']:
-                continue
-                
-            reminder_time = datetime.fromisoformat(alert_info['reminder_at'])
-            if now >= reminder_time:
-                reminders_needed.append((alert_id, alert_info))
+        while True:
+            due = self.next_reminder_at()
+            if due is None or due > now:
+                break
+            _, alert_id = heapq.heappop(self._reminders)
+            self._due[alert_id] = retry
+            reminders_needed.append((alert_id, self.pending_alerts[alert_id]))
+        for alert_id, _ in reminders_needed:
+            heapq.heappush(self._reminders, (retry, alert_id))
         
         return reminders_needed
     
@@ -76,7 +260,8 @@ class AlertTracker:
         """Mark alert as reminded"""
         if alert_id in self.pending_alerts:
             self.pending_alerts[alert_id]['reminded'] = True
-            self.save_alerts()
+            self._due.pop(alert_id, None)
+            self._log({'op': 'set', 'id': alert_id, 'field': 'reminded', 'value': True})
     
     def cleanup_old_alerts(self, max_age_hours: int = 6):
         """Remove alerts older than max_age_hours"""
@@ -90,10 +275,9 @@ class AlertTracker:
                 alerts_to_remove.append(alert_id)
         
         for alert_id in alerts_to_remove:
-            del self.pending_alerts[alert_id]
+            self.remove_alert(alert_id)
         
         if alerts_to_remove:
-            self.save_alerts()
             print(f"Cleaned up {len(alerts_to_remove)} old alerts")
     
     def get_alert_status(self) -> dict:
@@ -173,4 +357,5 @@ if __name__ == "__main__":
     tracker.add_alert(alert_id, test_aircraft, 123456789, 'gabe')
     
     print("Alert status:", tracker.get_alert_status())
-    print("Alerts needing reminder:", len(tracker.get_alerts_needing_reminder()))
\ No newline at end of file
+    print("Alerts needing reminder:", len(tracker.get_alerts_needing_reminder()))
+    tracker.close()
\ No newline at end of file
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Alert Webhooks - Deliver alerts through per-channel Discord webhooks
+
+Webhook executions are rate limited per webhook, not per bot token, so
+alerts sent this way don't compete with the gateway client's command
+responses. Requests go over the shared HTTP pool and wait on this sender's
+own buckets (X-RateLimit-* / Retry-After headers). A 429 is raised as
+WebhookError with ``status`` and ``response.headers``, the same shape as
+discord.HTTPException, so the dispatcher requeues the alerts.
+"""
+import json
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from alert_dispatcher import RouteBuckets
+from http_pool import get_session
+
+SUPPRESS_EMBEDS = 1 << 2  # message flag: no link previews
+
+class WebhookError(Exception):
+    def __init__(self, status: int, headers, text: str = ""):
+        super().__init__(f"webhook returned {status}: {text[:200]}")
+        self.status = status
+        self.response = self  # e.response.headers, like discord.HTTPException
+        self.headers = headers
+
+class WebhookMessage:
+    """A message posted by a webhook; edits go back through the webhook"""
+
+    def __init__(self, sender: "WebhookSender", channel_id: int, message_id: int):
+        self.sender = sender
+        self.channel_id = channel_id
+        self.id = message_id
+
+    async def add_reaction(self, emoji: str):
+        # Webhooks can't react; the bot does it when it gave us a way to
+        if self.sender.react is not None:
+            await self.sender.react(self.channel_id, self.id, emoji)
+
+    async def edit(self, content: str, suppress: bool = True):
+        return await self.sender.edit(self, content, suppress)
+
+def parse_webhooks(raw: Optional[str]) -> Dict[int, str]:
+    """ALERT_WEBHOOKS JSON ({"channel id": "webhook url"}) -> {channel_id: url}"""
+    if not raw:
+        return {}
+    try:
+        return {int(channel_id): url for channel_id, url in json.loads(raw).items() if url}
+    except Exception as e:
+        print(f"❌ Ignoring ALERT_WEBHOOKS: {e}")
+        return {}
+
+class WebhookSender:
+    def __init__(self, urls: Dict[int, str],
+                 react: Optional[Callable[[int, int, str], Awaitable[None]]] = None):
+        self.urls = urls    # channel_id -> https://discord.com/api/webhooks/<id>/<token>
+        self.react = react  # react(channel_id, message_id, emoji) through the bot
+        self.buckets = RouteBuckets()
+
+    def has(self, channel_id: int) -> bool:
+        return channel_id in self.urls
+
+    @staticmethod
+    def _payload(content: Optional[str], embeds: list, suppress: bool) -> dict:
+        payload = {'content': content or "", 'allowed_mentions': {'parse': ['users', 'roles']}}
+        if embeds:
+            payload['embeds'] = [e.to_dict() if hasattr(e, 'to_dict') else e for e in embeds]
+        elif suppress:
+            payload['flags'] = SUPPRESS_EMBEDS
+        return payload
+
+    async def _request(self, method: str, channel_id: int, url: str, payload: dict) -> Tuple[dict, dict]:
+        route = f"webhook:{self.urls[channel_id]}"
+        await self.buckets.wait(route)
+        async with get_session().request(method, url, json=payload) as r:
+            headers = r.headers
+            self.buckets.update(route, headers)
+            if r.status >= 400:
+                raise WebhookError(r.status, headers, await r.text())
+            return (await r.json() if r.content_type == 'application/json' else {}), headers
+
+    async def send(self, channel_id: int, content: Optional[str], embeds: list) -> Tuple[WebhookMessage, None]:
+        """Dispatcher backend: post one packed alert message"""
+        data, _ = await self._request('POST', channel_id, f"{self.urls[channel_id]}?wait=true",
+                                      self._payload(content, embeds, suppress=True))
+        # Already waited on our own buckets; nothing for the dispatcher to track
+        return WebhookMessage(self, channel_id, int(data['id'])), None
+
+    async def edit(self, message: WebhookMessage, content: str, suppress: bool = True) -> None:
+        """Rewrite a message this webhook posted"""
+        url = f"{self.urls[message.channel_id]}/messages/{message.id}"
+        await self._request('PATCH', message.channel_id, url, self._payload(content, [], suppress))
+        return None
+
+if __name__ == "__main__":
+    print(parse_webhooks('{"1427823232446238803": "https://discord.com/api/webhooks/1/abc"}'))
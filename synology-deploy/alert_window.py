@@ -1,46 +1,174 @@
 # alert_window.py
 import json
-from datetime import datetime, timezone
+import os
+import sqlite3
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
 from dateutil import parser
 
-SEEN_FILE = "seen_alerts.json"
+SEEN_DB = "seen_alerts.db"
+SEEN_FILE = "seen_alerts.json"  # legacy store, imported once then ignored
+KEEP_DAYS = 2  # today and yesterday; older ETA days can never alert again
 
-def _load_seen() -> set[str]:
-    try:
-        with open(SEEN_FILE, "r", encoding="utf-8") as f:
-            return set(json.load(f))
-    except Exception:
-        return set()
+class SeenStore:
+    """Alerted flight keys, partitioned by ETA day.
+
+    Loaded once into memory (day -> set of keys); new keys are appended to a
+    SQLite table and past days are pruned from both when the day rolls over.
+    """
+    def __init__(self, db_file: str = SEEN_DB, legacy_file: str | None = SEEN_FILE, keep_days: int = KEEP_DAYS):
+        self.keep_days = keep_days
+        self.days: dict[str, set[str]] = {}
+        self.oldest_day = ""
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (day TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (day, key))")
+        if legacy_file and os.path.exists(legacy_file):
+            self._import_legacy(legacy_file)
+        self.prune()
+        for day, key in self.conn.execute("SELECT day, key FROM seen"):
+            self.days.setdefault(day, set()).add(key)
+
+    def _import_legacy(self, legacy_file: str):
+        try:
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                keys = json.load(f)
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO seen (day, key) VALUES (?, ?)",
+                                      [(key.rpartition("@")[2], key) for key in keys])
+            os.replace(legacy_file, legacy_file + ".imported")
+        except Exception as e:
+            print(f"Error importing {legacy_file}: {e}")
+
+    def prune(self, today: str | None = None):
+        """Drop every day older than the retention window"""
+        today_dt = datetime.fromisoformat(today) if today else datetime.now(timezone.utc)
+        oldest = (today_dt - timedelta(days=self.keep_days - 1)).strftime("%Y-%m-%d")
+        if oldest == self.oldest_day:
+            return
+        self.oldest_day = oldest
+        for day in [d for d in self.days if d < oldest]:
+            del self.days[day]
+        with self.conn:
+            self.conn.execute("DELETE FROM seen WHERE day < ?", (oldest,))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.days.get(key.rpartition("@")[2], ())
+
+    def add(self, key: str) -> bool:
+        """Record a key; False if it was already there"""
+        day = key.rpartition("@")[2]
+        keys = self.days.setdefault(day, set())
+        if key in keys:
+            return False
+        keys.add(key)
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO seen (day, key) VALUES (?, ?)", (day, key))
+        return True
 
-def _save_seen(seen: set[str]) -> None:
+    def add_many(self, keys: list[str]) -> set[str]:
+        """Record a batch of keys in one transaction; returns the ones that were new"""
+        new = set()
+        for key in keys:
+            keys_of_day = self.days.setdefault(key.rpartition("@")[2], set())
+            if key not in keys_of_day:
+                keys_of_day.add(key)
+                new.add(key)
+        if new:
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO seen (day, key) VALUES (?, ?)",
+                                      [(key.rpartition("@")[2], key) for key in new])
+        return new
+
+_seen: SeenStore | None = None
+
+def _seen_store() -> SeenStore:
+    global _seen
+    if _seen is None:
+        _seen = SeenStore()
+    _seen.prune()
+    return _seen
+
+def _days_from_civil(y: int, m: int, d: int) -> int:
+    """Days since 1970-01-01 for a proleptic Gregorian date"""
+    y -= m <= 2
+    era = (y if y >= 0 else y - 399) // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+def _parse_iso_slow(ts: str) -> float | None:
     try:
-        with open(SEEN_FILE, "w", encoding="utf-8") as f:
-            json.dump(list(seen), f)
+        dt = parser.isoparse(ts)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
     except Exception:
-        pass
+        return None
 
-def minutes_until(iso_ts: str | None) -> float | None:
-    if not iso_ts:
+def parse_iso_epoch(ts: str | None) -> float | None:
+    """Epoch seconds for an ETA string; naive times are taken as UTC.
+
+    AeroDataBox ('2025-10-12 14:30-04:00') and our own isoformat() output
+    ('2025-10-12T18:30:00.5+00:00') are sliced by position; anything else
+    falls back to dateutil.
+    """
+    if not ts:
         return None
+    n = len(ts)
+    if n < 16 or ts[4] != '-' or ts[7] != '-' or ts[10] not in 'T ' or ts[13] != ':':
+        return _parse_iso_slow(ts)
     try:
-        dt = parser.isoparse(iso_ts)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
+        y, mo, d = int(ts[0:4]), int(ts[5:7]), int(ts[8:10])
+        h, mi = int(ts[11:13]), int(ts[14:16])
+        sec, pos = 0.0, 16
+        if pos < n and ts[pos] == ':':
+            sec, pos = float(ts[17:19]), 19
+            if pos < n and ts[pos] in '.,':
+                end = pos + 1
+                while end < n and ts[end].isdigit():
+                    end += 1
+                sec += float("0." + ts[pos + 1:end])
+                pos = end
+        rest = ts[pos:]
+        if rest in ('', 'Z'):
+            offset = 0
+        elif rest[0] in '+-' and len(rest) == 6 and rest[3] == ':':
+            offset = (int(rest[1:3]) * 60 + int(rest[4:6])) * 60
+        elif rest[0] in '+-' and len(rest) == 5:
+            offset = (int(rest[1:3]) * 60 + int(rest[3:5])) * 60
         else:
-            dt = dt.astimezone(timezone.utc)
-        return (dt - datetime.now(timezone.utc)).total_seconds() / 60.0
-    except Exception:
+            return _parse_iso_slow(ts)
+        # Days 29-31 depend on the month (and leap year); let dateutil judge those
+        if not (1 <= mo <= 12 and 1 <= d <= 28 and h <= 24 and mi <= 59):
+            return _parse_iso_slow(ts)
+        if rest[:1] == '-':
+            offset = -offset
+        return _days_from_civil(y, mo, d) * 86400 + h * 3600 + mi * 60 + sec - offset
+    except ValueError:
+        return _parse_iso_slow(ts)
+
+def minutes_until(iso_ts: str | None) -> float | None:
+    epoch = parse_iso_epoch(iso_ts)
+    if epoch is None:
         return None
+    return (epoch - time.time()) / 60.0
 
 def pick_eta(arrival: dict) -> str | None:
     """Prefer estimated arrival; fallback to scheduled (ISO-8601 strings)."""
     return arrival.get("estimated") or arrival.get("scheduled")
 
-def make_alert_key(flight: dict, eta_iso: str | None) -> str:
+def make_alert_key(flight: dict, eta_iso: str | None, day: str | None = None) -> str:
+    # Flight number and destination, so one airframe's later rotations (or its
+    # arrival at another watched field) still alert. FIDS and predicted copies
+    # of the same arrival are paired up in merge_arrivals before this.
     f = flight.get("flight") or {}
     fnum = (f.get("iata") or f.get("number") or "UNKNOWN").upper()
-    day_key = (eta_iso or "")[:10]  # YYYY-MM-DD
-    return f"{fnum}@{day_key}"
+    arrival = flight.get("arrival") or {}
+    dst = (arrival.get("iata") or arrival.get("airport") or "").upper()
+    day_key = day or (eta_iso or "")[:10]  # YYYY-MM-DD
+    return f"{fnum}>{dst}@{day_key}"
 
 def should_alert_window(flight: dict, dst_iata: str, min_min: int, max_min: int) -> tuple[bool, str | None, float | None]:
     """
@@ -62,10 +190,44 @@ def should_alert_window(flight: dict, dst_iata: str, min_min: int, max_min: int)
     if mins < min_min or mins > max_min:
         return (False, eta_iso, mins)
 
-    key = make_alert_key(flight, eta_iso)
-    seen = _load_seen()
-    if key in seen:
+    # UTC day of the ETA: FIDS local times and predicted UTC times agree on it
+    day = (datetime.now(timezone.utc) + timedelta(minutes=mins)).strftime("%Y-%m-%d")
+    key = make_alert_key(flight, eta_iso, day)
+    if not _seen_store().add(key):
         return (False, eta_iso, mins)
-    seen.add(key)
-    _save_seen(seen)
-    return (True, eta_iso, mins)
\ No newline at end of file
+    return (True, eta_iso, mins)
+
+def evaluate_window(flights: list[dict], dst_iata: str, min_min: int, max_min: int,
+                    now: float | None = None, seen: SeenStore | None = None) -> list[tuple[dict, str, float]]:
+    """
+    Batch form of should_alert_window for one airport's arrivals: one clock
+    read, one ETA array, one seen-store transaction.
+    Returns [(flight, eta_iso, minutes)] for the flights that should alert.
+    """
+    now = now or time.time()
+    dst_iata = dst_iata.upper()
+    candidates: list[tuple[dict, str]] = []
+    etas = array('d')
+    for flight in flights:
+        arrival = flight.get("arrival") or {}
+        if (arrival.get("iata") or arrival.get("airport") or "").upper() != dst_iata:
+            continue
+        eta_iso = pick_eta(arrival)
+        epoch = parse_iso_epoch(eta_iso)
+        if epoch is None:
+            continue
+        candidates.append((flight, eta_iso))
+        etas.append(epoch)
+
+    minutes = array('d', [(eta - now) / 60.0 for eta in etas])
+    hits = [k for k, mins in enumerate(minutes) if min_min <= mins <= max_min]
+    keys = [make_alert_key(candidates[k][0], candidates[k][1], time.strftime("%Y-%m-%d", time.gmtime(etas[k])))
+            for k in hits]
+    fresh = (seen or _seen_store()).add_many(keys)
+
+    results = []
+    for k, key in zip(hits, keys):
+        if key in fresh:
+            fresh.discard(key)  # the same flight twice in one response alerts once
+            results.append((candidates[k][0], candidates[k][1], minutes[k]))
+    return results
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Alias Resolver - Offline aircraft name -> ICAO type code lookup
+
+Three local sources are tried before anyone asks DeepSeek:
+
+1. aliases.json nicknames ("globemaster" -> C17), exact match.
+2. A token index over the registry's model and manufacturer strings
+   ("CH-47D Chinook" -> H47), built once when the database is converted.
+   Each token keeps how many registered aircraft of each type carry it, so
+   "chinook" scores H47 by the share of CHINOOK aircraft that are H47.
+3. Trigram similarity over the alias keys and Skycards (Airpedia) aircraft
+   names, for typos and partial names ("globmaster", "ruslan"). A partial
+   name only counts as whole words of the candidate, so "reach" does not
+   match "Skyreach". Fuzzy answers are suggestions, not certainties.
+"""
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Tokens this common say nothing about the type
+STOPWORDS = {"AIRCRAFT", "AIRPLANE", "HELICOPTER", "INC", "CORP", "CO", "LTD", "GMBH", "THE", "AND", "OF"}
+
+# Types kept per token in the stored index
+MAX_TYPES_PER_TOKEN = 8
+
+def tokenize(text: str) -> List[str]:
+    """'CH-47D Chinook' -> ['CH47D', 'CHINOOK']"""
+    tokens = []
+    for word in (text or "").upper().split():
+        token = "".join(c for c in word if c.isalnum())
+        if len(token) > 1 and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+def words(text: str) -> List[str]:
+    """Lowercase alphanumeric words: 'AB-180 Aero' -> ['ab180', 'aero']"""
+    return [w for w in ("".join(c for c in word if c.isalnum()) for word in (text or "").lower().split()) if w]
+
+def trigrams(text: str) -> set:
+    """Character trigrams of the padded, alphanumeric-only lowercase text"""
+    text = " " + " ".join(words(text)) + " "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def build_token_index(aircraft_db: Dict[str, dict]) -> Dict[str, List[list]]:
+    """{token: [[typecode, aircraft count], ...]}, most common type first"""
+    counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for info in aircraft_db.values():
+        typecode = (info.get('type') or '').upper()
+        if not typecode:
+            continue
+        for token in set(tokenize(info.get('model', '')) + tokenize(info.get('manufacturer', ''))):
+            counts[token][typecode] += 1
+    return {
+        token: [[code, n] for code, n in sorted(types.items(), key=lambda kv: -kv[1])[:MAX_TYPES_PER_TOKEN]]
+        for token, types in counts.items()
+    }
+
+def load_aliases(path: str = "aliases.json") -> Dict[str, set]:
+    """aliases.json as {lowercase name: {type codes}}; empty if missing"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {name.strip().lower(): {code.upper() for code in codes} for name, codes in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+        return {}
+
+class AliasResolver:
+    def __init__(self, aliases: Optional[Dict[str, Iterable[str]]] = None,
+                 names: Optional[Dict[str, str]] = None,
+                 token_index: Optional[Dict[str, List[list]]] = None,
+                 min_token_score: float = 0.5, min_similarity: float = 0.6):
+        self.min_token_score = min_token_score  # share of a name's aircraft that must be the type
+        self.min_similarity = min_similarity    # trigram similarity for a fuzzy match
+        self.aliases: Dict[str, set] = {}
+        self.token_index: Dict[str, List[list]] = token_index or {}
+        self.codes = {code for types in self.token_index.values() for code, _ in types}
+        # Fuzzy candidates: display name -> codes, plus trigram -> candidate ids
+        self.candidates: List[Tuple[str, set]] = []
+        self.candidate_grams: List[set] = []
+        self.candidate_words: List[str] = []  # ' word word ' for whole-word containment
+        self.by_gram: Dict[str, List[int]] = defaultdict(list)
+        for name, codes in (aliases or {}).items():
+            self.add_alias(name, codes)
+        for name, code in (names or {}).items():
+            self._add_candidate(name, {code.upper()})
+            self.codes.add(code.upper())
+
+    def _add_candidate(self, name: str, codes: set):
+        grams = trigrams(name)
+        if not grams:
+            return
+        i = len(self.candidates)
+        self.candidates.append((name, codes))
+        self.candidate_grams.append(grams)
+        self.candidate_words.append(" " + " ".join(words(name)) + " ")
+        for gram in grams:
+            self.by_gram[gram].append(i)
+
+    def add_alias(self, name: str, codes: Iterable[str]):
+        key = name.strip().lower()
+        codes = {code.upper() for code in codes}
+        self.aliases[key] = codes
+        self.codes |= codes
+        self._add_candidate(key, codes)
+
+    def from_tokens(self, query: str) -> List[Tuple[str, float]]:
+        """Types every query token points at, scored by their weakest token share"""
+        scores: Optional[Dict[str, float]] = None
+        for token in tokenize(query):
+            types = self.token_index.get(token)
+            if not types:
+                return []
+            total = sum(n for _, n in types)
+            shares = {code: n / total for code, n in types}
+            scores = shares if scores is None else {
+                code: min(score, shares[code]) for code, score in scores.items() if code in shares}
+            if not scores:
+                return []
+        return sorted((scores or {}).items(), key=lambda kv: -kv[1])
+
+    def fuzzy(self, query: str, limit: int = 5) -> List[Tuple[str, float, set]]:
+        """(name, similarity, codes) for alias keys and aircraft names that look like the query"""
+        grams = trigrams(query)
+        phrase = " " + " ".join(words(query)) + " "
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for i in self.by_gram.get(gram, ()):
+                shared[i] += 1
+        scored = []
+        for i, n in shared.items():
+            dice = 2 * n / (len(grams) + len(self.candidate_grams[i]))
+            # The query's words found whole inside a long catalog name ("concorde") still count
+            similarity = max(dice, 0.8) if n == len(grams) and phrase in self.candidate_words[i] else dice
+            if similarity >= self.min_similarity:
+                name, codes = self.candidates[i]
+                scored.append((similarity, dice, name, codes))
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return [(name, similarity, codes) for similarity, _, name, codes in scored[:limit]]
+
+    def resolve(self, query: str) -> Tuple[List[str], str]:
+        """Type codes for a name, best first, and which source answered ('' if none did)"""
+        key = query.strip().lower()
+        if not key:
+            return [], ''
+        if key in self.aliases:
+            return sorted(self.aliases[key]), 'alias'
+        code = "".join(c for c in key.upper() if c.isalnum())
+        if code in self.codes:
+            return [code], 'code'
+        types = [code for code, score in self.from_tokens(query) if score >= self.min_token_score]
+        if types:
+            return types, 'registry'
+        matches = self.fuzzy(query, limit=2)
+        if matches:
+            _, best, codes = matches[0]
+            # "boeing" fits every Boeing name equally well; leave that to DeepSeek
+            if len(matches) == 1 or matches[1][1] < best or matches[1][2] == codes:
+                return sorted(codes), 'fuzzy'
+        return [], ''
+
+if __name__ == "__main__":
+    db = {
+        'ae1234': {'type': 'H47', 'model': 'CH-47D Chinook', 'manufacturer': 'Boeing'},
+        'ae1235': {'type': 'H47', 'model': 'MH-47G Chinook', 'manufacturer': 'Boeing'},
+        'ae2000': {'type': 'C130', 'model': 'C-130H Hercules', 'manufacturer': 'Lockheed'},
+    }
+    resolver = AliasResolver(load_aliases(), {'Boeing C-17 Globemaster III': 'C17'}, build_token_index(db))
+    for query in ("globemaster", "chinook", "hercules", "globmaster iii", "c-130", "nothing"):
+        print(f"{query!r} -> {resolver.resolve(query)}")
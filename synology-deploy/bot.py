@@ -1,9 +1,10 @@
 # bot.py
 import os
-import aiohttp
 import asyncio
+import time
 from datetime import datetime
 import pytz
+import signal
 import threading
 from http.server import BaseHTTPRequestHandler, HTTPServer
 
@@ -15,14 +16,24 @@ from dotenv import load_dotenv
 VERSION = os.getenv("SC_VERSION", f"dev-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
 print(f"🤖 [Skycards] Starting version={VERSION}")
 
-from alert_window import should_alert_window, pick_eta, minutes_until
-from rarity import RarityLookup, rarity_tier
+from alert_window import evaluate_window, pick_eta, minutes_until
+from rarity import RarityCatalog, rarity_tier, tier_index, ULTRA, RARE
 from alerts_sources import LiveSignal
 from rare_hunter import RareAircraftHunter
-from mission_finder import MissionFinder, parse_mission_command
+from mission_finder import MissionFinder
 from user_airports import UserAirportManager
 from airport_llm import AirportLLMAssistant
 from alert_tracker import AlertTracker
+from subscriptions import SubscriptionEngine
+from rarity_feed import RarityFeed
+from alert_webhooks import WebhookSender, parse_webhooks
+from http_pool import close_session, get_session
+from state_store import STORE
+from llm_client import LLMClient, LLMCache
+from fids_client import FidsClient
+from fids_scheduler import FidsScheduler
+from arrival_predictor import ArrivalPredictor, merge_arrivals
+from alert_dispatcher import AlertDispatcher, AlertJob, LiveMessages, PRIORITY_HIGH, PRIORITY_MEDIUM, PRIORITY_LOW
 
 load_dotenv()
 
@@ -47,27 +58,98 @@ GLOW_ROLE_ID = int(os.getenv("GLOW_ROLE_ID", "0"))
 QUIET_START = int(os.getenv("QUIET_START", "0"))  # 0 disables if both 0
 QUIET_END = int(os.getenv("QUIET_END", "0"))
 
+# Digest: MEDIUM/LOW hunt matches in CHANNEL_ID are summarized every N minutes (0 disables)
+DIGEST_MINUTES = int(os.getenv("DIGEST_MINUTES", "10"))
+DIGEST_FROM_PRIORITY = int(os.getenv("DIGEST_FROM_PRIORITY", "2"))
+
 # Admin sync configuration
 ADMIN_SYNC_TOKEN = os.getenv("ADMIN_SYNC_TOKEN", "sync-token-12345")
 DEV_GUILD_ID = os.getenv("DEV_GUILD_ID", "")
 
+class SkycardsClient(discord.Client):
+    async def setup_hook(self):
+        # docker stop sends SIGTERM; shut down through close() so pending writes land
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(self.close()))
+        except NotImplementedError:
+            pass  # no signal handlers on Windows event loops
+
+    async def close(self):
+        """Finish pending alert and state writes and close the shared HTTP session before disconnecting"""
+        print("🛑 Shutting down, flushing alert tracker and state files...")
+        await asyncio.to_thread(ALERT_TRACKER.close)
+        STORE.flush()
+        await close_session()  # webhooks, FIDS and OpenSky share it
+        await super().close()
+
 # Objects
 intents = discord.Intents.default()
 intents.message_content = True  # Re-enable for full functionality
-bot = discord.Client(intents=intents)
+bot = SkycardsClient(intents=intents)
 tree = discord.app_commands.CommandTree(bot)
 
-RARITY = RarityLookup()
+RARITY = RarityCatalog()
 SIGNAL = LiveSignal()
-HUNTER = RareAircraftHunter()
-MISSION_FINDER = MissionFinder()
+# DeepSeek answers are cached on disk; identical questions in flight share one call
+LLM = LLMClient(cache=LLMCache("llm_cache.json",
+                               ttl_seconds=3600 * float(os.getenv("LLM_CACHE_TTL_HOURS", "168")),
+                               max_entries=int(os.getenv("LLM_CACHE_MAX", "1000"))),
+                max_concurrent=int(os.getenv("LLM_CONCURRENCY", "2")),
+                timeout_seconds=float(os.getenv("LLM_TIMEOUT_SEC", "20")))
+HUNTER = RareAircraftHunter(rarity=RARITY, llm=LLM)
+MISSION_FINDER = MissionFinder(HUNTER.aircraft_db, HUNTER.snapshots)
 AIRPORT_MANAGER = UserAirportManager()
+SUBSCRIPTIONS = SubscriptionEngine(airport_coords=AIRPORT_MANAGER.airport_coords,
+                                   registration_index=HUNTER.registrations)
+RARITY_FEED = RarityFeed(HUNTER.aircraft_db, RARITY, HUNTER.snapshots,
+                         airport_coords=AIRPORT_MANAGER.airport_coords)
 ALERT_TRACKER = AlertTracker()
-AIRPORT_LLM = AirportLLMAssistant()
+AIRPORT_LLM = AirportLLMAssistant(llm=LLM)
+# Arrivals from live positions; FIDS fills in what the snapshot can't see
+PREDICTOR = ArrivalPredictor(AIRPORT_MANAGER.airport_coords, HUNTER.aircraft_db,
+                             radius_km=float(os.getenv("PREDICT_RADIUS_KM", "200")))
 
 # Multi-user airport management (replaces old PA_AIRPORTS)
 # Now handled by AIRPORT_MANAGER
 
+async def react_as_bot(channel_id: int, message_id: int, emoji: str):
+    """Add the bot's reaction to a message it didn't post itself (webhook alerts)"""
+    channel = bot.get_channel(channel_id)
+    if channel:
+        await channel.get_partial_message(message_id).add_reaction(emoji)
+
+# Channels with a webhook get alerts over it, off the bot's own rate limits
+WEBHOOKS = WebhookSender(parse_webhooks(os.getenv("ALERT_WEBHOOKS")), react=react_as_bot)
+
+async def send_alert_message(channel_id: int, content: str | None, embeds: list):
+    """Dispatcher backend: one packed alert message to a channel"""
+    if WEBHOOKS.has(channel_id):
+        return await WEBHOOKS.send(channel_id, content, embeds)
+    channel = bot.get_channel(channel_id)
+    if not channel:
+        raise RuntimeError(f"channel {channel_id} not found")
+    if embeds:
+        message = await channel.send(content=content, embeds=embeds)
+    else:
+        message = await channel.send(content, suppress_embeds=True)
+    # discord.py keeps the success headers to itself; 429s still reach the buckets
+    return message, None
+
+async def edit_alert_message(message: discord.Message, content: str):
+    """Dispatcher backend: rewrite a live alert message in place (bot or webhook message)"""
+    await message.edit(content=content, suppress=True)
+    return None
+
+# One worker per channel, started on its first alert
+DISPATCHER = AlertDispatcher(send_alert_message, max_queue=int(os.getenv("ALERT_QUEUE_MAX", "50")),
+                             edit=edit_alert_message,
+                             live=LiveMessages(min_edit_seconds=int(os.getenv("LIVE_EDIT_SECONDS", "60"))))
+
+# Hunter match priority -> dispatch order (user targets first)
+HUNT_PRIORITY = {'HIGH': PRIORITY_HIGH, 'MEDIUM': PRIORITY_MEDIUM, 'LOW': PRIORITY_LOW}
+if DIGEST_MINUTES > 0 and CHANNEL_ID:
+    DISPATCHER.set_digest(CHANNEL_ID, DIGEST_FROM_PRIORITY)
+
 AERODATABOX_BASE = "https://aerodatabox.p.rapidapi.com"
 
 # Admin sync functionality
@@ -134,42 +216,57 @@ async def fetch_arrivals(dst_iata: str) -> list[dict]:
         "X-RapidAPI-Host": "aerodatabox.p.rapidapi.com"
     }
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers, timeout=20) as r:
-            r.raise_for_status()
-            data = await r.json()
-            
-            # Extract arrivals from FIDS response
-            arrivals = data.get("arrivals", [])
-            
-            # Convert AeroDataBox format to our expected format
-            converted_flights = []
-            for flight in arrivals:
-                converted_flight = {
-                    "flight": {
-                        "iata": flight.get("number", ""),
-                        "number": flight.get("number", "")
-                    },
-                    "airline": {
-                        "name": flight.get("airline", {}).get("name", "Unknown Airline")
-                    },
-                    "departure": {
-                        "iata": flight.get("departure", {}).get("airport", {}).get("iata", "")
-                    },
-                    "arrival": {
-                        "iata": flight.get("arrival", {}).get("airport", {}).get("iata", ""),
-                        "scheduled": flight.get("arrival", {}).get("scheduledTimeLocal"),
-                        "estimated": flight.get("arrival", {}).get("estimatedTimeLocal")
-                    },
-                    "aircraft": {
-                        "registration": flight.get("aircraft", {}).get("reg", ""),
-                        "icao": flight.get("aircraft", {}).get("model", ""),
-                        "iata": flight.get("aircraft", {}).get("model", "")
-                    }
+    session = get_session()
+    async with session.get(url, headers=headers, timeout=20) as r:
+        r.raise_for_status()
+        data = await r.json()
+        
+        # Extract arrivals from FIDS response
+        arrivals = data.get("arrivals", [])
+        
+        # Convert AeroDataBox format to our expected format
+        converted_flights = []
+        for flight in arrivals:
+            converted_flight = {
+                "flight": {
+                    "iata": flight.get("number", ""),
+                    "number": flight.get("number", "")
+                },
+                "airline": {
+                    "name": flight.get("airline", {}).get("name", "Unknown Airline")
+                },
+                "departure": {
+                    "iata": flight.get("departure", {}).get("airport", {}).get("iata", "")
+                },
+                "arrival": {
+                    "iata": flight.get("arrival", {}).get("airport", {}).get("iata", ""),
+                    "scheduled": flight.get("arrival", {}).get("scheduledTimeLocal"),
+                    "estimated": flight.get("arrival", {}).get("estimatedTimeLocal")
+                },
+                "aircraft": {
+                    "registration": flight.get("aircraft", {}).get("reg", ""),
+                    "icao": flight.get("aircraft", {}).get("model", ""),
+                    "iata": flight.get("aircraft", {}).get("model", ""),
+                    "model": flight.get("aircraft", {}).get("model", "")
                 }
-                converted_flights.append(converted_flight)
-            
-            return converted_flights
+            }
+            mode_s = (flight.get("aircraft", {}).get("modeS") or "").lower()
+            if mode_s:
+                converted_flight["icao24"] = mode_s
+            converted_flights.append(converted_flight)
+        
+        # FIDS only has free-text models; the registry knows the exact ICAO type
+        HUNTER.registrations.join(converted_flights, HUNTER.aircraft_db)
+        return converted_flights
+
+# One request per airport per cycle, a few at a time, within the RapidAPI quota
+FIDS = FidsClient(fetch_arrivals,
+                  max_concurrent=int(os.getenv("AERODATABOX_CONCURRENCY", "3")),
+                  rate_per_second=float(os.getenv("AERODATABOX_RATE_PER_SEC", "1")))
+# Each airport is re-polled just before its next arrival enters the alert window
+FIDS_SCHEDULE = FidsScheduler(FIDS, WIN_MIN, WIN_MAX,
+                              min_interval_seconds=60 * int(os.getenv("FIDS_MIN_INTERVAL_MIN", "5")),
+                              max_stale_seconds=60 * int(os.getenv("FIDS_MAX_STALE_MIN", "240")))
 
 def in_quiet_hours(now_local_hour: int) -> bool:
     if QUIET_START == QUIET_END == 0:
@@ -183,9 +280,10 @@ def priority_for(ac_icao: str | None, rarity_value: float | None) -> int:
     ac_icao = (ac_icao or "").upper()
     if ac_icao in SIGNAL.glow_types:
         return 0
-    if rarity_value is not None and rarity_value >= 7.0:
+    tier = tier_index(rarity_value) if rarity_value is not None else None
+    if tier == ULTRA:
         return 1
-    if ac_icao in SIGNAL.rare_types or (rarity_value or 0) >= 5.0:
+    if ac_icao in SIGNAL.rare_types or tier == RARE:
         return 2
     return 3
 
@@ -199,22 +297,23 @@ async def post_alert(channel: discord.TextChannel, flight: dict, rarity_value: f
     reg = ac.get("registration") or "?"
     ac_icao = (ac.get("icao") or "").upper()
     ac_iata = (ac.get("iata") or "").upper()
+    catalog = RARITY.entry(ac_icao, ac_iata, ac.get("model"))
 
     eta_iso = pick_eta(flight.get("arrival") or {})
     mins = minutes_until(eta_iso) or 0
 
-    # Labels/tags/mentions
+    # Labels/tags/mentions (priority_for already ranked glow > ultra > rare)
     tag = ""
     mention = None
-    if ac_icao in SIGNAL.glow_types:
+    if prio == 0:
         tag = "✨ GLOW"
         if GLOW_ROLE_ID:
             mention = f"<@&{GLOW_ROLE_ID}>"
-    elif rarity_value is not None and rarity_value >= 7.0:
+    elif prio == 1:
         tag = "💎 ULTRA"
         if RARE_ROLE_ID:
             mention = f"<@&{RARE_ROLE_ID}>"
-    elif ac_icao in SIGNAL.rare_types or (rarity_value or 0) >= 5.0:
+    elif prio == 2:
         tag = "🟣 RARE"
 
     title = f"{tag} {airline} {fnum} → {dest_airport}".strip()
@@ -227,8 +326,10 @@ async def post_alert(channel: discord.TextChannel, flight: dict, rarity_value: f
     if ac_icao or ac_iata:
         embed.add_field(name="Aircraft", value=(ac_iata or ac_icao), inline=True)
     if SHOW_RARITY and rarity_value is not None:
-        emoji, tier = rarity_tier(rarity_value)
+        emoji, tier = (catalog['emoji'], catalog['tier']) if catalog else rarity_tier(rarity_value)
         embed.add_field(name="Rarity", value=f"{rarity_value:.2f} {emoji} {tier}", inline=True)
+    if catalog and catalog['category']:
+        embed.add_field(name="Category", value=f"{catalog['category']} / {catalog['subcategory']}", inline=True)
     if eta_iso:
         embed.add_field(name="ETA (ISO)", value=eta_iso, inline=False)
 
@@ -251,15 +352,13 @@ async def post_alert(channel: discord.TextChannel, flight: dict, rarity_value: f
     # Add alert ID to embed footer for acknowledgment tracking
     embed.set_footer(text=f"React with ✅ to acknowledge • Alert ID: {alert_id[:8]}")
     
-    # Send alert and add reaction for acknowledgment
-    message = await channel.send(content=mention, embed=embed)
-    await message.add_reaction("✅")
-    
+    # Queue the alert; the dispatcher adds the ✅ reaction once it is sent, or untracks it if dropped
     ALERT_TRACKER.add_alert(alert_id, aircraft_data, channel.id, username)
-    
-    return message
+    DISPATCHER.submit(AlertJob(channel.id, prio, embed=embed, mention=mention, reaction="✅",
+                               on_sent=lambda message: ALERT_TRACKER.attach_message(alert_id, message.id),
+                               on_dropped=lambda: ALERT_TRACKER.remove_alert(alert_id)))
 
-@tasks.loop(seconds=300)  # 5 minutes - optimized for API limits
+@tasks.loop(seconds=60)  # Checks cached arrivals; FIDS_SCHEDULE decides which airports to fetch
 async def multi_user_airports_watch():
     await bot.wait_until_ready()
     
@@ -267,10 +366,9 @@ async def multi_user_airports_watch():
     if in_quiet_hours(local_hour):
         return
 
-    # Monitor all user airports
-    all_user_airports = AIRPORT_MANAGER.get_all_airports()
-    
-    for username, airport_codes in all_user_airports.items():
+    # Monitor all user airports: who watches each airport, then one fetch per airport
+    watchers: dict[str, list[tuple[str, discord.TextChannel]]] = {}
+    for username, airport_codes in AIRPORT_MANAGER.get_all_airports().items():
         if not airport_codes:  # Skip users with no airports
             continue
             
@@ -285,79 +383,113 @@ async def multi_user_airports_watch():
             print(f"Channel {user_channel_id} not found for user {username}")
             continue
         
-        # Monitor each airport for this user
         for airport_code in airport_codes:
-            try:
-                flights = await fetch_arrivals(airport_code)
-                
-                enriched: list[tuple[int, float | None, dict, str]] = []
-                for fl in flights:
-                    ok, eta_iso, mins = should_alert_window(fl, airport_code, WIN_MIN, WIN_MAX)
-                    if not ok:
-                        continue
-                    ac = fl.get("aircraft") or {}
-                    ac_icao = (ac.get("icao") or "").upper()
-                    ac_iata = (ac.get("iata") or "").upper()
-                    rscore = RARITY.get(ac_icao, ac_iata)
+            watchers.setdefault(airport_code.upper(), []).append((username, channel))
+    
+    # Without an AeroDataBox key, predicted arrivals are all we have
+    results = await FIDS_SCHEDULE.refresh(watchers) if AERODATABOX_API_KEY else {}
+    snapshot = HUNTER.snapshots.current
+    fresh = snapshot is not None and time.time() - snapshot.fetched_at < 600
+    predicted = PREDICTOR.predict(snapshot, watchers) if fresh else {}
+    
+    for airport_code in watchers:
+        flights = results.get(airport_code, [])
+        if isinstance(flights, Exception):
+            print(f"Error monitoring {airport_code}: {flights}")
+            flights = []
+        flights = merge_arrivals(flights, predicted.get(airport_code, []))
+            
+        enriched: list[tuple[int, float | None, dict]] = []
+        for fl, eta_iso, mins in evaluate_window(flights, airport_code, WIN_MIN, WIN_MAX):
+            ac = fl.get("aircraft") or {}
+            ac_icao = (ac.get("icao") or "").upper()
+            ac_iata = (ac.get("iata") or "").upper()
+            row = RARITY.row(ac_icao, ac_iata, ac.get("model"))
+            rscore = RARITY.rarity[row] if row is not None else None
 
-                    if rscore is not None and rscore < MIN_RARITY:
-                        continue
+            if rscore is not None and rscore < MIN_RARITY:
+                continue
 
-                    prio = priority_for(ac_icao, rscore)
-                    enriched.append((prio, rscore, fl, airport_code))
+            prio = priority_for(ac_icao, rscore)
+            enriched.append((prio, rscore, fl))
 
-                enriched.sort(key=lambda t: t[0])
-                for prio, rscore, fl, dest_airport in enriched:
-                    try:
-                        await post_alert(channel, fl, rscore, prio, dest_airport, username)
-                        await asyncio.sleep(0.5)
-                    except Exception as e:
-                        print(f"Error posting alert for {username}/{dest_airport}: {e}")
-                        
-            except Exception as e:
-                print(f"Error monitoring {airport_code} for {username}: {e}")
-                continue
+        enriched.sort(key=lambda t: t[0])
+        # Fan the airport's matches out to everyone watching it
+        for username, channel in watchers[airport_code]:
+            for prio, rscore, fl in enriched:
+                try:
+                    await post_alert(channel, fl, rscore, prio, airport_code, username)
+                except Exception as e:
+                    print(f"Error posting alert for {username}/{airport_code}: {e}")
+
+REMINDER_WAKE = asyncio.Event()
+REMINDER_TASK = None
+REMINDERS_QUEUED: set[str] = set()  # alert_ids whose reminder is in the dispatcher queue
+
+def reminder_sent(alert_id: str, message):
+    """A reminder reached Discord: only now is it marked done"""
+    REMINDERS_QUEUED.discard(alert_id)
+    ALERT_TRACKER.attach_message(alert_id, message.id)
+    ALERT_TRACKER.mark_reminded(alert_id)
 
-@tasks.loop(minutes=5)  # Check for reminder alerts every 5 minutes
 async def alert_reminder_loop():
-    """Check for alerts that need reminders and send them"""
+    """Sleep until the next reminder deadline, then send whatever is due"""
     await bot.wait_until_ready()
+    # New alerts that become the earliest deadline cut the sleep short
+    ALERT_TRACKER.on_schedule = REMINDER_WAKE.set
     
-    try:
-        # Clean up old alerts first (older than 6 hours)
-        ALERT_TRACKER.cleanup_old_alerts(max_age_hours=6)
-        
-        # Get alerts that need reminders
-        reminders_needed = ALERT_TRACKER.get_alerts_needing_reminder()
-        
-        for alert_id, alert_info in reminders_needed:
+    while not bot.is_closed():
+        try:
+            # Clean up old alerts (older than 6 hours)
+            ALERT_TRACKER.cleanup_old_alerts(max_age_hours=6)
+            
+            # Wake at the next deadline, at least hourly for cleanup
+            due = ALERT_TRACKER.next_reminder_at()
+            timeout = 3600 if due is None else min(max(0.0, due - time.time()), 3600)
+            REMINDER_WAKE.clear()
             try:
-                channel = bot.get_channel(alert_info['channel_id'])
-                if not channel:
-                    print(f"Channel {alert_info['channel_id']} not found for reminder {alert_id}")
-                    continue
-                
-                # Create reminder embed
-                embed_data = ALERT_TRACKER.create_reminder_embed(alert_id, alert_info)
-                embed = discord.Embed(**embed_data)
-                
-                # Send reminder
-                message = await channel.send(embed=embed)
-                await message.add_reaction("✅")
-                
-                # Mark as reminded
-                ALERT_TRACKER.mark_reminded(alert_id)
-                
-                print(f"Sent reminder for alert {alert_id[:8]} to {alert_info.get('user', 'unknown')}")
-                
-            except Exception as e:
-                print(f"Error sending reminder for {alert_id}: {e}")
-                
-    except Exception as e:
-        print(f"Error in alert reminder loop: {e}")
+                await asyncio.wait_for(REMINDER_WAKE.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            
+            for alert_id, alert_info in ALERT_TRACKER.get_alerts_needing_reminder():
+                if alert_id in REMINDERS_QUEUED:
+                    continue  # still waiting in the queue (rate limited); don't send it twice
+                try:
+                    channel = bot.get_channel(alert_info['channel_id'])
+                    if not channel:
+                        print(f"Channel {alert_info['channel_id']} not found for reminder {alert_id}")
+                        continue
+                    
+                    # Create reminder embed
+                    embed_data = ALERT_TRACKER.create_reminder_embed(alert_id, alert_info)
+                    embed = discord.Embed(**embed_data)
+                    
+                    # Queue reminder; it is marked reminded once sent; if dropped, the tracker retries it
+                    REMINDERS_QUEUED.add(alert_id)
+                    DISPATCHER.submit(AlertJob(channel.id, PRIORITY_HIGH, embed=embed, reaction="✅",
+                                               on_sent=lambda message, alert_id=alert_id: reminder_sent(alert_id, message),
+                                               on_dropped=lambda alert_id=alert_id: REMINDERS_QUEUED.discard(alert_id)))
+                    
+                    print(f"Queued reminder for alert {alert_id[:8]} to {alert_info.get('user', 'unknown')}")
+                    
+                except Exception as e:
+                    print(f"Error sending reminder for {alert_id}: {e}")
+                    
+        except Exception as e:
+            print(f"Error in alert reminder loop: {e}")
+            await asyncio.sleep(60)
+
+def add_display_units(aircraft: dict) -> dict:
+    """altitude_ft / velocity_kts from a snapshot record's metres and m/s"""
+    if aircraft.get('altitude'):
+        aircraft['altitude_ft'] = int(aircraft['altitude'] * 3.28084)
+    if aircraft.get('velocity'):
+        aircraft['velocity_kts'] = int(aircraft['velocity'] * 1.944)
+    return aircraft
 
-async def post_rare_alert(channel: discord.TextChannel, aircraft: dict):
-    """Post condensed rare aircraft alert to Discord"""
+def format_rare_alert(aircraft: dict, mention: str = None, reason: str = None) -> str:
+    """One condensed alert line"""
     callsign = aircraft.get('callsign', 'Unknown')
     matched_term = aircraft.get('matched_term', '')
     
@@ -377,10 +509,75 @@ async def post_rare_alert(channel: discord.TextChannel, aircraft: dict):
         track_link = f"[FR24]({fr24_url})|[FA]({flightaware_url})"
     
     # Single line format: 🎯 RCH817 (Military) - 17K ft, 318kts - [Track](link) - 5min ago
-    alert_text = f"🎯 **{callsign}** ({matched_term}) - {alt_text}, {speed_text} - {track_link} - <t:{int(datetime.now().timestamp())}:R>"
+    # (live lines show when the aircraft was last seen)
+    seen_at = int(aircraft.get('seen_at') or datetime.now().timestamp())
+    rarity_text = f" {aircraft['rarity_emoji']} {aircraft['rarity']:.1f}" if aircraft.get('rarity') is not None else ""
+    alert_text = f"🎯 **{callsign}** ({matched_term}{rarity_text}) - {alt_text}, {speed_text} - {track_link} - <t:{seen_at}:R>"
+    if mention:
+        alert_text = f"{mention} {alert_text}" + (f" - {reason}" if reason else "")
+    return alert_text
+
+async def post_rare_alert(channel: discord.TextChannel, aircraft: dict, mention: str = None, reason: str = None, priority: int = None, digest: bool = True):
+    """Queue condensed rare aircraft alert for Discord"""
+    alert_text = format_rare_alert(aircraft, mention, reason)
+    
+    # Still live from the same alert: rewrite that line instead of posting again.
+    # A new mention or reason (another subscriber, another watch) gets its own ping.
+    icao24 = aircraft.get('icao24')
+    context = dict(aircraft, mention=mention, reason=reason)
+    live = DISPATCHER.live.context(channel.id, icao24) if icao24 else None
+    if (live is not None and live.get('mention') == mention and live.get('reason') == reason
+            and DISPATCHER.update_live(channel.id, icao24, alert_text, context)):
+        return
     
-    # Suppress embeds to prevent link previews
-    await channel.send(alert_text, suppress_embeds=True)
+    # Packed with other lines for this channel; sent with embeds suppressed to prevent link previews
+    if priority is None:
+        priority = HUNT_PRIORITY.get(aircraft.get('priority'), PRIORITY_LOW)
+    DISPATCHER.submit(AlertJob(channel.id, priority, text=alert_text, key=icao24, context=context), digest=digest)
+
+async def refresh_live_alerts():
+    """Rewrite live alert lines with the newest snapshot's altitude and speed"""
+    snapshot = HUNTER.snapshots.current
+    if snapshot is None:
+        return
+    for (channel_id, icao24), context in DISPATCHER.live.items():
+        row = snapshot.row_of.get(icao24)
+        if row is None or context is None:
+            continue
+        aircraft = dict(context)
+        for field in ('altitude', 'velocity', 'latitude', 'longitude'):
+            aircraft.pop(field, None)
+        aircraft.update({k: v for k, v in snapshot.record(row).items() if v not in (None, '')})
+        add_display_units(aircraft)
+        aircraft['seen_at'] = snapshot.fetched_at
+        DISPATCHER.update_live(channel_id, icao24, format_rare_alert(aircraft, aircraft.get('mention'), aircraft.get('reason')), aircraft)
+    await DISPATCHER.refresh_live()
+
+LAST_FANOUT_AT = None
+
+async def fan_out_subscriptions():
+    """Send each user the aircraft matching their own watches from the newest snapshot"""
+    global LAST_FANOUT_AT
+    snapshot = HUNTER.snapshots.current
+    if snapshot is None or snapshot.fetched_at == LAST_FANOUT_AT:
+        return
+    LAST_FANOUT_AT = snapshot.fetched_at
+    
+    fanout = SUBSCRIPTIONS.match(snapshot, HUNTER.aircraft_db, HUNTER.snapshots.previous)
+    for user_id, matches in fanout.items():
+        channel = bot.get_channel(SUBSCRIPTIONS.get_channel_for_user(user_id) or 0)
+        if not channel:
+            print(f"No channel found for subscriber {user_id}")
+            continue
+        for row, reason in matches:
+            aircraft = snapshot.record(row)
+            info = HUNTER.aircraft_db.get(aircraft['icao24'], {})
+            aircraft['matched_term'] = info.get('type') or reason
+            add_display_units(aircraft)
+            try:
+                await post_rare_alert(channel, aircraft, mention=f"<@{user_id}>", reason=reason, priority=PRIORITY_HIGH)
+            except Exception as e:
+                print(f"Error posting subscription alert for {user_id}: {e}")
 
 @tasks.loop(seconds=180)  # Check every 3 minutes
 async def rare_hunt():
@@ -396,13 +593,23 @@ async def rare_hunt():
         for aircraft in rare_aircraft:
             try:
                 await post_rare_alert(channel, aircraft)
-                await asyncio.sleep(1)  # Brief pause between alerts
             except Exception as e:
                 print(f"Error posting rare alert: {e}")
+        
+        await fan_out_subscriptions()
+        await refresh_live_alerts()
                 
     except Exception as e:
         print(f"Rare hunting error: {e}")
 
+@tasks.loop(minutes=max(DIGEST_MINUTES, 1))
+async def digest_flush():
+    """Post the held low-priority matches as one summary per channel"""
+    await bot.wait_until_ready()
+    flushed = DISPATCHER.flush_digests()
+    if flushed:
+        print(f"Queued {flushed} digest summary message(s)")
+
 @bot.event
 async def on_message(msg: discord.Message):
     print(f"Message received: '{msg.content}' from {msg.author.name} in #{msg.channel.name}")
@@ -424,13 +631,13 @@ async def on_message(msg: discord.Message):
         help_text = """🤖 **Skycards Bot Commands**
 
 **🔍 Mission Search:**
-• `!find speed >400 ABE` - Find flights >400kts near ABE
-• `!find altitude >35000 PHL` - Find high-altitude flights
-• `!find manufacturer boeing JFK` - Find Boeing aircraft
-• `!find route transpacific LAX` - Find transpacific routes
+• `!find speed>400 ABE` - Find flights >400kts near ABE
+• `!find alt>35000 type=B77* within 150km of PHL` - Combine criteria
+• `!find manufacturer=boeing near JFK` - Find Boeing aircraft
+• `!find transpacific callsign=UAL* LAX` - Find transpacific routes
 
 **✈️ Rare Aircraft Hunting:**
-• `!add chinook` - Add search term (with AI suggestions)
+• `!add chinook` - Add search term (names resolve to type codes)
 • `!list` - Show current search terms
 • `!stats` - Show hunting statistics
 • `!hunt` - Force search for rare aircraft now
@@ -465,23 +672,25 @@ async def on_message(msg: discord.Message):
         
         if not query_text:
             await msg.reply("❌ **Mission Search Usage:**\n" +
-                          "• `!find speed >400 ABE` - Find flights >400kts near ABE\n" +
-                          "• `!find altitude >35000 PHL` - Find high-altitude flights\n" +
-                          "• `!find manufacturer boeing JFK` - Find Boeing aircraft\n" +
-                          "• `!find route transpacific LAX` - Find transpacific routes")
+                          "• `!find speed>400 ABE` - Find flights >400kts near ABE\n" +
+                          "• `!find alt>35000 type=B77* within 150km of PHL` - Combine criteria\n" +
+                          "• `!find manufacturer=boeing near JFK` - Find Boeing aircraft\n" +
+                          "• `!find transpacific LAX` - Find transpacific routes")
+            return
+        
+        try:
+            # Compile once (cached per query text); bad syntax raises ValueError
+            plan = MISSION_FINDER.compile_query(query_text)
+        except ValueError as e:
+            await msg.reply(f"❌ {e}\nExample: `!find speed>400 alt>35000 type=B77* within 150km of PHL`")
             return
         
         try:
-            # Parse the mission search command
-            criteria, airport_code = parse_mission_command(query_text)
-            if not criteria or not airport_code:
-                await msg.reply("❌ Invalid format. Use: `!find [criteria] [airport]`\nExample: `!find speed >400 ABE`")
-                return
-            
             await msg.reply(f"🔍 **Searching for {query_text}...**")
             
             # Execute the search
-            results = await MISSION_FINDER.find_flights_by_criteria(airport_code, criteria)
+            plan, results = await MISSION_FINDER.run_query(query_text)
+            print(f"Mission plan: {plan.describe()} -> {len(results)} results")
             
             if not results:
                 await msg.reply(f"❌ No flights found matching: **{query_text}**")
@@ -493,13 +702,15 @@ async def on_message(msg: discord.Message):
                 callsign = flight.get('callsign', 'Unknown')
                 altitude = flight.get('altitude_ft', 0)
                 speed = flight.get('velocity_kts', 0)
-                distance = flight.get('distance_km', 0)
+                distance = flight.get('distance_from_target')
+                ac_type = flight.get('type') or "?"
                 
                 alt_text = f"{altitude//1000}K ft" if altitude > 0 else "??"
                 speed_text = f"{speed}kts" if speed > 0 else "??"
-                dist_text = f"{distance:.0f}km" if distance > 0 else "??"
+                dist_text = f"{distance:.0f}km away" if distance is not None else flight.get('origin_country', '')
+                fr24_url = f"https://www.flightradar24.com/{callsign}"
                 
-                result_text += f"**{i}.** {callsign} | {alt_text} | {speed_text} | {dist_text} away\n"
+                result_text += f"**{i}.** [{callsign}]({fr24_url}) {ac_type} | {alt_text} | {speed_text} | {dist_text}\n"
             
             if len(results) > 5:
                 result_text += f"\n*...and {len(results)-5} more flights*"
@@ -514,8 +725,13 @@ async def on_message(msg: discord.Message):
     elif msg.content.startswith("!add "):
         print("Adding search term...")
         term = msg.content[5:].strip()
-        HUNTER.add_search_term(term)
-        await msg.reply(f"✅ Added **{term.upper()}** to rare aircraft search!")
+        codes, source = add_search_with_aliases(term)
+        if source == 'fuzzy':
+            await msg.reply(f"✅ Added **{term.upper()}** to rare aircraft search! Did you mean **{', '.join(codes)}**? Use `!add {codes[0]}` to search for it.")
+        elif codes:
+            await msg.reply(f"✅ Added **{term.upper()}** → **{', '.join(codes)}** ({source} match) to rare aircraft search!")
+        else:
+            await msg.reply(f"✅ Added **{term.upper()}** to rare aircraft search!")
         
     elif msg.content == "!list":
         print("Listing search terms...")
@@ -551,8 +767,7 @@ async def on_message(msg: discord.Message):
                 
                 for aircraft in rare_aircraft:
                     try:
-                        await post_rare_alert(msg.channel, aircraft)
-                        await asyncio.sleep(1)  # Brief pause between alerts
+                        await post_rare_alert(msg.channel, aircraft, digest=False)  # asked for now
                     except Exception as e:
                         print(f"Error posting force alert: {e}")
             else:
@@ -562,63 +777,6 @@ async def on_message(msg: discord.Message):
             print(f"Force hunt error: {e}")
             await msg.reply(f"❌ Error during force search: {str(e)}")
             
-    elif msg.content.startswith("!find "):
-        print("Mission search command received...")
-        try:
-            criteria_type, criteria, airport_code = parse_mission_command(msg.content)
-            
-            if not criteria or not airport_code:
-                await msg.reply("❌ **Invalid search format!**\n" +
-                              "Examples:\n" +
-                              "• `!find speed >400 ABE` - Flights over 400kts near ABE\n" +
-                              "• `!find altitude >35000 PHL` - Flights above 35K ft near PHL\n" +
-                              "• `!find transpacific JFK` - Transpacific flights near JFK\n" +
-                              "• `!find manufacturer bombardier LAX` - Bombardier aircraft near LAX")
-                return
-                
-            # Check if airport is valid
-            if not MISSION_FINDER.get_airport_coordinates(airport_code):
-                await msg.reply(f"❌ Airport **{airport_code}** not found in database.")
-                return
-                
-            await msg.reply(f"🔍 **Searching for {criteria_type} flights near {airport_code}...**")
-            
-            # Perform the search
-            flights = await MISSION_FINDER.find_flights_by_criteria(airport_code, criteria)
-            
-            if flights:
-                # Format results
-                result_lines = [f"🎯 **Found {len(flights)} flights matching criteria near {airport_code}:**"]
-                
-                for flight in flights:
-                    callsign = flight['callsign']
-                    distance = flight['distance_from_target']
-                    
-                    # Include relevant stats based on search type
-                    stats = []
-                    if 'min_speed' in criteria or 'max_speed' in criteria:
-                        stats.append(f"{flight['velocity_kts']}kts")
-                    if 'min_altitude' in criteria or 'max_altitude' in criteria:
-                        stats.append(f"{flight['altitude_ft']//1000}K ft")
-                    if 'route_type' in criteria:
-                        stats.append(f"{flight['origin_country']}")
-                        
-                    stats_text = ", ".join(stats) if stats else ""
-                    fr24_url = f"https://www.flightradar24.com/{callsign}"
-                    
-                    result_lines.append(f"• **{callsign}** - {stats_text} - {distance}km away - [Track]({fr24_url})")
-                
-                # Send results (suppress embeds to avoid previews)
-                result_text = "\n".join(result_lines)
-                await msg.reply(result_text, suppress_embeds=True)
-                
-            else:
-                await msg.reply(f"❌ No flights found matching **{criteria_type}** criteria near **{airport_code}**.")
-                
-        except Exception as e:
-            print(f"Mission search error: {e}")
-            await msg.reply(f"❌ Error during mission search: {str(e)}")
-            
     elif msg.content.startswith("!airports "):
         print("Airport management command received...")
         parts = msg.content.split()
@@ -708,36 +866,26 @@ async def on_message(msg: discord.Message):
             await msg.reply(f"❌ Error querying airport assistant: {str(e)}")
 
 @bot.event
-async def on_reaction_add(reaction, user):
-    """Handle alert acknowledgment reactions"""
-    if user.bot:
+async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
+    """Handle alert acknowledgment reactions (raw event: works for uncached messages)"""
+    if payload.user_id == bot.user.id or str(payload.emoji) != "✅":
         return
+    if payload.member is not None and payload.member.bot:
+        return  # other bots' reactions never acknowledge
     
-    # Check if this is an acknowledgment reaction (✅) on an alert message
-    if str(reaction.emoji) == "✅":
-        try:
-            # Try to find this alert in our tracker by looking at message embeds
-            message = reaction.message
-            if message.embeds:
-                embed = message.embeds[0]
-                
-                # Look for alert ID in footer or check if it's a reminder
-                footer_text = embed.footer.text if embed.footer else ""
-                if "Alert ID:" in footer_text:
-                    # Extract alert ID from footer
-                    alert_id_part = footer_text.split("Alert ID:")[-1].strip()
-                    
-                    # Find matching alert (search by partial ID)
-                    for full_alert_id in ALERT_TRACKER.pending_alerts.keys():
-                        if full_alert_id.startswith(alert_id_part):
-                            ALERT_TRACKER.acknowledge_alert(full_alert_id)
-                            print(f"Alert {full_alert_id[:8]} acknowledged by {user.name}")
-                            break
-        except Exception as e:
-            print(f"Error handling reaction acknowledgment: {e}")
+    try:
+        # Alerts and reminders are indexed by the message they were posted in
+        # (a packed message carries several alerts; one ✅ acknowledges them all)
+        for alert_id in ALERT_TRACKER.alerts_for_message(payload.message_id):
+            if ALERT_TRACKER.acknowledge_alert(alert_id):
+                who = payload.member.name if payload.member else payload.user_id
+                print(f"Alert {alert_id[:8]} acknowledged by {who}")
+    except Exception as e:
+        print(f"Error handling reaction acknowledgment: {e}")
 
 @bot.event
 async def on_ready():
+    global REMINDER_TASK
     print(f"Logged in as {bot.user} (id: {bot.user.id})")
     
     # Start admin sync server
@@ -769,13 +917,13 @@ async def on_ready():
         print(f"Channel ID {CHANNEL_ID} not found!")
     
     # Start loops with error handling
-    # DISABLED: Airport monitoring to prevent API rate limit issues
-    # try:
-    #     if not multi_user_airports_watch.is_running():
-    #         multi_user_airports_watch.start()
-    #         print("Multi-user airport monitoring started")
-    # except Exception as e:
-    #     print(f"❌ Failed to start airport monitoring: {e}")
+    # Airport monitoring: ETA-driven polling keeps AeroDataBox usage low
+    try:
+        if not multi_user_airports_watch.is_running():
+            multi_user_airports_watch.start()
+            print("✅ Multi-user airport monitoring started")
+    except Exception as e:
+        print(f"❌ Failed to start airport monitoring: {e}")
         
     try:
         if not rare_hunt.is_running():
@@ -784,9 +932,17 @@ async def on_ready():
     except Exception as e:
         print(f"❌ Failed to start rare hunting: {e}")
         
+    if DIGEST_MINUTES > 0:
+        try:
+            if not digest_flush.is_running():
+                digest_flush.start()
+                print(f"✅ Alert digest started (every {DIGEST_MINUTES} min)")
+        except Exception as e:
+            print(f"❌ Failed to start alert digest: {e}")
+        
     try:
-        if not alert_reminder_loop.is_running():
-            alert_reminder_loop.start()
+        if REMINDER_TASK is None or REMINDER_TASK.done():
+            REMINDER_TASK = asyncio.create_task(alert_reminder_loop())
             print("✅ Alert reminder system started")
     except Exception as e:
         print(f"❌ Failed to start alert reminders: {e}")
@@ -796,6 +952,7 @@ async def on_ready():
 async def _watch(inter: discord.Interaction, min: int, max: int):
     global WIN_MIN, WIN_MAX
     WIN_MIN, WIN_MAX = min, max
+    FIDS_SCHEDULE.win_min, FIDS_SCHEDULE.win_max = min, max
     await inter.response.send_message(f"Window set to {min}–{max} minutes.", ephemeral=True)
 
 @tree.command(name="rarity_min", description="Set minimum rarity threshold")
@@ -804,17 +961,42 @@ async def _rarity_min(inter: discord.Interaction, value: float):
     MIN_RARITY = value
     await inter.response.send_message(f"Minimum rarity set to {value:.2f}.", ephemeral=True)
 
+def add_search_with_aliases(term: str) -> tuple[list[str], str]:
+    """Add a search term and the type codes it resolves to offline; returns (codes, source)
+
+    Fuzzy matches are only guesses, so their codes are returned as suggestions, not added.
+    """
+    HUNTER.add_search_term(term)
+    codes, source = HUNTER.aliases.resolve(term)
+    if source != 'fuzzy':
+        for code in codes:
+            HUNTER.add_search_term(code)
+    return codes, source
+
 # Rare Aircraft Search Commands
 @tree.command(name="add_search", description="Add aircraft search term with AI suggestions")
 async def _add_search(inter: discord.Interaction, term: str):
     try:
-        # Add the main term
-        HUNTER.add_search_term(term)
+        # Add the main term, plus its type codes if we can resolve them locally
+        codes, source = add_search_with_aliases(term)
+        if source == 'fuzzy':
+            embed = discord.Embed(
+                title=f"🔎 Close matches for '{term.upper()}':",
+                description=", ".join(codes),
+                color=0x00FF00
+            )
+            embed.set_footer(text="Use /add_search to add any of these terms individually")
+            await inter.response.send_message(f"✅ Added '{term.upper()}' to rare aircraft search.", embed=embed, ephemeral=False)
+            return
+        if codes:
+            await inter.response.send_message(
+                f"✅ Added '{term.upper()}' → {', '.join(codes)} ({source} match) to rare aircraft search.", ephemeral=False)
+            return
         
         # Send immediate response
         await inter.response.send_message(f"✅ Added '{term.upper()}' to rare aircraft search. Getting AI suggestions...", ephemeral=False)
         
-        # Get AI suggestions (this might take a few seconds)
+        # Nothing local knows this name: ask DeepSeek (this might take a few seconds)
         suggestions = await HUNTER.get_aircraft_suggestions(term)
         
         if suggestions:
@@ -913,5 +1095,71 @@ async def _hunt_stats(inter: discord.Interaction):
         
     await inter.response.send_message(embed=embed, ephemeral=False)
 
+@tree.command(name="rarest", description="Rarest aircraft airborne right now")
+@discord.app_commands.describe(region="Airport code to search around (default: worldwide)", radius_km="Search radius around the airport")
+async def _rarest(inter: discord.Interaction, region: str = None, radius_km: float = None):
+    try:
+        results = RARITY_FEED.rarest(region, radius_km)
+    except ValueError as e:
+        await inter.response.send_message(f"❌ {e}", ephemeral=True)
+        return
+    
+    if not results:
+        await inter.response.send_message("No rated aircraft in the latest snapshot yet - try again after the next hunt cycle.", ephemeral=True)
+        return
+    
+    age = HUNTER.snapshots.age_seconds() or 0
+    where = f"near {region.upper()}" if region else "worldwide"
+    lines = []
+    for r in results:
+        emoji, _ = rarity_tier(r['rarity'])
+        alt = f"{r['altitude_ft']//1000}K ft" if r['altitude_ft'] else "?? ft"
+        lines.append(f"{emoji} **{r['type']}** {r['callsign'] or r['icao24'].upper()} - {r['rarity']:.2f} - {alt}")
+    
+    embed = discord.Embed(title=f"💎 Rarest Airborne {where}", description="\n".join(lines), color=0x9B59B6)
+    embed.set_footer(text=f"Snapshot {int(age // 60)} min old")
+    await inter.response.send_message(embed=embed)
+
+# Per-user subscriptions
+SUBSCRIPTION_KINDS = [
+    discord.app_commands.Choice(name="Aircraft Type", value="types"),
+    discord.app_commands.Choice(name="Registration", value="registrations"),
+    discord.app_commands.Choice(name="ICAO24 Hex", value="hexes"),
+    discord.app_commands.Choice(name="Region (airport)", value="regions"),
+]
+
+subscribe_group = discord.app_commands.Group(name="subscribe", description="Your personal aircraft watches")
+
+@subscribe_group.command(name="add", description="Watch a type, registration, hex or airport region")
+@discord.app_commands.describe(kind="What to watch", value="AB18, N123AB, a1b2c3 or ABE", radius_km="Region radius (regions only)")
+@discord.app_commands.choices(kind=SUBSCRIPTION_KINDS)
+async def _subscribe_add(inter: discord.Interaction, kind: str, value: str, radius_km: float = None):
+    success, message = SUBSCRIPTIONS.add(inter.user.id, kind, value, inter.channel_id, radius_km)
+    await inter.response.send_message(message, ephemeral=not success)
+
+@subscribe_group.command(name="remove", description="Stop watching something")
+@discord.app_commands.choices(kind=SUBSCRIPTION_KINDS)
+async def _subscribe_remove(inter: discord.Interaction, kind: str, value: str):
+    success, message = SUBSCRIPTIONS.remove(inter.user.id, kind, value)
+    await inter.response.send_message(message, ephemeral=True)
+
+@subscribe_group.command(name="list", description="Show your watches")
+async def _subscribe_list(inter: discord.Interaction):
+    sub = SUBSCRIPTIONS.get_user(inter.user.id)
+    embed = discord.Embed(title="🔔 Your Watches", color=0x0099FF)
+    embed.add_field(name="Types", value=", ".join(sub.get('types', [])) or "None", inline=False)
+    embed.add_field(name="Registrations", value=", ".join(sub.get('registrations', [])) or "None", inline=False)
+    embed.add_field(name="Hexes", value=", ".join(sub.get('hexes', [])) or "None", inline=False)
+    regions = [f"{r['name']} ({r['radius_km']:.0f}km)" for r in sub.get('regions', [])]
+    embed.add_field(name="Regions", value=", ".join(regions) or "None", inline=False)
+    await inter.response.send_message(embed=embed, ephemeral=True)
+
+@subscribe_group.command(name="clear", description="Remove all your watches")
+async def _subscribe_clear(inter: discord.Interaction):
+    success, message = SUBSCRIPTIONS.clear(inter.user.id)
+    await inter.response.send_message(message, ephemeral=True)
+
+tree.add_command(subscribe_group)
+
 if __name__ == "__main__":
     bot.run(BOT_TOKEN)
\ No newline at end of file
@@ -5,13 +5,16 @@ Clean, exact type matching, no OAuth complexity
 """
 
 import os
-import json
 import discord
 from discord import app_commands
 from dotenv import load_dotenv
 import asyncio
 from datetime import datetime, timezone
+from llm_client import LLMClient, LLMCache
 from rare_hunter import RareAircraftHunter
+from registry_index import normalize_registration
+from state_store import STORE
+from type_completer import TypeCompleter
 from user_airports import UserAirportManager
 
 load_dotenv()
@@ -21,6 +24,13 @@ TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 GUILD_ID = int(os.getenv("DEV_GUILD_ID", "0"))  # Set for dev server for instant updates
 RARE_CH_ID = int(os.getenv("RARE_CH_ID", "0"))
 
+# Same LLM_* settings as bot.py, but its own cache file: bot.py writes llm_cache.json
+LLM = LLMClient(cache=LLMCache("llm_cache_slash.json",
+                               ttl_seconds=3600 * float(os.getenv("LLM_CACHE_TTL_HOURS", "168")),
+                               max_entries=int(os.getenv("LLM_CACHE_MAX", "1000"))),
+                max_concurrent=int(os.getenv("LLM_CONCURRENCY", "2")),
+                timeout_seconds=float(os.getenv("LLM_TIMEOUT_SEC", "20")))
+
 # Alias system for human-readable terms → type codes
 ALIASES = {
     "globemaster": {"C17"},
@@ -46,19 +56,24 @@ ALIASES = {
 def translate_alias(query: str) -> set[str]:
     """Convert human terms to aircraft type codes"""
     qn = query.strip().lower()
-    return ALIASES.get(qn, {query.strip().upper()})
+    if qn in ALIASES:
+        return ALIASES[qn]
+    # Registry model names and Skycards aircraft names, resolved offline; fuzzy guesses aren't trusted
+    codes, source = bot.hunter.aliases.resolve(query)
+    if source == 'fuzzy':
+        codes = []
+    return set(codes) or {query.strip().upper()}
+
+WATCHLIST = STORE.collection("watchlist.json", lambda: {"aircraft": [], "registrations": [], "airports": []})
 
 def load_watchlist() -> dict:
-    """Load user watchlist from JSON"""
-    if os.path.exists("watchlist.json"):
-        with open("watchlist.json", 'r') as f:
-            return json.load(f)
-    return {"aircraft": [], "registrations": [], "airports": []}
+    """User watchlist (loaded once, shared with the hunter)"""
+    return WATCHLIST.data
 
 def save_watchlist(data: dict):
-    """Save watchlist to JSON"""
-    with open("watchlist.json", 'w') as f:
-        json.dump(data, f, indent=2)
+    """Save watchlist (debounced, written off the event loop)"""
+    WATCHLIST.data = data
+    WATCHLIST.save()
 
 class SkycardsBotSlash(discord.Client):
     def __init__(self):
@@ -67,9 +82,13 @@ class SkycardsBotSlash(discord.Client):
         super().__init__(intents=intents)
         
         self.tree = app_commands.CommandTree(self)
-        self.hunter = RareAircraftHunter()
+        self.hunter = RareAircraftHunter(llm=LLM)
         self.airport_manager = UserAirportManager()
         
+        # Every known type, alias and aircraft name, ranked once for autocomplete
+        self.type_completer = TypeCompleter.from_sources(
+            self.hunter.rarity, {**self.hunter.aliases.aliases, **ALIASES}, self.hunter.aircraft_db)
+        
         # Stats tracking
         self.last_stats = {
             'states_pulled': 0,
@@ -294,6 +313,17 @@ async def watchlist_add(interaction: discord.Interaction, kind: str, value: str)
             await interaction.response.send_message(f"✅ Added **{', '.join(added)}** to aircraft watchlist")
         else:
             await interaction.response.send_message(f"Already watching: **{', '.join(type_codes)}**")
+    elif kind == "registrations":
+        val = normalize_registration(value)
+        if val not in data[kind]:
+            data[kind].append(val)
+            save_watchlist(data)
+            # Registrations are matched by hex; resolve it once here
+            icao24 = bot.hunter.add_registration_watch(val)
+            note = f" (hex {icao24.upper()})" if icao24 else " (not in aircraft database yet)"
+            await interaction.response.send_message(f"✅ Added **{val}**{note} to registrations watchlist")
+        else:
+            await interaction.response.send_message(f"Already watching: **{val}**")
     else:
         val = value.upper()
         if val not in data[kind]:
@@ -334,10 +364,12 @@ async def watchlist_remove(interaction: discord.Interaction, kind: str, value: s
         else:
             await interaction.response.send_message(f"Not found: **{', '.join(type_codes)}**")
     else:
-        val = value.upper()
+        val = normalize_registration(value) if kind == "registrations" else value.upper()
         if val in data[kind]:
             data[kind].remove(val)
             save_watchlist(data)
+            if kind == "registrations":
+                bot.hunter.remove_registration_watch(val)
             await interaction.response.send_message(f"❌ Removed **{val}** from {kind} watchlist")
         else:
             await interaction.response.send_message(f"Not found: **{val}**")
@@ -358,6 +390,7 @@ async def watchlist_clear(interaction: discord.Interaction, category: str):
         # Clear from live hunter too
         bot.hunter.search_terms = {"AB18", "VUT1", "KFIR"}  # Keep core targets
         bot.hunter.save_search_terms()
+        bot.hunter.clear_registration_watches()
         await interaction.response.send_message("🧹 **All watchlists cleared**")
     
     elif category == "aircraft":
@@ -371,6 +404,7 @@ async def watchlist_clear(interaction: discord.Interaction, category: str):
     elif category == "registrations":
         data["registrations"] = []
         save_watchlist(data)
+        bot.hunter.clear_registration_watches()
         await interaction.response.send_message("🧹 **Registration watchlist cleared**")
     
     elif category == "airports":
@@ -599,18 +633,20 @@ async def help_command(interaction: discord.Interaction):
 @hunt.autocomplete('type')
 async def hunt_type_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
     """Provide autocomplete suggestions for aircraft types"""
-    current_lower = current.lower()
-    
-    # Get alias suggestions
-    alias_matches = [alias for alias in ALIASES.keys() if current_lower in alias.lower()]
-    
-    # Get direct type code matches from hunter
-    type_matches = [term for term in bot.hunter.get_search_terms() if current_lower in term.lower()]
-    
-    # Combine and limit to 25 (Discord limit)
-    all_matches = alias_matches[:15] + type_matches[:10]
-    
-    return [app_commands.Choice(name=match.title(), value=match) for match in all_matches[:25]]
+    # Trie walk over precomputed rankings; 25 is Discord's limit
+    return [app_commands.Choice(name=name, value=value)
+            for name, value in bot.type_completer.complete(current, limit=25)]
+
+# AUTOCOMPLETE for watchlist values
+@watchlist_add.autocomplete('value')
+async def watchlist_value_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """Registration prefix search over the aircraft database"""
+    if interaction.namespace.kind != "registrations" or not current:
+        return []
+    return [
+        app_commands.Choice(name=f"{reg} ({icao24.upper()})", value=reg)
+        for reg, icao24 in bot.hunter.registrations.prefix(current, limit=25)
+    ]
 
 if __name__ == "__main__":
     if not TOKEN:
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+FIDS Client - Deduplicated, concurrent AeroDataBox arrival fetches
+
+The airport watch asks for every (user, airport) pair, but many users share
+an airport. The client fetches each airport once per cycle, runs different
+airports concurrently under a semaphore and the provider's request rate, and
+lets concurrent callers for the same airport share one in-flight request.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List, Union
+
+from http_pool import RateLimiter
+
+class FidsClient:
+    def __init__(self, fetch: Callable[[str], Awaitable[List[dict]]],
+                 max_concurrent: int = 3, rate_per_second: float = 1.0):
+        self.fetch_one = fetch  # fetch(iata) -> arrivals; raises on HTTP errors
+        self.max_concurrent = max_concurrent
+        self.limiter = RateLimiter(rate_per_second)
+        self._semaphore: "asyncio.Semaphore | None" = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.requests = 0
+
+    async def _fetch(self, code: str) -> List[dict]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        async with self._semaphore:
+            await self.limiter.acquire()
+            self.requests += 1
+            return await self.fetch_one(code)
+
+    async def fetch(self, code: str) -> List[dict]:
+        """Arrivals for one airport; joins a request already in flight for it"""
+        code = code.upper()
+        future = self._inflight.get(code)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(code))
+            self._inflight[code] = future
+            future.add_done_callback(lambda _: self._inflight.pop(code, None))
+        return await asyncio.shield(future)
+
+    async def fetch_many(self, codes: Iterable[str]) -> Dict[str, Union[List[dict], Exception]]:
+        """Each unique airport once, concurrently; failures come back as the exception"""
+        unique = list(dict.fromkeys(code.upper() for code in codes))
+        results = await asyncio.gather(*(self.fetch(code) for code in unique), return_exceptions=True)
+        return dict(zip(unique, results))
+
+if __name__ == "__main__":
+    async def demo():
+        async def fake_fetch(code):
+            await asyncio.sleep(0.2)
+            return [{'number': f'{code}1'}]
+
+        client = FidsClient(fake_fetch, max_concurrent=3, rate_per_second=20)
+        results = await client.fetch_many(["ABE", "abe", "PHL", "UKT"])
+        print({code: len(flights) for code, flights in results.items()}, "requests:", client.requests)
+
+    asyncio.run(demo())
@@ -9,15 +9,24 @@ import json
 import math
 import os
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timezone
+from datetime import datetime
 from dotenv import load_dotenv
 
+from flight_snapshot import FlightSnapshot, SnapshotService
+from registry_index import RegistrationIndex
+from rarity import RarityCatalog
+from dedupe_cache import DedupeCache
+from track_buffer import TrackStore
+from state_store import STORE
+from llm_client import LLMClient, LLMError
+from alias_resolver import AliasResolver, build_token_index, load_aliases
+
 load_dotenv()
 
 class EnhancedRareAircraftHunter:
     """Enhanced rare aircraft detection using OpenSky + local aircraft database"""
     
-    def __init__(self):
+    def __init__(self, rarity: Optional[RarityCatalog] = None, llm: Optional[LLMClient] = None):
         # OpenSky API setup
         opensky_creds = os.getenv("OPENSKY_API", "{}")
         try:
@@ -30,23 +39,46 @@ class EnhancedRareAircraftHunter:
             
         self.opensky_base = "https://opensky-network.org/api/states/all"
         
-        # DeepSeek API setup
-        self.deepseek_api_key = os.getenv("DEEPSEEK_API_KEY", "")
-        self.deepseek_base = "https://api.deepseek.com/v1/chat/completions"
+        # DeepSeek suggestions go through the shared cached client
+        self.llm = llm or LLMClient()
+        
+        # Skycards rarity catalog, shared with the bot when it passes one in
+        self.rarity = rarity or RarityCatalog()
         
         # Load production aircraft database
         self.aircraft_db = {}
         self.user_targets = {}
         self.rare_aircraft = {}
+        self.alias_index = {}
         self.load_aircraft_database()
         
+        # Names -> type codes without asking DeepSeek
+        self.aliases = self.build_alias_resolver()
+        
+        # Tail-number watches from watchlist.json, compiled to ICAO24 hexes
+        self.registrations = RegistrationIndex(self.aircraft_db)
+        self.watchlist_file = "watchlist.json"
+        self.registration_targets = {}
+        self.load_registration_watches()
+        
+        # icao24 -> match reason for every hex we always alert on
+        self.target_reasons = {}
+        self.compile_targets()
+        
         # Search terms storage (legacy support)
         self.search_terms = set()
         self.search_file = "rare_search_terms.json"
         self.load_search_terms()
         
-        # Aircraft cache to avoid duplicate alerts
-        self.seen_aircraft = {}
+        # Aircraft cache to avoid duplicate alerts (bounded, entries expire)
+        self.seen_aircraft = DedupeCache()
+        
+        # Latest/previous OpenSky poll shared with subscriptions and mission search
+        self.snapshots = SnapshotService()
+        
+        # Recent positions per airframe for stale/ghost detection
+        self.tracks = TrackStore()
+        self.snapshots.add_listener(self.tracks.on_snapshot)
         
         # OAuth token cache
         self.opensky_token = None
@@ -60,6 +92,7 @@ class EnhancedRareAircraftHunter:
         print(f"  Aircraft database: {len(self.aircraft_db):,} aircraft")
         print(f"  User targets: {len(self.user_targets)} (AB18, VUT1, KFIR)")
         print(f"  All rare aircraft: {len(self.rare_aircraft)}")
+        print(f"  Registration watches: {len(self.registration_targets)} resolved")
         
     def load_aircraft_database(self):
         """Load the production aircraft database"""
@@ -72,6 +105,7 @@ class EnhancedRareAircraftHunter:
                 self.aircraft_db = db_data.get('aircraft', {})
                 self.user_targets = db_data.get('user_targets', {})
                 self.rare_aircraft = db_data.get('rare_aircraft', {})
+                self.alias_index = db_data.get('alias_index', {})
                 
                 print(f"Production aircraft database loaded successfully")
             else:
@@ -79,20 +113,71 @@ class EnhancedRareAircraftHunter:
         except Exception as e:
             print(f"Error loading aircraft database: {e}")
     
+    def build_alias_resolver(self) -> AliasResolver:
+        """Alias resolver over aliases.json, the registry's model names and the Skycards catalog"""
+        if not self.alias_index and self.aircraft_db:
+            # Databases converted before the alias index existed
+            print("Building alias index from aircraft database (re-run the converter to skip this)")
+            self.alias_index = build_token_index(self.aircraft_db)
+        names = {name: icao for name, icao in zip(self.rarity.name, self.rarity.icao) if name}
+        return AliasResolver(load_aliases(), names, self.alias_index)
+    
+    def load_registration_watches(self):
+        """Resolve watchlist.json registrations to ICAO24 hexes"""
+        try:
+            # Same collection (and default) the slash bot's /watchlist uses
+            watchlist = STORE.collection(
+                self.watchlist_file, lambda: {"aircraft": [], "registrations": [], "airports": []}).data
+            self.registration_targets, missing = self.registrations.resolve(watchlist.get('registrations', []))
+            if missing:
+                print(f"Registrations not in aircraft database: {', '.join(missing)}")
+        except Exception as e:
+            print(f"Error loading registration watches: {e}")
+    
+    def compile_targets(self):
+        """Merge rare aircraft and registration watches into one icao24 lookup"""
+        targets = {icao24: f"Database: {info.get('type', '').upper()}"
+                   for icao24, info in self.rare_aircraft.items()}
+        for icao24, registration in self.registration_targets.items():
+            targets[icao24] = f"Registration: {registration}"
+        self.target_reasons = targets
+    
+    def add_registration_watch(self, registration: str) -> Optional[str]:
+        """Start matching a registration; returns its icao24 or None if unknown"""
+        targets, _ = self.registrations.resolve([registration])
+        if not targets:
+            return None
+        self.registration_targets.update(targets)
+        self.compile_targets()
+        return next(iter(targets))
+    
+    def remove_registration_watch(self, registration: str):
+        """Stop matching a registration"""
+        icao24 = self.registrations.lookup(registration)
+        if icao24 and self.registration_targets.pop(icao24, None) is not None:
+            self.compile_targets()
+    
+    def clear_registration_watches(self):
+        """Stop matching all registrations"""
+        self.registration_targets = {}
+        self.compile_targets()
+    
     def load_search_terms(self):
         """Load saved search terms from file (legacy support)"""
         try:
-            if os.path.exists(self.search_file):
-                with open(self.search_file, 'r') as f:
-                    data = json.load(f)
-                    self.search_terms = set(data.get('terms', []))
-                    
-                    # Auto-add your target aircraft types if not present
-                    target_types = {'AB18', 'VUT1', 'KFIR', 'C17', 'F16', 'A10'}
-                    for aircraft_type in target_types:
-                        self.search_terms.add(aircraft_type)
-                    
-                    self.save_search_terms()
+            existed = os.path.exists(self.search_file)
+            self.search_state = STORE.collection(
+                self.search_file, set,
+                encode=lambda terms: {'terms': sorted(terms)},
+                decode=lambda data: set(data.get('terms', [])))
+            self.search_terms = self.search_state.data
+            if existed:
+                # Auto-add your target aircraft types if not present
+                target_types = {'AB18', 'VUT1', 'KFIR', 'C17', 'F16', 'A10'}
+                for aircraft_type in target_types:
+                    self.search_terms.add(aircraft_type)
+                
+                self.save_search_terms()
         except Exception as e:
             print(f"Error loading search terms: {e}")
             # Set default target aircraft
@@ -100,12 +185,10 @@ class EnhancedRareAircraftHunter:
             self.save_search_terms()
     
     def save_search_terms(self):
-        """Save search terms to file"""
-        try:
-            with open(self.search_file, 'w') as f:
-                json.dump({'terms': list(self.search_terms)}, f, indent=2)
-        except Exception as e:
-            print(f"Error saving search terms: {e}")
+        """Save search terms (debounced, written off the event loop)"""
+        # Commands sometimes replace the set outright; always save the live one
+        self.search_state.data = self.search_terms
+        self.search_state.save()
     
     def is_quiet_hours(self) -> bool:
         """Check if we're in quiet hours (11 PM to 6 AM)"""
@@ -116,7 +199,7 @@ class EnhancedRareAircraftHunter:
     
     async def get_aircraft_suggestions(self, term: str) -> List[str]:
         """Get aircraft name suggestions from DeepSeek"""
-        if not self.deepseek_api_key:
+        if not self.llm.configured:
             return []
             
         prompt = f"""You are an aviation expert helping a flight tracking enthusiast.
@@ -134,31 +217,16 @@ Return ONLY a comma-separated list, most common first. Example: "F-16, VIPER, FI
 No explanations, just the comma-separated list."""
 
         try:
-            headers = {
-                "Authorization": f"Bearer {self.deepseek_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "deepseek-chat",
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 100,
-                "temperature": 0.3
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.deepseek_base, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        suggestions_text = data['choices'][0]['message']['content'].strip()
-                        suggestions = [s.strip().upper() for s in suggestions_text.split(',')]
-                        return [s for s in suggestions if s and len(s) > 1]
-                    else:
-                        print(f"DeepSeek API error: {response.status}")
-                        return []
+            suggestions_text = await self.llm.complete([{"role": "user", "content": prompt}],
+                                                       temperature=0.3, max_tokens=100)
+        except LLMError as e:
+            print(e)
+            return []
         except Exception as e:
             print(f"DeepSeek suggestion error: {e}")
             return []
+        suggestions = [s.strip().upper() for s in suggestions_text.split(',')]
+        return [s for s in suggestions if s and len(s) > 1]
     
     def add_search_term(self, term: str):
         """Add a search term"""
@@ -248,33 +316,10 @@ No explanations, just the comma-separated list."""
         """Convert OpenSky state vectors to our aircraft format"""
         if not data or 'states' not in data or data['states'] is None:
             return []
-            
-        aircraft_list = []
-        for state in data['states']:
-            if not state or len(state) < 17:
-                continue
-                
-            # Skip aircraft with no position
-            if state[5] is None or state[6] is None:
-                continue
-                
-            aircraft = {
-                'icao24': state[0] or '',
-                'callsign': (state[1] or '').strip().upper(),
-                'origin_country': state[2] or '',
-                'longitude': state[5],
-                'latitude': state[6], 
-                'altitude': state[7],  # meters
-                'velocity': state[9],  # m/s
-                'heading': state[10],
-                'vertical_rate': state[11],
-                'last_contact': state[4],
-                'detected_at': datetime.now(timezone.utc).isoformat()
-            }
-            
-            aircraft_list.append(aircraft)
-            
-        return aircraft_list
+        
+        snapshot = FlightSnapshot.from_opensky(data)
+        self.snapshots.publish(snapshot)
+        return snapshot.records()
 
     def matches_database(self, aircraft: Dict) -> Tuple[bool, str, str]:
         """Check if aircraft matches our database (PRIMARY METHOD)"""
@@ -285,9 +330,10 @@ No explanations, just the comma-separated list."""
             aircraft_info = self.aircraft_db[icao24]
             aircraft_type = aircraft_info.get('type', '').upper()
             
-            # Check if this is a rare aircraft
-            if icao24 in self.rare_aircraft:
-                return True, aircraft_type, f"Database: {aircraft_type}"
+            # Rare aircraft and watched registrations share one hex lookup
+            reason = self.target_reasons.get(icao24)
+            if reason:
+                return True, aircraft_type or aircraft_info.get('registration', icao24.upper()), reason
             
             # Check if this matches our search terms
             if aircraft_type in self.search_terms:
@@ -322,43 +368,29 @@ No explanations, just the comma-separated list."""
         icao24 = aircraft.get('icao24', '')
         callsign = aircraft.get('callsign', '')
         key = f"{icao24}_{callsign}_{matched_term}"
-        now = datetime.now(timezone.utc)
         
         # Get current position data
         current_lat = aircraft.get('latitude')
         current_lon = aircraft.get('longitude') 
         current_alt = aircraft.get('altitude')
-        current_speed = aircraft.get('velocity')
         
-        if key in self.seen_aircraft:
-            last_seen = datetime.fromisoformat(self.seen_aircraft[key]['last_alert'])
-            last_aircraft = self.seen_aircraft[key].get('aircraft', {})
-            
-            # Check for ghost aircraft - same exact position for 10+ minutes
-            if (current_lat and current_lon and current_alt is not None and 
-                last_aircraft.get('latitude') == current_lat and
-                last_aircraft.get('longitude') == current_lon and 
-                last_aircraft.get('altitude') == current_alt and
-                (now - last_seen).total_seconds() > 600):  # 10 minutes same position
-                print(f"Skipping ghost aircraft {callsign} - same position for {(now - last_seen).total_seconds()/60:.1f} minutes")
-                return True
-                
-            # Don't re-alert for same aircraft/term within 30 minutes  
-            if (now - last_seen).total_seconds() < 1800:  # 30 minutes
-                return True
+        # Ghost (same exact position 10+ minutes after the last alert) or
+        # already alerted for this aircraft/term within 30 minutes
+        verdict = self.seen_aircraft.check(key, current_lat, current_lon, current_alt)
+        if verdict == 'ghost':
+            print(f"Skipping ghost aircraft {callsign} - same position as last alert")
+            return True
+        if verdict == 'recent':
+            return True
         
-        # Additional ghost detection - very low altitude + low speed likely stale
-        if (current_alt is not None and current_speed is not None and 
-            current_alt < 914 and current_speed < 25.7):  # <3000ft and <50kts 
-            print(f"Skipping likely stale aircraft {callsign} - low altitude ({current_alt*3.28:.0f}ft) and slow speed ({current_speed*1.94:.0f}kts)")
+        # Track history: no recent contact, stuck in place, or impossible jump
+        problem = self.tracks.assess(icao24)
+        if problem:
+            print(f"Skipping {problem} aircraft {callsign} - track history rejected")
             return True
         
         # Update cache with current position
-        self.seen_aircraft[key] = {
-            'last_alert': now.isoformat(),
-            'aircraft': aircraft,
-            'term': matched_term
-        }
+        self.seen_aircraft.record(key, current_lat, current_lon, current_alt)
         
         return False
 
@@ -397,8 +429,15 @@ No explanations, just the comma-separated list."""
                     aircraft['manufacturer'] = aircraft_info.get('manufacturer', 'Unknown')
                     aircraft['operator'] = aircraft_info.get('operator', 'Unknown')
                     
+                    # Skycards rarity for the registry type code
+                    card = self.rarity.entry(aircraft_info.get('type'))
+                    if card:
+                        aircraft['rarity'] = card['rarity']
+                        aircraft['rarity_emoji'] = card['emoji']
+                        aircraft['category'] = card['category']
+                    
                     # Check if this is a user target aircraft
-                    if icao24 in self.user_targets:
+                    if icao24 in self.user_targets or icao24 in self.registration_targets:
                         aircraft['is_user_target'] = True
                         aircraft['priority'] = 'HIGH'
                     else:
@@ -459,6 +498,7 @@ No explanations, just the comma-separated list."""
             'user_targets': len(self.user_targets),
             'rare_aircraft': len(self.rare_aircraft),
             'search_terms': len(self.search_terms),
+            'registration_watches': len(self.registration_targets),
             'seen_aircraft': len(self.seen_aircraft)
         }
 
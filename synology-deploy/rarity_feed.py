@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Rarity Feed - "Rarest airborne now" ranking over the live snapshot
+
+Every aircraft in the registry is scored once (registry type code joined with
+the Skycards rarity/FTEA tables). Each published snapshot is then ranked with
+a top-N heap, and /rarest answers from that cached ranking.
+"""
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+from flight_snapshot import FlightSnapshot, SnapshotService, haversine_km, METERS_TO_FEET
+from rarity import RarityLookup
+
+class RarityFeed:
+    def __init__(self, aircraft_db: Dict[str, dict], rarity: RarityLookup,
+                 snapshots: Optional[SnapshotService] = None,
+                 airport_coords: Optional[Dict[str, Tuple[float, float]]] = None,
+                 top_n: int = 25, default_radius_km: float = 500):
+        self.rarity = rarity
+        self.airport_coords = airport_coords or {}
+        self.top_n = top_n
+        self.default_radius_km = default_radius_km
+
+        # icao24 -> rarity score, only for aircraft whose type has one
+        self.scores: Dict[str, float] = {}
+        self.types: Dict[str, str] = {}
+        self.build(aircraft_db)
+
+        # Per-snapshot state, replaced on every publish
+        self.snapshot: Optional[FlightSnapshot] = None
+        self.scored: List[Tuple[float, int]] = []
+        self.ranking: List[Tuple[float, int]] = []
+        self.regional: Dict[Tuple[str, float], List[Tuple[float, int]]] = {}
+
+        if snapshots is not None:
+            snapshots.add_listener(self.on_snapshot)
+
+    def build(self, aircraft_db: Dict[str, dict]):
+        """Score every registry aircraft; each type code is looked up once"""
+        by_type: Dict[str, Optional[float]] = {}
+        scores, types = {}, {}
+        for icao24, info in aircraft_db.items():
+            code = (info.get('type') or '').upper()
+            if not code:
+                continue
+            if code not in by_type:
+                by_type[code] = self.rarity.get(code, None)
+            score = by_type[code]
+            if score is not None:
+                scores[icao24] = score
+                types[icao24] = code
+        self.scores, self.types = scores, types
+        print(f"Rarity feed: {len(scores):,} aircraft scored across {sum(1 for s in by_type.values() if s is not None)} types")
+
+    def on_snapshot(self, snapshot: FlightSnapshot, previous: Optional[FlightSnapshot] = None):
+        """Rank a freshly published snapshot"""
+        scores, on_ground = self.scores, snapshot.on_ground
+        scored = []
+        for i, icao24 in enumerate(snapshot.icao24):
+            score = scores.get(icao24)
+            if score is not None and not on_ground[i]:
+                scored.append((score, i))
+        self.snapshot = snapshot
+        self.scored = scored
+        self.ranking = heapq.nlargest(self.top_n, scored)
+        self.regional = {}
+
+    def _regional_ranking(self, code: str, radius_km: float) -> List[Tuple[float, int]]:
+        key = (code, radius_km)
+        if key not in self.regional:
+            lat, lon = self.airport_coords[code]
+            d_lat = radius_km / 111.32
+            d_lon = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+            lats, lons = self.snapshot.latitude, self.snapshot.longitude
+            nearby = [(score, i) for score, i in self.scored
+                      if abs(lats[i] - lat) <= d_lat and abs(lons[i] - lon) <= d_lon
+                      and haversine_km(lat, lon, lats[i], lons[i]) <= radius_km]
+            self.regional[key] = heapq.nlargest(self.top_n, nearby)
+        return self.regional[key]
+
+    def rarest(self, region: Optional[str] = None, radius_km: Optional[float] = None,
+               limit: int = 10) -> List[Dict]:
+        """Rarest airborne aircraft, globally or within radius of an airport.
+
+        Raises ValueError for an unknown airport code.
+        """
+        if self.snapshot is None:
+            return []
+        if region:
+            code = region.strip().upper()
+            if code not in self.airport_coords:
+                raise ValueError(f"Airport **{code}** not found in database.")
+            ranking = self._regional_ranking(code, float(radius_km or self.default_radius_km))
+        else:
+            ranking = self.ranking
+
+        results = []
+        for score, i in ranking[:limit]:
+            record = self.snapshot.record(i)
+            record['type'] = self.types[record['icao24']]
+            record['rarity'] = score
+            altitude = record['altitude']
+            record['altitude_ft'] = int(altitude * METERS_TO_FEET) if altitude is not None else None
+            results.append(record)
+        return results
+
+if __name__ == "__main__":
+    db = {'ae0001': {'type': 'C17'}, 'ae0002': {'type': 'B738'}, 'ae0003': {'type': 'A124'}}
+    feed = RarityFeed(db, RarityLookup(), airport_coords={'ABE': (40.6522, -75.4402)})
+    feed.on_snapshot(FlightSnapshot.from_opensky({'time': 0, 'states': [
+        ['ae0001', 'RCH1', 'United States', 0, 0, -75.5, 40.7, 9000, False, 200, 0, 0],
+        ['ae0003', 'ADB1', 'Ukraine', 0, 0, 30.5, 50.4, 9000, False, 200, 0, 0],
+    ]}))
+    for r in feed.rarest():
+        print(f"{r['type']:5} {r['rarity']:.2f} {r['callsign']}")
+    print([r['type'] for r in feed.rarest('ABE')])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Registry Index - Reverse registration -> ICAO24 lookup over the aircraft database
+
+Live state vectors only carry the ICAO24 hex, so tail-number watches are
+resolved to hexes once, up front, and then matched like any other hex.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def normalize_registration(reg: str) -> str:
+    """N-123AB, n123ab and 'N 123AB' all normalize to N123AB"""
+    return (reg or "").upper().replace("-", "").replace(" ", "")
+
+class RegistrationIndex:
+    def __init__(self, aircraft_db: Optional[Dict[str, dict]] = None):
+        # normalized registration -> icao24
+        self.by_registration: Dict[str, str] = {}
+        # normalized registration -> registration as written in the database
+        self.display: Dict[str, str] = {}
+        # sorted normalized registrations for prefix search
+        self.sorted_keys: List[str] = []
+        if aircraft_db:
+            self.build(aircraft_db)
+
+    def build(self, aircraft_db: Dict[str, dict]):
+        """Index every aircraft that has a registration"""
+        by_registration, display = {}, {}
+        for icao24, info in aircraft_db.items():
+            reg = info.get('registration') or ''
+            key = normalize_registration(reg)
+            if key:
+                by_registration[key] = icao24
+                display[key] = reg
+        self.by_registration = by_registration
+        self.display = display
+        self.sorted_keys = sorted(by_registration)
+
+    def __len__(self) -> int:
+        return len(self.by_registration)
+
+    def lookup(self, registration: str) -> Optional[str]:
+        """ICAO24 for a registration, ignoring case and dashes"""
+        return self.by_registration.get(normalize_registration(registration))
+
+    def prefix(self, prefix: str, limit: int = 25) -> List[Tuple[str, str]]:
+        """(registration, icao24) pairs whose registration starts with ``prefix``"""
+        key = normalize_registration(prefix)
+        keys = self.sorted_keys
+        out = []
+        i = bisect_left(keys, key)
+        while i < len(keys) and len(out) < limit and keys[i].startswith(key):
+            out.append((self.display[keys[i]], self.by_registration[keys[i]]))
+            i += 1
+        return out
+
+    def resolve(self, registrations: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+        """Compile registrations into {icao24: registration}; also returns the unknown ones"""
+        targets, missing = {}, []
+        for reg in registrations:
+            icao24 = self.lookup(reg)
+            if icao24:
+                targets[icao24] = self.display.get(normalize_registration(reg), reg)
+            else:
+                missing.append(reg)
+        return targets, missing
+
+    def join(self, flights: List[dict], aircraft_db: Dict[str, dict]) -> int:
+        """Fill in icao24 and the exact ICAO type for FIDS arrivals, in place.
+
+        FIDS only gives a registration and a free-text model; the registry
+        knows the hex and typecode. Returns how many flights were matched.
+        """
+        matched = 0
+        for flight in flights:
+            aircraft = flight.get("aircraft")
+            if not aircraft:
+                continue
+            # FIDS modeS first; a hex the registry doesn't know falls back to the registration
+            icao24 = flight.get("icao24")
+            info = aircraft_db.get(icao24) if icao24 else None
+            if info is None:
+                icao24 = self.by_registration.get(normalize_registration(aircraft.get("registration", "")))
+                info = aircraft_db.get(icao24) if icao24 else None
+            if info is None:
+                continue
+            flight.setdefault("icao24", icao24)  # a reported transponder hex is what live data will show
+            if info.get("type"):
+                aircraft["icao"] = info["type"]
+            if not aircraft.get("model") and info.get("model"):
+                aircraft["model"] = info["model"]
+            matched += 1
+        return matched
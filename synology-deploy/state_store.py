@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+State Store - One load-once cache for the bot's small JSON state files
+
+Each file is a collection loaded the first time it is asked for; components
+mutate ``collection.data`` in place and call ``save()``. Saves are debounced:
+a burst of edits becomes one write, serialized on the event loop and written
+off-loop as temp file + rename, so a crash never leaves half a file behind.
+Outside a running event loop (scripts, tests) saves are written immediately.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+def atomic_write(path: str, text: str):
+    """Replace ``path`` with ``text`` without ever exposing a partial file"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class StateCollection(Generic[T]):
+    """One JSON file held in memory. ``data`` keeps the default's type."""
+
+    def __init__(self, store: "StateStore", path: str, default: Callable[[], T],
+                 encode: Optional[Callable[[T], object]] = None,
+                 decode: Optional[Callable[[object], T]] = None):
+        self.store = store
+        self.path = path
+        self.encode = encode or (lambda data: data)
+        self.data: T = self._load(default, decode or (lambda raw: raw))
+
+    def _load(self, default: Callable[[], T], decode: Callable[[object], T]) -> T:
+        fallback = default()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = decode(json.load(f))
+                if isinstance(data, type(fallback)):
+                    return data
+                print(f"Ignoring {self.path}: expected {type(fallback).__name__}")
+            except Exception as e:
+                print(f"Error loading {self.path}: {e}")
+        return fallback
+
+    def dumps(self) -> str:
+        return json.dumps(self.encode(self.data), indent=2)
+
+    def save(self):
+        """Schedule a write of the current data"""
+        self.store.mark_dirty(self)
+
+class StateStore:
+    def __init__(self, flush_delay: float = 2.0):
+        self.flush_delay = flush_delay
+        self.collections: Dict[str, StateCollection] = {}
+        self._dirty: Dict[str, StateCollection] = {}
+        self._handle: Optional[asyncio.TimerHandle] = None
+        # One writer thread keeps writes to the same file in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-writer")
+
+    def collection(self, path: str, default: Callable[[], T],
+                   encode: Optional[Callable[[T], object]] = None,
+                   decode: Optional[Callable[[object], T]] = None) -> StateCollection[T]:
+        """The collection for ``path``, loading the file the first time only"""
+        key = os.path.abspath(path)
+        if key not in self.collections:
+            self.collections[key] = StateCollection(self, path, default, encode, decode)
+        return self.collections[key]
+
+    def mark_dirty(self, collection: StateCollection):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(collection.path, collection.dumps())
+            return
+        self._dirty[collection.path] = collection
+        if self._handle is None:
+            self._handle = loop.call_later(self.flush_delay, self._flush_later, loop)
+
+    def _flush_later(self, loop: asyncio.AbstractEventLoop):
+        self._handle = None
+        dirty, self._dirty = self._dirty, {}
+        for collection in dirty.values():
+            # Serialize here, on the loop, so the writer never sees a dict mid-edit
+            loop.run_in_executor(self._executor, self._write, collection.path, collection.dumps())
+
+    @staticmethod
+    def _write(path: str, text: str):
+        try:
+            atomic_write(path, text)
+        except Exception as e:
+            print(f"Error saving {path}: {e}")
+
+    def flush(self):
+        """Write every pending collection now (shutdown, tests)"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        dirty, self._dirty = self._dirty, {}
+        for collection in dirty.values():
+            self._write(collection.path, collection.dumps())
+        self._executor.submit(lambda: None).result()  # wait for in-flight writes
+
+# Shared by every component in the process
+STORE = StateStore()
+
+if __name__ == "__main__":
+    async def demo():
+        store = StateStore(flush_delay=0.1)
+        terms = store.collection("demo_state.json", set, encode=sorted, decode=set)
+        for code in ("C17", "AB18", "KFIR"):
+            terms.data.add(code)
+            terms.save()  # three edits, one write
+        await asyncio.sleep(0.3)
+        store.flush()
+        with open("demo_state.json") as f:
+            print(f.read())
+        os.remove("demo_state.json")
+
+    asyncio.run(demo())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Track Buffer - Short position history per airframe for ghost/stale detection
+
+Each visible icao24 owns a fixed-size ring of recent samples (poll time,
+last contact, lat, lon, altitude, reported speed) inside shared typed
+arrays. The buffers are fed by the snapshot service and an airframe's slot
+is freed as soon as it drops out of a poll, so memory follows the number of
+aircraft currently visible.
+"""
+import math
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from flight_snapshot import FlightSnapshot, haversine_km
+
+FIELDS = ('t', 'contact', 'lat', 'lon', 'alt', 'vel')
+
+class TrackStore:
+    def __init__(self, depth: int = 8, stale_seconds: float = 120,
+                 min_span_seconds: float = 60, frozen_meters: float = 50,
+                 moving_ms: float = 25.0, max_ground_ms: float = 350.0):
+        self.depth = depth
+        self.stale_seconds = stale_seconds        # no transponder contact for this long = stale
+        self.min_span_seconds = min_span_seconds  # history needed before judging motion
+        self.frozen_meters = frozen_meters        # position spread below this = not moving
+        self.moving_ms = moving_ms                # reported speed above this should show motion
+        self.max_ground_ms = max_ground_ms        # jump ceiling when no speed was reported
+
+        self._slot_of: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._count = array('q')  # samples ever written per slot
+        self._cols = {name: array('d') for name in FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def _allocate(self, icao24: str) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._count)
+            self._count.append(0)
+            padding = array('d', [0.0]) * self.depth
+            for column in self._cols.values():
+                column.extend(padding)
+        self._count[slot] = 0
+        self._slot_of[icao24] = slot
+        return slot
+
+    def on_snapshot(self, snapshot: FlightSnapshot, previous: Optional[FlightSnapshot] = None):
+        """Append one sample per visible aircraft; forget aircraft that disappeared"""
+        visible = snapshot.row_of
+        for icao24 in [k for k in self._slot_of if k not in visible]:
+            self._free.append(self._slot_of.pop(icao24))
+
+        t = snapshot.fetched_at
+        depth, count = self.depth, self._count
+        cols = self._cols
+        c_t, c_contact, c_lat, c_lon, c_alt, c_vel = (cols[name] for name in FIELDS)
+        for i, icao24 in enumerate(snapshot.icao24):
+            slot = self._slot_of.get(icao24)
+            if slot is None:
+                slot = self._allocate(icao24)
+            pos = slot * depth + count[slot] % depth
+            contact = snapshot.last_contact[i]
+            c_t[pos] = t
+            c_contact[pos] = t if contact != contact else contact
+            c_lat[pos] = snapshot.latitude[i]
+            c_lon[pos] = snapshot.longitude[i]
+            c_alt[pos] = snapshot.altitude[i]
+            c_vel[pos] = snapshot.velocity[i]
+            count[slot] += 1
+
+    def samples(self, icao24: str) -> List[Tuple[float, ...]]:
+        """Buffered samples for an airframe, oldest first, as FIELDS tuples"""
+        slot = self._slot_of.get(icao24)
+        if slot is None:
+            return []
+        n = min(self._count[slot], self.depth)
+        start = self._count[slot] - n
+        base = slot * self.depth
+        columns = [self._cols[name] for name in FIELDS]
+        return [tuple(col[base + (start + k) % self.depth] for col in columns) for k in range(n)]
+
+    def position_spread_m(self, samples: List[Tuple[float, ...]]) -> float:
+        """Root-mean-square distance of buffered positions from their centroid"""
+        lat0 = sum(s[2] for s in samples) / len(samples)
+        lon0 = sum(s[3] for s in samples) / len(samples)
+        return math.sqrt(sum(haversine_km(lat0, lon0, s[2], s[3]) ** 2 for s in samples) / len(samples)) * 1000
+
+    def assess(self, icao24: str) -> Optional[str]:
+        """Why this airframe's data looks bad ('stale', 'frozen', 'jump'), or None"""
+        samples = self.samples(icao24)
+        if not samples:
+            return None
+        newest = samples[-1]
+        if newest[0] - newest[1] > self.stale_seconds:
+            return 'stale'
+
+        oldest = samples[0]
+        span = newest[0] - oldest[0]
+        if span < self.min_span_seconds:
+            return None
+
+        speeds = [s[5] for s in samples if s[5] == s[5]]
+        reported = sum(speeds) / len(speeds) if speeds else 0.0
+        # Reported as moving but the position never changes
+        if reported > self.moving_ms and self.position_spread_m(samples) < self.frozen_meters:
+            return 'frozen'
+        # Covered far more ground than the reported speed allows (ID clash / bad fix);
+        # without any speed samples only a physically impossible ground speed counts
+        implied = haversine_km(oldest[2], oldest[3], newest[2], newest[3]) * 1000 / span
+        limit = 3 * max(reported, self.moving_ms) + 100 if speeds else self.max_ground_ms
+        if implied > limit:
+            return 'jump'
+        return None
+
+if __name__ == "__main__":
+    store = TrackStore()
+    for k in range(5):
+        # AB18 crawling at 20 m/s plus a "moving" aircraft stuck in place
+        store.on_snapshot(FlightSnapshot.from_opensky({'time': 1_700_000_000 + 30 * k, 'states': [
+            ['e01234', 'LV-ABC', 'Argentina', 0, 1_700_000_000 + 30 * k, -58.5 + 0.006 * k, -34.6, 300, False, 20, 90, 0],
+            ['ae5555', 'RCH9', 'United States', 0, 1_700_000_000 + 30 * k, -75.0, 40.0, 9000, False, 220, 90, 0],
+        ]}))
+    print("AB18:", store.assess('e01234'))
+    print("Stuck:", store.assess('ae5555'))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Type Completer - Ranked aircraft type autocomplete, precomputed at startup
+
+Every type code, alias and Skycards aircraft name is an entry, ranked once
+by Skycards rarity plus fleet size (log of registered aircraft). Entries go
+into a prefix trie under their code, their full name and each word of the
+name; because they are inserted best-first, each trie node simply keeps the
+first ``keep`` entries it sees, so a keystroke is one walk down the trie and
+a slice. Queries of three or more characters that don't start a key fall
+back to a trigram index for matches inside words ("master" -> Globemaster).
+"""
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def normalize_key(text: str) -> str:
+    """'C-17 Globemaster' -> 'c17globemaster'"""
+    return "".join(c for c in (text or "").lower() if c.isalnum())
+
+class TypeCompleter:
+    def __init__(self, keep: int = 40):
+        self.keep = keep  # entries kept per trie node, before de-duplication
+        self.names: List[str] = []   # what Discord shows
+        self.values: List[str] = []  # what the command receives
+        self.keys: List[str] = []    # normalized text for infix checks
+        self.root: dict = {}
+        self.exact: Dict[str, List[int]] = {}  # whole code/alias key -> entries, shown first
+        self.grams: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _insert(self, key: str, entry: int):
+        node = self.root
+        for c in key:
+            node = node.setdefault(c, {})
+            top = node.setdefault('', [])
+            if len(top) < self.keep and (not top or top[-1] != entry):
+                top.append(entry)
+
+    def build(self, entries: Iterable[Tuple[float, str, str, List[str]]]):
+        """(score, name, value, search texts) tuples; higher scores rank first.
+
+        The first search text is the entry's own code or alias.
+        """
+        for score, name, value, texts in sorted(entries, key=lambda e: -e[0]):
+            entry = len(self.names)
+            self.names.append(name[:100])
+            self.values.append(value[:100])
+            keys = []
+            self.exact.setdefault(normalize_key(texts[0]), []).append(entry)
+            for text in texts:
+                keys.append(normalize_key(text))
+                keys.extend(normalize_key(word) for word in text.split()[1:])
+            keys = [key for key in dict.fromkeys(keys) if key]
+            self.keys.append(" ".join(keys))
+            for key in keys:
+                self._insert(key, entry)
+                for i in range(len(key) - 2):
+                    postings = self.grams.setdefault(key[i:i + 3], [])
+                    if not postings or postings[-1] != entry:
+                        postings.append(entry)
+        return self
+
+    def complete(self, current: str, limit: int = 25) -> List[Tuple[str, str]]:
+        """Best (name, value) pairs for what the user has typed so far"""
+        query = normalize_key(current)
+        node: Optional[dict] = self.root
+        for c in query:
+            node = node.get(c)
+            if node is None:
+                break
+        found = list(node.get('', [])) if node is not None else []
+        if not query:
+            found = list(range(min(len(self.names), self.keep)))
+        # Typing a whole code ("c17") puts that type first, whatever its rank
+        found = self.exact.get(query, []) + found
+
+        if len(found) < limit and len(query) >= 3:
+            # Infix fallback: entries carrying every trigram, then a real substring check
+            postings = [self.grams.get(query[i:i + 3], []) for i in range(len(query) - 2)]
+            if all(postings):
+                candidates = set(min(postings, key=len))
+                for p in postings:
+                    candidates.intersection_update(p)
+                seen = set(found)
+                found += sorted(e for e in candidates if e not in seen and query in self.keys[e])
+
+        out, values = [], set()
+        for entry in found:
+            value = self.values[entry]
+            if value not in values:
+                values.add(value)
+                out.append((self.names[entry], value))
+                if len(out) == limit:
+                    break
+        return out
+
+    @classmethod
+    def from_sources(cls, catalog, aliases: Dict[str, Iterable[str]],
+                     aircraft_db: Optional[Dict[str, dict]] = None) -> "TypeCompleter":
+        """Entries for every catalog type, registry type and alias.
+
+        ``catalog`` is a RarityCatalog; fleet sizes come from ``aircraft_db``.
+        """
+        fleet = Counter((info.get('type') or '').upper() for info in (aircraft_db or {}).values())
+        fleet.pop('', None)
+
+        def score(code: str, rarity: float = 0.0) -> float:
+            return rarity + math.log10(1 + fleet.get(code, 0))
+
+        entries, rows = [], {}
+        for row, code in enumerate(catalog.icao):
+            rows.setdefault(code, row)
+        for code, row in rows.items():
+            name = catalog.name[row]
+            rarity = catalog.rarity[row]
+            emoji, _ = catalog.tier_of(row)
+            label = f"{code} - {name} {emoji}" if name else f"{code} {emoji}"
+            entries.append((score(code, rarity), label, code, [code, name]))
+        for code in fleet:
+            if code not in rows:
+                entries.append((score(code), code, code, [code]))
+        for alias, codes in aliases.items():
+            codes = sorted(code.upper() for code in codes)
+            best = max((score(c, catalog.rarity[rows[c]] if c in rows else 0.0) for c in codes), default=0.0)
+            entries.append((best, f"{alias} → {', '.join(codes)}", alias, [alias]))
+        return cls().build(entries)
+
+if __name__ == "__main__":
+    import time
+
+    from rarity import RarityCatalog
+
+    catalog = RarityCatalog()
+    completer = TypeCompleter.from_sources(catalog, {'globemaster': ['C17'], 'chinook': ['H47']})
+    for query in ("", "glo", "a34", "master", "chin"):
+        started = time.perf_counter()
+        results = completer.complete(query)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{query!r}: {len(results)} in {elapsed:.2f} ms, top {results[:3]}")
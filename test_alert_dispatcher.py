@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test alert dispatcher - priority order, per-channel packing and 429 backoff
+"""
+import asyncio
+
+from alert_dispatcher import (AlertDispatcher, AlertJob, LiveMessages, RouteBuckets, PRIORITY_HIGH,
+                              PRIORITY_MEDIUM, PRIORITY_LOW, MAX_EMBEDS)
+
+class FakeMessage:
+    def __init__(self, message_id):
+        self.id = message_id
+        self.reactions = []
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+class RateLimited(Exception):
+    status = 429
+
+    class response:
+        headers = {'Retry-After': '0.05'}
+
+def run_dispatcher(jobs, fail_first=False, slow_channel=None, max_queue=50):
+    sent = []
+
+    async def send(channel_id, content, embeds):
+        if channel_id == slow_channel:
+            await asyncio.sleep(0.1)
+        if fail_first and not sent:
+            sent.append(None)
+            raise RateLimited()
+        message = FakeMessage(len(sent))
+        sent.append((channel_id, content, embeds, message))
+        return message, {'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset-After': '1'}
+
+    async def main():
+        dispatcher = AlertDispatcher(send, max_queue=max_queue)
+        for job in jobs:
+            dispatcher.submit(job)
+        await asyncio.sleep(0.3)
+        dispatcher.close()
+        return dispatcher
+
+    dispatcher = asyncio.run(main())
+    return dispatcher, [s for s in sent if s is not None]
+
+def test_text_lines_pack_with_high_priority_first():
+    jobs = [AlertJob(1, PRIORITY_LOW, text="RCH1"), AlertJob(2, PRIORITY_MEDIUM, text="KFIR"),
+            AlertJob(1, PRIORITY_HIGH, text="LVABC")]
+    dispatcher, sent = run_dispatcher(jobs)
+    assert [(channel, content) for channel, content, _, _ in sent] == [(1, "LVABC\nRCH1"), (2, "KFIR")]
+    assert dispatcher.sent_alerts == 3 and dispatcher.sent_messages == 2
+
+def test_embeds_pack_ten_per_message_with_callbacks():
+    attached = []
+    jobs = [AlertJob(7, PRIORITY_MEDIUM, embed=f"embed{i}", mention="<@&9>", reaction="✅",
+                     on_sent=lambda message, i=i: attached.append((i, message.id)))
+            for i in range(MAX_EMBEDS + 2)]
+    _, sent = run_dispatcher(jobs)
+    assert [len(embeds) for _, _, embeds, _ in sent] == [MAX_EMBEDS, 2]
+    assert sent[0][1] == "<@&9>"  # one mention per message, not one per embed
+    assert sent[0][3].reactions == ["✅"]
+    assert sorted(attached) == [(i, 0 if i < MAX_EMBEDS else 1) for i in range(MAX_EMBEDS + 2)]
+
+def test_rate_limited_send_is_retried_after_retry_after():
+    _, sent = run_dispatcher([AlertJob(3, PRIORITY_HIGH, text="AB18")], fail_first=True)
+    assert [content for _, content, _, _ in sent] == ["AB18"]
+
+def test_failed_send_drops_its_jobs():
+    class Forbidden(Exception):
+        status = 403
+
+    async def send(channel_id, content, embeds):
+        raise Forbidden("Missing Access")
+
+    untracked = []
+
+    async def main():
+        dispatcher = AlertDispatcher(send)
+        for i in range(3):
+            dispatcher.submit(AlertJob(4, PRIORITY_MEDIUM, embed=f"F16 #{i}",
+                                       on_dropped=lambda i=i: untracked.append(i)))
+        await asyncio.sleep(0.1)
+        dispatcher.close()
+        return dispatcher
+
+    dispatcher = asyncio.run(main())
+    assert sorted(untracked) == [0, 1, 2]  # tracker entries go, so no reminder for an unsent alert
+    assert dispatcher.stats()['failed_alerts'] == 3 and dispatcher.sent_alerts == 0
+
+def test_slow_channel_does_not_block_others():
+    jobs = [AlertJob(1, PRIORITY_MEDIUM, embed="F16 #0"), AlertJob(2, PRIORITY_HIGH, text="AB18")]
+    _, sent = run_dispatcher(jobs, slow_channel=1)
+    assert [channel for channel, _, _, _ in sent] == [2, 1]
+
+def test_saturated_queue_keeps_urgent_alerts():
+    untracked = []
+    flood = [AlertJob(1, PRIORITY_MEDIUM, embed=f"F16 #{i}", on_dropped=lambda i=i: untracked.append(i))
+             for i in range(20)]
+    lines = [AlertJob(1, PRIORITY_LOW, text=f"RCH{i}") for i in range(3)]
+    dispatcher, sent = run_dispatcher(flood + lines + [AlertJob(1, PRIORITY_HIGH, text="AB18")], max_queue=5)
+    assert sent[0][1] == "AB18"
+    assert sum(len(embeds) for _, _, embeds, _ in sent) == 4  # room left after AB18 arrived
+    assert dispatcher.stats()['dropped'] == 19  # 15 embeds, 3 lines, then one embed for AB18
+    assert sorted(untracked) == list(range(4, 20))  # every dropped embed was told
+
+def test_saturated_text_lines_merge():
+    attached = []
+    lines = [AlertJob(1, PRIORITY_LOW, text=f"F16 #{i}", on_sent=lambda message, i=i: attached.append(i))
+             for i in range(6)]
+    dispatcher, sent = run_dispatcher(lines, max_queue=2)
+    assert [content for _, content, _, _ in sent] == ["\n".join(f"F16 #{i}" for i in range(6))]
+    assert dispatcher.stats()['merged'] == 4 and dispatcher.stats()['dropped'] == 0
+    assert sorted(attached) == list(range(6))  # merged lines keep their callbacks
+
+def test_live_lines_are_edited_in_place():
+    edits = []
+
+    async def send(channel_id, content, embeds):
+        return FakeMessage(1), None
+
+    async def edit(message, content):
+        edits.append((message.id, content))
+        return None
+
+    async def main():
+        dispatcher = AlertDispatcher(send, edit=edit, live=LiveMessages(min_edit_seconds=0))
+        dispatcher.submit(AlertJob(5, PRIORITY_MEDIUM, text="RCH1 10K ft", key="ae0001", context={'n': 1}))
+        dispatcher.submit(AlertJob(5, PRIORITY_MEDIUM, text="RCH2 20K ft", key="ae0002"))
+        await asyncio.sleep(0.05)
+        assert not dispatcher.update_live(6, "ae0001", "other channel")
+        assert dispatcher.update_live(5, "ae0001", "RCH1 12K ft", {'n': 2})
+        assert dispatcher.update_live(5, "ae0001", "RCH1 14K ft")
+        assert await dispatcher.refresh_live() == 1  # two updates, one edit
+        assert await dispatcher.refresh_live() == 0  # nothing changed since
+        assert dict(dispatcher.live.items())[(5, "ae0001")] == {'n': 2}
+        dispatcher.close()
+
+    asyncio.run(main())
+    assert edits == [(1, "RCH1 14K ft\nRCH2 20K ft")]
+
+def test_live_edits_are_throttled_and_expire():
+    live = LiveMessages(ttl_seconds=600, min_edit_seconds=60)
+    message = FakeMessage(1)
+    live.track(message, [AlertJob(5, PRIORITY_LOW, text="RCH1", key="ae0001")], now=1000)
+    assert live.update(5, "ae0001", "RCH1 moved", now=1030)
+    assert live.due(now=1030) == []
+    assert live.context(5, "ae0001", now=1030) == {} and live.context(6, "ae0001", now=1030) is None
+    assert [m.message for m in live.due(now=1060)] == [message]
+    assert not live.update(5, "ae0001", "RCH1 back", now=1700)  # not updated for 11 minutes
+    assert len(live) == 0
+
+def test_digest_holds_low_priority_until_flush():
+    sent = []
+
+    async def send(channel_id, content, embeds):
+        sent.append(content)
+        return FakeMessage(len(sent)), None
+
+    async def main():
+        dispatcher = AlertDispatcher(send)
+        dispatcher.set_digest(1, PRIORITY_MEDIUM)
+        for i in range(20):
+            dispatcher.submit(AlertJob(1, PRIORITY_LOW, text=f"F16 #{i % 4} pass {i}", key=f"ae{i % 4}"))
+        dispatcher.submit(AlertJob(1, PRIORITY_MEDIUM, text="C17", key="ae9"))
+        dispatcher.submit(AlertJob(1, PRIORITY_HIGH, text="AB18", key="e01234"))
+        await asyncio.sleep(0.05)
+        assert sent == ["AB18"]  # targets are not held
+        assert dispatcher.flush_digests() == 1
+        assert dispatcher.flush_digests() == 0  # nothing new since
+        await asyncio.sleep(0.05)
+        dispatcher.close()
+
+    asyncio.run(main())
+    digest = sent[1].split("\n")
+    assert digest[0].startswith("📋 **Digest** - 5 aircraft")
+    assert digest[1:] == ["C17", "F16 #0 pass 16", "F16 #1 pass 17", "F16 #2 pass 18", "F16 #3 pass 19"]
+
+def test_buckets_follow_headers():
+    buckets = RouteBuckets()
+    buckets.update("channel:1", {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '2.5'}, now=100)
+    assert buckets.delay("channel:1", now=101) == 1.5
+    assert buckets.delay("channel:1", now=103) == 0.0
+    assert buckets.delay("channel:2", now=101) == 0.0
+
+if __name__ == "__main__":
+    test_text_lines_pack_with_high_priority_first()
+    test_embeds_pack_ten_per_message_with_callbacks()
+    test_rate_limited_send_is_retried_after_retry_after()
+    test_failed_send_drops_its_jobs()
+    test_slow_channel_does_not_block_others()
+    test_saturated_queue_keeps_urgent_alerts()
+    test_saturated_text_lines_merge()
+    test_live_lines_are_edited_in_place()
+    test_live_edits_are_throttled_and_expire()
+    test_digest_holds_low_priority_until_flush()
+    test_buckets_follow_headers()
+    print("Alert dispatcher tests passed")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test alert webhooks - delivery against a local stand-in for Discord's webhook API
+"""
+import asyncio
+
+from aiohttp import web
+
+from alert_dispatcher import AlertDispatcher, AlertJob, LiveMessages, PRIORITY_HIGH
+from alert_webhooks import WebhookSender, WebhookError, SUPPRESS_EMBEDS, parse_webhooks
+from http_pool import close_session
+
+async def start_stand_in(rate_limit_first: bool = False):
+    """Local server speaking just enough of POST/PATCH /webhooks/<id>/<token>"""
+    requests = []
+
+    async def execute(request):
+        requests.append(('POST', dict(request.query), await request.json()))
+        if rate_limit_first and len(requests) == 1:
+            return web.json_response({'retry_after': 0.05}, status=429, headers={'Retry-After': '0.05'})
+        return web.json_response({'id': str(1000 + len(requests))},
+                                 headers={'X-RateLimit-Remaining': '4', 'X-RateLimit-Reset-After': '1'})
+
+    async def edit(request):
+        requests.append(('PATCH', request.match_info['message_id'], await request.json()))
+        return web.json_response({'id': request.match_info['message_id']})
+
+    app = web.Application()
+    app.router.add_post('/webhooks/1/token', execute)
+    app.router.add_patch('/webhooks/1/token/messages/{message_id}', edit)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/webhooks/1/token", requests
+
+def test_dispatcher_delivers_and_edits_over_webhook():
+    reactions = []
+
+    async def react(channel_id, message_id, emoji):
+        reactions.append((channel_id, message_id, emoji))
+
+    async def main():
+        runner, url, requests = await start_stand_in()
+        sender = WebhookSender({7: url}, react=react)
+        dispatcher = AlertDispatcher(sender.send, edit=lambda message, content: message.edit(content=content),
+                                     live=LiveMessages(min_edit_seconds=0))
+        dispatcher.submit(AlertJob(7, PRIORITY_HIGH, text="AB18 3K ft", key="e01234", reaction="✅"))
+        await asyncio.sleep(0.2)
+        assert dispatcher.update_live(7, "e01234", "AB18 4K ft")
+        assert await dispatcher.refresh_live() == 1
+        dispatcher.close()
+        await close_session()
+        await runner.cleanup()
+        return requests
+
+    requests = asyncio.run(main())
+    method, query, payload = requests[0]
+    assert (method, query['wait']) == ('POST', 'true')
+    assert payload['content'] == "AB18 3K ft" and payload['flags'] == SUPPRESS_EMBEDS
+    assert requests[1] == ('PATCH', '1001', {'content': "AB18 4K ft", 'flags': SUPPRESS_EMBEDS,
+                                             'allowed_mentions': {'parse': ['users', 'roles']}})
+    assert reactions == [(7, 1001, "✅")]
+
+def test_rate_limit_raises_like_discord_and_sets_bucket():
+    async def main():
+        runner, url, requests = await start_stand_in(rate_limit_first=True)
+        sender = WebhookSender({7: url})
+        try:
+            await sender.send(7, "AB18", [])
+            raise AssertionError("expected a 429")
+        except WebhookError as e:
+            assert e.status == 429 and e.response.headers['retry-after'] == '0.05'
+        assert sender.buckets.delay(f"webhook:{url}") > 0
+        message, _ = await sender.send(7, "AB18", [])  # waits out Retry-After first
+        await close_session()
+        await runner.cleanup()
+        return message, requests
+
+    message, requests = asyncio.run(main())
+    assert message.id == 1002 and len(requests) == 2
+
+def test_parse_webhooks():
+    assert parse_webhooks('{"42": "https://example/webhooks/1/t", "43": ""}') == {42: "https://example/webhooks/1/t"}
+    assert parse_webhooks("not json") == {}
+    assert parse_webhooks(None) == {}
+
+if __name__ == "__main__":
+    test_dispatcher_delivers_and_edits_over_webhook()
+    test_rate_limit_raises_like_discord_and_sets_bucket()
+    test_parse_webhooks()
+    print("Alert webhook tests passed")
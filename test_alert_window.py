@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test alert window seen-store - day partitions, persistence, pruning and legacy import
+"""
+import json
+import os
+import tempfile
+
+from alert_window import SeenStore, evaluate_window, parse_iso_epoch, _parse_iso_slow
+
+def test_seen_store_persists_and_prunes():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "seen.db")
+        legacy = os.path.join(tmp, "seen.json")
+        with open(legacy, "w") as f:
+            json.dump(["UA1@2030-01-01", "DL2@2029-12-30"], f)
+
+        store = SeenStore(db, legacy)
+        store.prune("2030-01-01")
+        assert "UA1@2030-01-01" in store
+        assert "DL2@2029-12-30" not in store   # older than yesterday
+        assert not os.path.exists(legacy)      # imported once
+
+        assert store.add("AA3@2030-01-01")
+        assert not store.add("AA3@2030-01-01")
+        store.conn.close()
+
+        # A restart reloads the same keys without the legacy file
+        store = SeenStore(db, legacy)
+        store.prune("2030-01-01")
+        assert "AA3@2030-01-01" in store
+        assert set(store.days) == {"2030-01-01"}
+
+        # Day rollover drops the old partition from memory and disk
+        store.prune("2030-01-03")
+        assert "AA3@2030-01-01" not in store
+        assert store.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0] == 0
+        store.conn.close()
+
+def test_fast_iso_parser_matches_dateutil():
+    for ts in ["2025-10-12 14:30-04:00", "2025-10-12T18:30:00.5+00:00", "2025-10-12T18:30:00Z",
+               "2025-10-12 18:30", "2025-10-12T18:30:15+0530", "2024-02-29T00:00:00-00:30",
+               "1969-12-31T23:59:59Z", "20251012T183000Z"]:
+        assert parse_iso_epoch(ts) == _parse_iso_slow(ts), ts
+    assert parse_iso_epoch("2025-02-30T10:00:00Z") is None  # no such day
+    assert parse_iso_epoch("2025-04-31 10:00") is None
+    assert parse_iso_epoch("soon") is None
+    assert parse_iso_epoch(None) is None
+
+def test_evaluate_window_batch():
+    now = 1_760_293_800.0  # 2025-10-12T18:30:00Z
+    def arrival(number, reg, eta, dst="ABE"):
+        return {'flight': {'number': number}, 'aircraft': {'registration': reg},
+                'arrival': {'iata': dst, 'estimated': eta}}
+    flights = [
+        arrival("UA 1", "N1", "2025-10-12 14:50-04:00"),       # 20 min out
+        arrival("UA 1", "N1", "2025-10-12 14:50-04:00"),       # listed twice in one response
+        arrival("UA 7", "N1", "2025-10-12 14:55-04:00"),       # same airframe, next rotation
+        arrival("DL 2", "N2", "2025-10-12 15:30-04:00"),       # 60 min out
+        arrival("AA 3", "N3", "2025-10-12 14:35-04:00"),       # 5 min out
+        arrival("WN 4", "N4", "2025-10-12 14:45-04:00", dst="PHL"),
+        arrival("B6 5", "", "not a time"),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        seen = SeenStore(os.path.join(tmp, "seen.db"), None)
+        hits = evaluate_window(flights, "abe", 10, 30, now=now, seen=seen)
+        assert [(f['flight']['number'], round(mins)) for f, _, mins in hits] == [("UA 1", 20), ("UA 7", 25)]
+        assert "UA 1>ABE@2025-10-12" in seen
+        assert evaluate_window(flights, "ABE", 10, 30, now=now + 60, seen=seen) == []
+        seen.conn.close()
+
+if __name__ == "__main__":
+    test_seen_store_persists_and_prunes()
+    test_fast_iso_parser_matches_dateutil()
+    test_evaluate_window_batch()
+    print("Alert window tests passed")
@@ -62,10 +62,99 @@ def test_alert_system():
     print("\nFinal status:", tracker.get_alert_status())
     
     # Cleanup
+    tracker.close()
     import os
     if os.path.exists("test_alerts.json"):
         os.remove("test_alerts.json")
     print("\nTest file cleaned up")
 
+def test_alert_log_replay():
+    """State changes survive a restart and the log compacts"""
+    import os
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), "alerts.json")
+
+    tracker = AlertTracker(path)
+    tracker.compact_min_records = 5
+    tracker.add_alert("a0", {'icao24': 'a0', 'callsign': 'T0'}, 1)
+    tracker.add_alert("a1", {'icao24': 'a1', 'callsign': 'T1'}, 1)
+    tracker.flush()
+    with open(path) as f:
+        assert len(f.read().splitlines()) == 2  # one appended record per change
+    for _ in range(4):
+        tracker.acknowledge_alert("a1")
+        tracker.mark_reminded("a0")
+    tracker.flush()
+    # 10 records for 2 alerts crossed the threshold, so the log was compacted
+    with open(path) as f:
+        assert len(f.read().splitlines()) < 10
+    tracker.add_alert("a2", {'icao24': 'a2', 'callsign': 'T2'}, 1)
+    tracker.acknowledge_alert("a2")
+    tracker.close()
+
+    reloaded = AlertTracker(path)
+    assert set(reloaded.pending_alerts) == {"a0", "a1", "a2"}
+    assert reloaded.pending_alerts["a1"]['acknowledged'] and reloaded.pending_alerts["a2"]['acknowledged']
+    assert reloaded.pending_alerts["a0"]['reminded'] and not reloaded.pending_alerts["a0"]['acknowledged']
+    reloaded.close()
+    os.remove(path)
+
+def test_reminder_heap():
+    """Reminders come off the heap exactly at their deadline; acks cancel them"""
+    import os
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), "alerts.json")
+    tracker = AlertTracker(path)
+    woken = []
+    tracker.on_schedule = lambda: woken.append(True)
+
+    tracker.add_alert("first", {'icao24': 'a1', 'callsign': 'T1'}, 1)
+    tracker.add_alert("second", {'icao24': 'a2', 'callsign': 'T2'}, 1)
+    assert len(woken) == 1  # only the first alert moved the next deadline
+
+    due = tracker.next_reminder_at()
+    assert tracker.get_alerts_needing_reminder(now=due - 1) == []
+    tracker.acknowledge_alert("first")
+    assert [a for a, _ in tracker.get_alerts_needing_reminder(now=due + 1)] == ["second"]
+    # Not marked sent (channel missing, send failed): retried, not lost
+    assert tracker.next_reminder_at() == due + 1 + tracker.reminder_retry_seconds
+    tracker.save_alerts()  # a compaction must not pull the retry back to the missed deadline
+    assert tracker.next_reminder_at() == due + 1 + tracker.reminder_retry_seconds
+    assert tracker.get_alerts_needing_reminder(now=due + 30) == []
+    assert [a for a, _ in tracker.get_alerts_needing_reminder(now=due + 61)] == ["second"]
+    tracker.mark_reminded("second")
+    assert tracker.next_reminder_at() is None
+    # An alert the dispatcher dropped never gets a reminder
+    tracker.add_alert("dropped", {'icao24': 'a3', 'callsign': 'T3'}, 1)
+    assert tracker.remove_alert("dropped") and not tracker.remove_alert("dropped")
+    assert tracker.next_reminder_at() is None and "dropped" not in tracker.pending_alerts
+    tracker.close()
+    os.remove(path)
+
+def test_message_index():
+    """Reactions resolve to alerts by message id, across restarts"""
+    import os
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), "alerts.json")
+    tracker = AlertTracker(path)
+    tracker.add_alert("a1_T1_1200", {'icao24': 'a1', 'callsign': 'T1'}, 1)
+    tracker.attach_message("a1_T1_1200", 111)
+    tracker.attach_message("a1_T1_1200", 222)  # reminder message
+    tracker.add_alert("b2_T2_1200", {'icao24': 'b2', 'callsign': 'T2'}, 1)
+    tracker.attach_message("b2_T2_1200", 111)  # packed into the same message
+    assert tracker.alerts_for_message(222) == ["a1_T1_1200"]
+    assert tracker.alerts_for_message(333) == []
+    tracker.close()
+
+    reloaded = AlertTracker(path)
+    assert reloaded.alerts_for_message(111) == ["a1_T1_1200", "b2_T2_1200"]
+    reloaded.cleanup_old_alerts(max_age_hours=-1)
+    assert reloaded.alerts_for_message(111) == []
+    reloaded.close()
+    os.remove(path)
+
 if __name__ == "__main__":
-    test_alert_system()
\ No newline at end of file
+    test_alert_system()
+    test_alert_log_replay()
+    test_reminder_heap()
+    test_message_index()
\ No newline at end of file
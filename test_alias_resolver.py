@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test alias resolver - nicknames, registry model tokens and fuzzy names resolve offline
+"""
+from alias_resolver import AliasResolver, build_token_index, load_aliases, tokenize
+
+DB = {
+    'ae0001': {'type': 'H47', 'model': 'CH-47D Chinook', 'manufacturer': 'Boeing'},
+    'ae0002': {'type': 'H47', 'model': 'MH-47G Chinook', 'manufacturer': 'Boeing'},
+    'ae0003': {'type': 'H47', 'model': 'Chinook', 'manufacturer': 'Boeing Vertol'},
+    'ae0004': {'type': 'B47', 'model': 'Chinook replica', 'manufacturer': 'Homebuilt'},
+    'ae0005': {'type': 'C130', 'model': 'C-130H Hercules', 'manufacturer': 'Lockheed'},
+    'ae0006': {'type': 'B738', 'model': '737-8AS', 'manufacturer': 'Boeing'},
+}
+
+NAMES = {'BOEING C-17 Globemaster III': 'C17', 'AERO BOERO AB-180': 'AB18'}
+
+def test_token_index_weights_by_aircraft_count():
+    assert tokenize('CH-47D Chinook') == ['CH47D', 'CHINOOK']
+    index = build_token_index(DB)
+    assert index['CHINOOK'] == [['H47', 3], ['B47', 1]]
+    assert index['BOEING'][0] == ['H47', 3]
+
+def test_resolve_order_and_sources():
+    resolver = AliasResolver(load_aliases(), NAMES, build_token_index(DB))
+    assert resolver.resolve('Globemaster') == (['C17'], 'alias')
+    assert resolver.resolve('c-130') == (['C130'], 'code')
+    assert resolver.resolve('hercules') == (['C130'], 'registry')
+    # 3 of 4 CHINOOK aircraft are H47; the replica's share is below the cut
+    assert resolver.resolve('boeing chinook') == (['H47'], 'registry')
+    assert resolver.resolve('globmaster iii') == (['C17'], 'fuzzy')
+    assert resolver.resolve('aero boero ab180') == (['AB18'], 'fuzzy')
+    assert resolver.resolve('zeppelin') == ([], '')
+    assert resolver.resolve('boero') == (['AB18'], 'fuzzy')
+    assert AliasResolver(names={'BOEING 747-400': 'B744', 'BOEING 747-8': 'B748'}).resolve('boeing') == ([], '')
+    # Containment only counts whole words: REACH is not inside SKYREACH
+    assert AliasResolver(names={'RAINBOW SKYREACH BushCat': 'BUSH'}).resolve('REACH') == ([], '')
+
+def test_fuzzy_ranks_closest_name_first():
+    resolver = AliasResolver({'warthog': ['A10'], 'thunderbolt': ['A10'], 'viper': ['F16']}, NAMES)
+    name, similarity, codes = resolver.fuzzy('thunderbolt ii')[0]
+    assert name == 'thunderbolt' and codes == {'A10'} and similarity > 0.7
+    assert resolver.fuzzy('xyzzy') == []
+
+if __name__ == "__main__":
+    test_token_index_weights_by_aircraft_count()
+    test_resolve_order_and_sources()
+    test_fuzzy_ranks_closest_name_first()
+    print("Alias resolver tests passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test arrival predictor - descending inbound traffic becomes FIDS-shaped arrivals
+"""
+from alert_window import minutes_until
+from arrival_predictor import ArrivalPredictor, bearing_deg, merge_arrivals
+from flight_snapshot import FlightSnapshot
+
+ABE = (40.6522, -75.4402)
+T = 1_700_000_000
+
+def state(icao24, callsign, lon, lat, alt, speed, heading, vrate, on_ground=False):
+    return [icao24, callsign, 'United States', T, T, lon, lat, alt, on_ground, speed, heading, vrate]
+
+def make_predictor():
+    db = {'a1b2c3': {'type': 'B738', 'registration': 'N123AB', 'operator': 'United'}}
+    return ArrivalPredictor({'ABE': ABE}, db)
+
+def test_only_inbound_descending_traffic_is_predicted():
+    snapshot = FlightSnapshot.from_opensky({'time': T, 'states': [
+        state('a1b2c3', 'UAL123', -75.91, 40.65, 2500, 110, 90, -5),     # 40 km west, inbound, descending
+        state('d4e5f6', 'DAL9', -75.91, 40.65, 10500, 230, 270, 0),      # same spot, cruising away
+        state('aa0001', 'N1', -75.91, 40.65, 3000, 60, 90, 0),           # inbound but level at 3000 m
+        state('aa0002', 'N2', -75.50, 40.66, 300, 60, 100, 0),           # low and close: on final
+        state('aa0005', 'N5', -75.50, 40.66, 300, 60, 100, 8),           # same spot, climbing out
+        state('aa0003', 'N3', -75.44, 40.65, 0, 0, 0, 0, on_ground=True),
+        state('aa0004', 'FAR1', -80.0, 40.65, 3000, 200, 90, -10),       # ~385 km out
+    ]}, fetched_at=T)
+    arrivals = make_predictor().predict(snapshot, ['abe', 'ZZZ'])
+    assert list(arrivals) == ['ABE']
+    assert [f['icao24'] for f in arrivals['ABE']] == ['aa0002', 'a1b2c3']  # soonest first
+
+    ual = arrivals['ABE'][1]
+    assert ual['aircraft']['icao'] == 'B738' and ual['aircraft']['registration'] == 'N123AB'
+    assert ual['arrival']['iata'] == 'ABE' and ual['arrival']['predicted']
+    eta_minutes = minutes_until(ual['arrival']['estimated']) - minutes_until('2023-11-14T22:13:20+00:00')
+    assert 6 < eta_minutes < 8  # 40 km at 110 m/s, plus the approach allowance
+
+def test_bearing():
+    assert round(bearing_deg(0, 0, 0, 1)) == 90
+    assert round(bearing_deg(0, 0, 1, 0)) == 0
+
+def test_merge_prefers_fids_details_with_live_eta():
+    fids = [{'flight': {'number': 'UA 123'}, 'aircraft': {'registration': 'N-123AB'},
+             'arrival': {'iata': 'ABE', 'estimated': '2030-01-01 12:00-05:00'}},
+            {'flight': {'number': 'DL 9'}, 'aircraft': {'registration': 'N9DL'}, 'arrival': {'iata': 'ABE'}}]
+    predicted = [{'flight': {'number': 'UAL123'}, 'aircraft': {'registration': 'N123AB'}, 'icao24': 'a1b2c3',
+                  'arrival': {'iata': 'ABE', 'estimated': '2030-01-01T16:55:00+00:00'}},
+                 {'flight': {'number': 'N77'}, 'aircraft': {'registration': ''}, 'icao24': 'aa0077',
+                  'arrival': {'iata': 'ABE', 'estimated': '2030-01-01T17:10:00+00:00'}}]
+    merged = merge_arrivals(fids, predicted)
+    assert [f['flight']['number'] for f in merged] == ['UA 123', 'DL 9', 'N77']
+    assert merged[0]['arrival']['estimated'] == '2030-01-01T16:55:00+00:00'
+    assert merged[0]['icao24'] == 'a1b2c3'
+
+    # The FIDS hex pairs them even when the registrations differ
+    fids = [{'flight': {'number': 'UA 123'}, 'aircraft': {'registration': ''}, 'icao24': 'aa0077',
+             'arrival': {'iata': 'ABE', 'estimated': '2030-01-01 12:10-05:00'}}]
+    assert [f['flight']['number'] for f in merge_arrivals(fids, predicted)] == ['UA 123', 'UAL123']
+
+if __name__ == "__main__":
+    test_only_inbound_descending_traffic_is_predicted()
+    test_bearing()
+    test_merge_prefers_fids_details_with_live_eta()
+    print("Arrival predictor tests passed")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test hunter dedupe cache - re-alert window, ghost detection and bounded size
+"""
+from dedupe_cache import DedupeCache
+
+T = 1_700_000_000
+
+def test_realert_window():
+    cache = DedupeCache(realert_seconds=1800)
+    assert cache.check("k", 40.0, -75.0, 5000, now=T) is None
+    cache.record("k", 40.0, -75.0, 5000, now=T)
+    assert cache.check("k", 40.1, -75.1, 5100, now=T + 600) == 'recent'
+    assert cache.check("k", 41.0, -76.0, 9000, now=T + 1900) is None
+
+def test_ghost_position():
+    cache = DedupeCache(realert_seconds=1800, ghost_seconds=600)
+    cache.record("k", 40.0, -75.0, 5000, now=T)
+    assert cache.check("k", 40.0, -75.0, 5000, now=T + 2000) == 'ghost'
+    # Still parked hours later: each sighting keeps the entry alive
+    for hour in range(1, 6):
+        assert cache.check("k", 40.0, -75.0, 5000, now=T + hour * 3600) == 'ghost'
+
+def test_entries_expire():
+    cache = DedupeCache(ttl_seconds=600, slot_seconds=60)
+    for i in range(50):
+        cache.record(f"k{i}", 40.0, -75.0, 5000, now=T + i)
+    assert len(cache) == 50
+    cache.check("other", None, None, None, now=T + 700)
+    assert len(cache) == 0
+    # Freed slots are reused instead of growing the arrays
+    cache.record("new", 40.0, -75.0, 5000, now=T + 800)
+    assert len(cache._key) == 50
+
+def test_max_entries():
+    cache = DedupeCache(ttl_seconds=3600, slot_seconds=60, max_entries=10)
+    for i in range(25):
+        cache.record(f"k{i}", 40.0, -75.0, 5000, now=T + i * 60)
+    assert len(cache) <= 10
+    assert "k24" in cache and "k0" not in cache
+
+if __name__ == "__main__":
+    test_realert_window()
+    test_ghost_position()
+    test_entries_expire()
+    test_max_entries()
+    print("Dedupe cache tests passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test FIDS client - one fetch per airport, bounded concurrency, shared in-flight requests
+"""
+import asyncio
+import time
+
+from fids_client import FidsClient
+
+def make_fetch(delay=0.1, fail=()):
+    calls = []
+    active = [0, 0]  # current, peak
+
+    async def fetch(code):
+        calls.append(code)
+        active[0] += 1
+        active[1] = max(active[1], active[0])
+        try:
+            await asyncio.sleep(delay)
+            if code in fail:
+                raise RuntimeError(f"{code} 503")
+            return [{'number': f'{code}1'}]
+        finally:
+            active[0] -= 1
+
+    return fetch, calls, active
+
+def test_shared_airports_fetched_once_and_concurrently():
+    fetch, calls, active = make_fetch(fail={"MPO"})
+    client = FidsClient(fetch, max_concurrent=2, rate_per_second=100)
+
+    async def main():
+        started = time.monotonic()
+        results = await client.fetch_many(["ABE", "PHL", "abe", "UKT", "MPO"])
+        return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(main())
+    assert sorted(calls) == ["ABE", "MPO", "PHL", "UKT"]
+    assert active[1] == 2  # never more than max_concurrent at once
+    assert elapsed < 0.35  # two waves of 0.1s, not four sequential fetches
+    assert results["ABE"] == [{'number': 'ABE1'}]
+    assert isinstance(results["MPO"], RuntimeError)
+
+def test_concurrent_callers_share_one_request():
+    fetch, calls, _ = make_fetch()
+    client = FidsClient(fetch, rate_per_second=100)
+
+    async def main():
+        return await asyncio.gather(client.fetch("ABE"), client.fetch("ABE"))
+
+    first, second = asyncio.run(main())
+    assert calls == ["ABE"] and first == second
+
+def test_rate_limit_spaces_requests():
+    fetch, calls, _ = make_fetch(delay=0)
+    client = FidsClient(fetch, max_concurrent=5, rate_per_second=20)
+
+    async def main():
+        started = time.monotonic()
+        await client.fetch_many(["ABE", "PHL", "UKT", "MPO"])
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.14  # 4 requests at 20/s with a burst of 1
+    assert client.requests == 4
+
+if __name__ == "__main__":
+    test_shared_airports_fetched_once_and_concurrently()
+    test_concurrent_callers_share_one_request()
+    test_rate_limit_spaces_requests()
+    print("FIDS client tests passed")
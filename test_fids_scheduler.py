@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test FIDS scheduler - polls follow the next alert window, cache serves in between
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from fids_client import FidsClient
+from fids_scheduler import FidsScheduler
+
+def arrival_in(minutes):
+    eta = (datetime.now(timezone.utc) + timedelta(minutes=minutes)).isoformat()
+    return {'arrival': {'iata': 'ABE', 'estimated': eta}}
+
+def make_scheduler(flights_by_code, fail=()):
+    calls = []
+
+    async def fetch(code):
+        calls.append(code)
+        if code in fail:
+            raise RuntimeError("503")
+        return flights_by_code.get(code, [])
+
+    scheduler = FidsScheduler(FidsClient(fetch, rate_per_second=100), win_min=10, win_max=30,
+                              min_interval_seconds=300, max_stale_seconds=4 * 3600, lead_seconds=120)
+    return scheduler, calls
+
+def test_next_poll_just_before_window_opens():
+    scheduler, _ = make_scheduler({})
+    now = time.time()
+    # Enters the 30-minute window in 90 minutes; poll 2 minutes before that
+    assert abs(scheduler.next_poll_at([arrival_in(120)], now) - (now + 88 * 60)) < 5
+    # Already alertable: keep refreshing at the minimum interval
+    assert scheduler.next_poll_at([arrival_in(20), arrival_in(120)], now) == now + 300
+    # Landed or too close to alert: only the staleness cap applies
+    assert scheduler.next_poll_at([arrival_in(5), arrival_in(-30)], now) == now + 4 * 3600
+    # A window opening sooner than the minimum interval is still capped by it
+    assert scheduler.next_poll_at([arrival_in(31)], now) == now + 300
+    # Minutes are measured from the given now, not the wall clock
+    later = now + 60 * 60
+    assert abs(scheduler.next_poll_at([arrival_in(120)], later) - (later + 28 * 60)) < 5
+
+def test_quiet_airport_served_from_cache_until_due():
+    scheduler, calls = make_scheduler({"ABE": [arrival_in(120)], "UKT": []})
+
+    async def main():
+        now = time.time()
+        first = await scheduler.refresh(["ABE", "ukt"], now=now)
+        again = await scheduler.refresh(["ABE", "UKT"], now=now + 600)
+        later = await scheduler.refresh(["ABE", "UKT"], now=now + 89 * 60)
+        return first, again, later
+
+    first, again, later = asyncio.run(main())
+    assert calls == ["ABE", "UKT", "ABE"]  # UKT stays quiet for 4 hours
+    assert first["ABE"] == again["ABE"] and again["UKT"] == []
+    assert scheduler.status()["UKT"]["polls"] == 1
+
+def test_failed_fetch_keeps_cache_and_retries_soon():
+    scheduler, calls = make_scheduler({"ABE": [arrival_in(120)]})
+
+    async def main():
+        now = time.time()
+        await scheduler.refresh(["ABE"], now=now)
+        scheduler.airports["ABE"].next_poll_at = now  # force a poll
+        scheduler.client.fetch_one = failing
+        result = await scheduler.refresh(["ABE"], now=now + 60)
+        return now, result
+
+    async def failing(code):
+        raise RuntimeError("503")
+
+    now, result = asyncio.run(main())
+    assert len(result["ABE"]) == 1  # stale but usable
+    assert scheduler.airports["ABE"].next_poll_at == now + 60 + 300
+
+    fresh, _ = make_scheduler({}, fail={"MPO"})
+    assert isinstance(asyncio.run(fresh.refresh(["MPO"]))["MPO"], RuntimeError)
+
+if __name__ == "__main__":
+    test_next_poll_just_before_window_opens()
+    test_quiet_airport_served_from_cache_until_due()
+    test_failed_fetch_keeps_cache_and_retries_soon()
+    print("FIDS scheduler tests passed")
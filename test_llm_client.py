@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test LLM client - cached answers, shared in-flight calls, TTL and LRU eviction
+"""
+import asyncio
+import os
+
+from llm_client import LLMCache, LLMClient, LLMError, cache_key
+from state_store import StateStore
+
+TEST_FILE = "test_llm_cache.json"
+
+def make_client(delay=0.05, answer="CH-47, CHINOOK", max_entries=100, status=200):
+    if os.path.exists(TEST_FILE):
+        os.remove(TEST_FILE)
+    cache = LLMCache(TEST_FILE, ttl_seconds=3600, max_entries=max_entries, store=StateStore())
+    client = LLMClient(api_key="test", cache=cache)
+    calls = []
+
+    async def post(messages, temperature, max_tokens):
+        calls.append(messages[-1]["content"])
+        await asyncio.sleep(delay)
+        if status != 200:
+            raise LLMError(f"DeepSeek API error: {status}")
+        return answer
+
+    client._post = post
+    return client, calls
+
+def ask(text):
+    return [{"role": "user", "content": text}]
+
+def test_repeat_question_served_from_cache():
+    client, calls = make_client()
+
+    async def main():
+        first = await client.complete(ask("Suggest names for chinook"))
+        again = await client.complete(ask("  suggest names  for CHINOOK\n"))
+        other = await client.complete(ask("Suggest names for kfir"))
+        return first, again, other
+
+    first, again, other = asyncio.run(main())
+    assert first == again == other == "CH-47, CHINOOK"
+    assert len(calls) == 2  # normalized repeat never reaches the API
+    assert client.stats()['hits'] == 1
+    client.cache.state.store.flush()
+    with open(TEST_FILE) as f:
+        assert f.read().count("CH-47") == 2  # written through for the next restart
+    os.remove(TEST_FILE)
+
+def test_concurrent_identical_questions_share_one_call():
+    client, calls = make_client(delay=0.1)
+
+    async def main():
+        return await asyncio.gather(*(client.complete(ask("best airport for 777s")) for _ in range(5)))
+
+    assert len(set(asyncio.run(main()))) == 1
+    assert len(calls) == 1
+
+def test_failures_are_not_cached():
+    client, calls = make_client(status=503)
+
+    async def main():
+        for _ in range(2):
+            try:
+                await client.complete(ask("chinook"))
+            except LLMError as e:
+                assert "503" in str(e)
+
+    asyncio.run(main())
+    assert len(calls) == 2 and len(client.cache) == 0
+
+def test_cache_expires_and_evicts_least_recently_used():
+    cache = LLMCache(TEST_FILE, ttl_seconds=100, max_entries=2, store=StateStore())
+    cache.put("a", "A", now=1000)
+    cache.put("b", "B", now=1000)
+    assert cache.get("a", now=1050) == "A"  # a is now most recent
+    cache.put("c", "C", now=1050)
+    assert cache.get("b", now=1050) is None and cache.get("a", now=1050) == "A"
+    assert cache.get("a", now=1200) is None  # past the TTL
+    assert cache_key("m", ask("Hi  there"), 0.3, 100) == cache_key("m", ask("hi there"), 0.3, 100)
+    assert cache_key("m", ask("hi there"), 0.3, 100) != cache_key("m", ask("hi there"), 0.3, 500)
+    os.remove(TEST_FILE)
+
+if __name__ == "__main__":
+    test_repeat_question_served_from_cache()
+    test_concurrent_identical_questions_share_one_call()
+    test_failures_are_not_cached()
+    test_cache_expires_and_evicts_least_recently_used()
+    print("LLM client tests passed")
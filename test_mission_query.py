@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test mission query language - parsing, plan ordering and snapshot evaluation
+"""
+from flight_snapshot import FlightSnapshot
+from mission_finder import MissionFinder, BoundingBoxPredicate, RadiusPredicate, TypePredicate
+
+def _state(icao24, callsign, lat, lon, alt_m, vel_ms, country="United States"):
+    # Matches the OpenSky states/all column layout
+    return [icao24, callsign, country, 0, 1700000000, lon, lat, alt_m, False, vel_ms, 90.0, 0.0, None, alt_m, None, False, 0]
+
+SNAPSHOT = FlightSnapshot.from_opensky({
+    'time': 1700000000,
+    'states': [
+        _state('a00001', 'UAL1    ', 39.90, -75.20, 11000, 240),   # B77W near PHL, fast and high
+        _state('a00002', 'DAL2    ', 39.95, -75.30, 3000, 120),    # B738 near PHL, slow and low
+        _state('a00003', 'AAL3    ', 40.60, -75.40, 11500, 250),   # B772 ~85km from PHL
+        _state('a00004', 'JAL4    ', 33.90, -118.40, 11000, 250, 'Japan'),  # B77W at LAX
+        _state('a00005', None, 39.88, -75.24, None, None),        # no altitude/speed
+    ]
+})
+
+DB = {
+    'a00001': {'type': 'B77W', 'registration': 'N2331U', 'manufacturer': 'Boeing'},
+    'a00002': {'type': 'B738', 'registration': 'N301DQ', 'manufacturer': 'Boeing'},
+    'a00003': {'type': 'B772', 'registration': 'N771AN', 'manufacturer': 'Boeing'},
+    'a00004': {'type': 'B77W', 'registration': 'JA731J', 'manufacturer': 'Boeing'},
+}
+
+def test_multi_criteria_query():
+    """Combined criteria only return aircraft passing every predicate"""
+    finder = MissionFinder(DB)
+    plan = finder.compile_query("speed>400 alt>35000 type=B77* within 150km of PHL")
+    results = finder.execute_plan(plan, SNAPSHOT)
+
+    print(f"Plan: {plan.describe()}")
+    assert [r['icao24'] for r in results] == ['a00001', 'a00003']
+    assert results[0]['distance_from_target'] < results[1]['distance_from_target']
+    assert results[0]['type'] == 'B77W'
+
+    # Location box first, exact distance after the cheap filters
+    assert isinstance(plan.predicates[0], BoundingBoxPredicate)
+    assert isinstance(plan.predicates[-1], RadiusPredicate)
+    kinds = [type(p) for p in plan.predicates]
+    assert kinds.index(TypePredicate) < kinds.index(RadiusPredicate)
+
+def test_plan_is_cached():
+    finder = MissionFinder(DB)
+    first = finder.compile_query("speed>400 PHL")
+    assert finder.compile_query("  SPEED>400   phl ") is first
+    # Bounded: the least recently used query is the one forgotten
+    finder.max_plans = 2
+    finder.compile_query("alt>30000 PHL")
+    finder.compile_query("speed>400 PHL")
+    finder.compile_query("type=C17 ABE")
+    assert finder.compile_query("speed>400 phl") is first
+    assert len(finder._plans) == 2 and "alt>30000 phl" not in finder._plans
+
+def test_legacy_syntax():
+    finder = MissionFinder(DB)
+    results = finder.execute_plan(finder.compile_query("speed >400 PHL"), SNAPSHOT)
+    assert {r['icao24'] for r in results} == {'a00001', 'a00003'}
+
+    results = finder.execute_plan(finder.compile_query("route transpacific LAX"), SNAPSHOT)
+    assert [r['callsign'] for r in results] == ['JAL4']
+
+def test_missing_values_never_match():
+    finder = MissionFinder(DB)
+    results = finder.execute_plan(finder.compile_query("alt<10000 PHL"), SNAPSHOT)
+    assert [r['icao24'] for r in results] == ['a00002']
+
+def test_bad_query():
+    finder = MissionFinder(DB)
+    for text in ("speed>400 XYZ", "within 50km of ZZZ", "PHL"):
+        try:
+            finder.compile_query(text)
+        except ValueError as e:
+            print(f"'{text}' rejected: {e}")
+        else:
+            raise AssertionError(f"'{text}' should not compile")
+
+if __name__ == "__main__":
+    test_multi_criteria_query()
+    test_plan_is_cached()
+    test_legacy_syntax()
+    test_missing_values_never_match()
+    test_bad_query()
+    print("Mission query tests passed")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test compiled rarity catalog - lookups by any code and legacy fallback
+"""
+import json
+import os
+import tempfile
+
+from rarity import RarityCatalog, rarity_tier, tier_index, ULTRA, COMMON
+
+def test_catalog_lookup():
+    catalog = RarityCatalog()
+    assert len(catalog) > 1000
+    assert catalog.get('c17') == 4.76
+    assert catalog.get(None, 'C17') == 4.76
+    assert catalog.get('XXXX') is None
+
+    # Aircraft names resolve regardless of case and punctuation
+    entry = catalog.entry('Airbus A340-200')
+    assert entry['icao'] == 'A342'
+    assert (entry['emoji'], entry['tier']) == rarity_tier(entry['rarity'])
+    assert entry['category'] == 'Jet & Rocket'
+
+def test_tiers():
+    assert tier_index(14.0) == ULTRA
+    assert tier_index(0.28) == COMMON
+    assert rarity_tier(5.0) == ("🟣", "Rare")
+
+def test_legacy_fallback():
+    with tempfile.TemporaryDirectory() as tmp:
+        rarity_file = os.path.join(tmp, 'rarity.json')
+        ftea_file = os.path.join(tmp, 'ftea.json')
+        with open(rarity_file, 'w') as f:
+            json.dump({'c17': 4.76}, f)
+        with open(ftea_file, 'w') as f:
+            json.dump({'C17': 1.0, 'B52': 1.0}, f)
+        catalog = RarityCatalog(os.path.join(tmp, 'missing.json'), rarity_file, ftea_file)
+    assert catalog.get('C17') == 4.76   # rarity table wins over FTEA
+    assert catalog.get('B52') == 7.5    # 7.5 - ln(1)
+
+if __name__ == "__main__":
+    test_catalog_lookup()
+    test_tiers()
+    test_legacy_fallback()
+    print("Rarity catalog tests passed")
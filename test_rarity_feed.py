@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test rarity feed - registry scoring, per-snapshot ranking and regional cache
+"""
+from flight_snapshot import FlightSnapshot, SnapshotService
+from rarity import RarityLookup
+from rarity_feed import RarityFeed
+
+def _state(icao24, callsign, lat, lon, on_ground=False):
+    return [icao24, callsign, 'United States', 0, 1700000000, lon, lat, 9000, on_ground, 200, 90.0, 0.0]
+
+DB = {
+    'ae0001': {'type': 'C17'},    # 4.76
+    'ae0002': {'type': 'B738'},   # common
+    'ae0003': {'type': 'A124'},   # 9.38
+    'ae0004': {'type': 'CONC'},   # 14.0, parked
+    'ae0005': {'type': 'ZZZZ'},   # not in rarity tables
+}
+
+COORDS = {'ABE': (40.6522, -75.4402)}
+
+def _feed():
+    snapshots = SnapshotService()
+    feed = RarityFeed(DB, RarityLookup(), snapshots, airport_coords=COORDS)
+    snapshots.publish(FlightSnapshot.from_opensky({'time': 1700000000, 'states': [
+        _state('ae0001', 'RCH1', 40.70, -75.50),
+        _state('ae0002', 'UAL2', 40.80, -75.30),
+        _state('ae0003', 'ADB3', 50.40, 30.50),
+        _state('ae0004', 'BAW4', 40.60, -75.40, on_ground=True),
+        _state('ae0005', 'XXX5', 40.61, -75.41),
+    ]}))
+    return feed
+
+def test_registry_scored_once():
+    feed = RarityFeed(DB, RarityLookup())
+    assert set(feed.scores) == {'ae0001', 'ae0002', 'ae0003', 'ae0004'}
+    assert feed.rarest() == []  # nothing published yet
+
+def test_global_ranking():
+    feed = _feed()
+    results = feed.rarest()
+    assert [r['type'] for r in results] == ['A124', 'C17', 'B738']
+    assert results[0]['rarity'] > results[1]['rarity']
+
+def test_regional_ranking_cached():
+    feed = _feed()
+    assert [r['icao24'] for r in feed.rarest('abe', 100)] == ['ae0001', 'ae0002']
+    cached = feed.regional[('ABE', 100.0)]
+    feed.rarest('ABE', 100)
+    assert feed.regional[('ABE', 100.0)] is cached
+    try:
+        feed.rarest('XYZ')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown airport should be rejected")
+
+if __name__ == "__main__":
+    test_registry_scored_once()
+    test_global_ranking()
+    test_regional_ranking_cached()
+    print("Rarity feed tests passed")
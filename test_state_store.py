@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test state store - load-once cache, debounced writes and atomic replace
+"""
+import asyncio
+import json
+import os
+import tempfile
+
+from state_store import StateStore
+
+def test_load_once_and_typed_default():
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "terms.json")
+    with open(path, "w") as f:
+        json.dump(["not", "a", "dict"], f)
+
+    store = StateStore()
+    state = store.collection(path, dict)
+    assert state.data == {}  # wrong shape on disk falls back to the default type
+    assert store.collection(path, dict) is state
+
+    state.data['gabe'] = ['ABE']
+    state.save()  # no event loop: written straight away
+    with open(path) as f:
+        assert json.load(f) == {'gabe': ['ABE']}
+    assert not os.path.exists(path + ".tmp")
+
+def test_burst_is_one_debounced_write():
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "terms.json")
+    writes = []
+
+    async def burst():
+        store = StateStore(flush_delay=0.05)
+        original = store._write
+        store._write = lambda p, text: (writes.append(text), original(p, text))
+        terms = store.collection(path, set, encode=sorted, decode=set)
+        for code in ("C17", "AB18", "KFIR"):
+            terms.data.add(code)
+            terms.save()
+        assert writes == []  # nothing written on the event loop
+        await asyncio.sleep(0.2)
+        store.flush()
+
+    asyncio.run(burst())
+    assert len(writes) == 1
+    with open(path) as f:
+        assert json.load(f) == ["AB18", "C17", "KFIR"]
+
+if __name__ == "__main__":
+    test_load_once_and_typed_default()
+    test_burst_is_one_debounced_write()
+    print("State store tests passed")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test per-user subscription fan-out over a snapshot delta
+"""
+import os
+from flight_snapshot import FlightSnapshot
+from registry_index import RegistrationIndex
+from subscriptions import SubscriptionEngine
+from state_store import StateStore
+
+TEST_FILE = "test_subscriptions.json"
+
+def _state(icao24, callsign, lat, lon):
+    return [icao24, callsign, "United States", 0, 1700000000, lon, lat, 1000, False, 60, 90.0, 0.0, None, 1000, None, False, 0]
+
+DB = {
+    'e0659a': {'type': 'AB18', 'registration': 'LV-ZZZ'},
+    'a1b2c3': {'type': 'C17', 'registration': '02-1109'},
+    'a99999': {'type': 'B738', 'registration': 'N123AB'},
+}
+
+def _engine():
+    if os.path.exists(TEST_FILE):
+        os.remove(TEST_FILE)
+    return SubscriptionEngine(TEST_FILE, {'ABE': (40.6522, -75.4402)}, store=StateStore())
+
+def test_fan_out_to_right_users():
+    engine = _engine()
+    engine.add(1, 'types', 'ab18', 111)
+    engine.add(2, 'registrations', 'n-123ab', 222)
+    engine.add(3, 'regions', 'ABE', 333, 50)
+    engine.add(3, 'types', 'C17', 333)
+
+    snapshot = FlightSnapshot.from_opensky({'states': [
+        _state('e0659a', 'LVZZZ', -34.6, -58.4),   # AB18 in Argentina
+        _state('a1b2c3', 'RCH123', 40.70, -75.50),  # C17 near ABE: type + region, one alert
+        _state('a99999', 'DAL1', 33.0, -84.0),      # watched tail number
+        _state('abcdef', 'UAL2', 40.60, -75.30),    # unknown type, inside ABE region
+    ]})
+    fanout = engine.match(snapshot, DB)
+
+    assert [snapshot.icao24[r] for r, _ in fanout['1']] == ['e0659a']
+    assert [snapshot.icao24[r] for r, _ in fanout['2']] == ['a99999']
+    assert sorted(snapshot.icao24[r] for r, _ in fanout['3']) == ['a1b2c3', 'abcdef']
+    print(fanout)
+
+    # Re-delivering the same aircraft is suppressed for the re-alert window
+    assert engine.match(snapshot, DB) == {}
+    os.remove(TEST_FILE)
+
+def test_delta_only_new_or_moved():
+    previous = FlightSnapshot.from_opensky({'states': [_state('a1b2c3', 'RCH123', 40.2, -75.2)]})
+    current = FlightSnapshot.from_opensky({'states': [
+        _state('a1b2c3', 'RCH123', 40.3, -75.3),   # same 1° cell
+        _state('e0659a', 'LVZZZ', -34.6, -58.4),   # new
+    ]})
+    assert [current.icao24[r] for r in current.delta_rows(previous)] == ['e0659a']
+
+def test_watch_added_while_aircraft_already_in_view():
+    engine = _engine()
+    first = FlightSnapshot.from_opensky({'states': [_state('a1b2c3', 'RCH123', 40.70, -75.50)]})
+    assert engine.match(first, DB) == {}
+
+    # Same cell, no delta: the new watches still see it on the next cycle
+    second = FlightSnapshot.from_opensky({'states': [_state('a1b2c3', 'RCH123', 40.71, -75.49)]})
+    engine.add(5, 'regions', 'ABE', 555, 50)
+    engine.add(6, 'types', 'C17', 666)
+    fanout = engine.match(second, DB, previous=first)
+    assert [reason for _, reason in fanout['5']] == ['Near ABE']
+    assert [reason for _, reason in fanout['6']] == ['Type C17']
+
+    # After the re-alert window: still inside the radius, so no new region alert
+    engine.last_alert.clear()
+    fanout = engine.match(second, DB, previous=second)
+    assert '5' not in fanout and '6' in fanout
+
+    # Flying into the radius without leaving the 1° cell counts as a crossing
+    engine.last_alert.clear()
+    outside = FlightSnapshot.from_opensky({'states': [_state('abcdef', 'UAL2', 40.99, -74.01)]})
+    inside = FlightSnapshot.from_opensky({'states': [_state('abcdef', 'UAL2', 40.60, -74.90)]})
+    assert engine.match(outside, DB, previous=outside) == {}
+    assert [reason for _, reason in engine.match(inside, DB, previous=outside)['5']] == ['Near ABE']
+    os.remove(TEST_FILE)
+
+def test_persistence_and_limits():
+    engine = _engine()
+    ok, _ = engine.add(9, 'hexes', 'nothex', 1)
+    assert not ok
+    engine.add(9, 'hexes', 'A1B2C3', 1)
+    reloaded = SubscriptionEngine(TEST_FILE, store=StateStore())  # fresh process view of the file
+    assert reloaded.by_icao24 == {'a1b2c3': {'9': 'Hex A1B2C3'}}
+    ok, _ = reloaded.remove(9, 'hexes', 'a1b2c3')
+    assert ok and not reloaded.by_icao24
+    os.remove(TEST_FILE)
+
+def test_registration_compiles_to_hex():
+    if os.path.exists(TEST_FILE):
+        os.remove(TEST_FILE)
+    engine = SubscriptionEngine(TEST_FILE, registration_index=RegistrationIndex(DB), store=StateStore())
+    ok, message = engine.add(4, 'registrations', 'n123ab', 444)
+    assert ok and 'A99999' in message
+    assert engine.by_icao24 == {'a99999': {'4': 'Registration N123AB'}}
+    assert not engine.by_registration
+
+    snapshot = FlightSnapshot.from_opensky({'states': [_state('a99999', 'DAL1', 33.0, -84.0)]})
+    assert list(engine.match(snapshot, {})) == ['4']  # no registry probe needed
+    os.remove(TEST_FILE)
+
+def test_registration_index_prefix():
+    index = RegistrationIndex(DB)
+    assert index.lookup('lv-zzz') == 'e0659a'
+    assert index.lookup('021109') == 'a1b2c3'
+    assert index.prefix('N12') == [('N123AB', 'a99999')]
+    assert index.prefix('X') == []
+    targets, missing = index.resolve(['N-123AB', 'N999ZZ'])
+    assert targets == {'a99999': 'N123AB'} and missing == ['N999ZZ']
+
+def test_registration_index_joins_fids_arrivals():
+    index = RegistrationIndex(DB)
+    flights = [
+        {'aircraft': {'registration': 'N-123AB', 'icao': 'Boeing 737-800', 'model': 'Boeing 737-800'}},
+        {'aircraft': {'registration': '', 'icao': 'Airbus A320'}, 'icao24': 'a1b2c3'},  # FIDS modeS
+        {'aircraft': {'registration': 'N999ZZ', 'icao': 'Embraer 175'}},
+        {'aircraft': {'registration': 'LV-ZZZ', 'icao': ''}, 'icao24': 'e0ffff'},  # hex not in the registry
+    ]
+    assert index.join(flights, DB) == 3
+    assert flights[0]['aircraft']['icao'] == 'B738' and flights[0]['icao24'] == 'a99999'
+    assert flights[0]['aircraft']['model'] == 'Boeing 737-800'  # free text kept for display
+    assert flights[1]['aircraft']['icao'] == 'C17'
+    assert flights[2]['aircraft']['icao'] == 'Embraer 175' and 'icao24' not in flights[2]
+    assert flights[3]['aircraft']['icao'] == 'AB18' and flights[3]['icao24'] == 'e0ffff'
+
+if __name__ == "__main__":
+    test_fan_out_to_right_users()
+    test_delta_only_new_or_moved()
+    test_watch_added_while_aircraft_already_in_view()
+    test_persistence_and_limits()
+    test_registration_compiles_to_hex()
+    test_registration_index_prefix()
+    test_registration_index_joins_fids_arrivals()
+    print("Subscription tests passed")
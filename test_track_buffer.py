@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test track ring buffers - wraparound, eviction and stale/frozen/jump checks
+"""
+from flight_snapshot import FlightSnapshot
+from track_buffer import TrackStore
+
+T = 1_700_000_000
+
+def _poll(store, t, states):
+    store.on_snapshot(FlightSnapshot.from_opensky({'time': t, 'states': [
+        [icao24, 'TEST', 'United States', 0, contact, lon, lat, alt, False, vel, 90, 0]
+        for icao24, contact, lat, lon, alt, vel in states
+    ]}))
+
+def test_ring_wraps_and_evicts():
+    store = TrackStore(depth=4)
+    for k in range(6):
+        _poll(store, T + 10 * k, [('a1', T + 10 * k, 40.0, -75.0 + 0.01 * k, 1000, 100)])
+    samples = store.samples('a1')
+    assert len(samples) == 4
+    assert [s[0] for s in samples] == [T + 20, T + 30, T + 40, T + 50]
+
+    _poll(store, T + 60, [('b2', T + 60, 41.0, -75.0, 1000, 100)])
+    assert store.samples('a1') == [] and len(store) == 1
+    # b2 reused a1's slot
+    assert len(store._count) == 1
+
+def test_slow_low_aircraft_is_kept():
+    """A taildragger at 300m and 20 m/s used to be dropped as stale"""
+    store = TrackStore()
+    for k in range(5):
+        _poll(store, T + 30 * k, [('e01234', T + 30 * k, -34.6, -58.5 + 0.006 * k, 300, 20)])
+    assert store.assess('e01234') is None
+
+def test_bad_tracks():
+    store = TrackStore()
+    for k in range(5):
+        t = T + 30 * k
+        _poll(store, t, [
+            ('frozen', t, 40.0, -75.0, 9000, 220),
+            ('stale', T - 600, 40.0, -75.0 + 0.02 * k, 9000, 220),
+            ('jump', t, 40.0 + (5.0 if k == 4 else 0.0), -75.0 + 0.02 * k, 9000, 220),
+        ])
+    assert store.assess('frozen') == 'frozen'
+    assert store.assess('stale') == 'stale'
+    assert store.assess('jump') == 'jump'
+    assert store.assess('unknown') is None
+
+def test_missing_speed_uses_physical_ceiling():
+    """No velocity samples: a 250 m/s jet is fine, a 5 degree hop is still a jump"""
+    store = TrackStore()
+    for k in range(5):
+        t = T + 30 * k
+        _poll(store, t, [
+            ('fast', t, 40.0, -75.0 + 0.09 * k, 11000, None),
+            ('jump', t, 40.0 + (5.0 if k == 4 else 0.0), -75.0, 11000, None),
+        ])
+    assert store.assess('fast') is None
+    assert store.assess('jump') == 'jump'
+
+if __name__ == "__main__":
+    test_ring_wraps_and_evicts()
+    test_slow_low_aircraft_is_kept()
+    test_bad_tracks()
+    test_missing_speed_uses_physical_ceiling()
+    print("Track buffer tests passed")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test type completer - prefix and infix matches, rarity ranking, exact codes first
+"""
+import time
+
+from rarity import RarityCatalog
+from type_completer import TypeCompleter
+
+def make_catalog():
+    catalog = RarityCatalog(catalog_file="missing_catalog.json", rarity_file="missing.json", ftea_file="missing.json")
+    catalog.add("C17", 4.0, name="BOEING C-17 Globemaster III")
+    catalog.add("C170", 6.0, name="CESSNA 170")
+    catalog.add("H47", 5.5, name="BOEING CH-47 Chinook")
+    catalog.add("A388", 3.1, name="AIRBUS A380")
+    catalog.add("CONC", 14.0, name="AEROSPATIALE - BRITISH AEROSPACE Concorde")
+    return catalog
+
+def make_completer():
+    db = {f"{i:06x}": {'type': 'A388'} for i in range(300)}
+    return TypeCompleter.from_sources(make_catalog(), {'globemaster': ['C17'], 'warthog': ['A10']}, db)
+
+def test_prefix_matches_codes_names_and_words():
+    completer = make_completer()
+    assert [v for _, v in completer.complete('c1')] == ['C170', 'C17']  # rarer first
+    assert [v for _, v in completer.complete('C-17')][0] == 'C17'     # whole code jumps the queue
+    assert [v for _, v in completer.complete('glob')] == ['C17', 'globemaster']
+    assert [v for _, v in completer.complete('conc')] == ['CONC']     # any word of the name
+    assert completer.complete('zz') == []
+
+def test_infix_fallback_and_ranking_inputs():
+    completer = make_completer()
+    assert [v for _, v in completer.complete('master')] == ['C17', 'globemaster']
+    assert completer.complete('')[0] == ('CONC - AEROSPATIALE - BRITISH AEROSPACE Concorde 💎', 'CONC')
+    # Registry fleet size adds to the score: A388 (3.1 + log10 301) outranks C17 (4.0)
+    airbus, boeing = completer.values.index('A388'), completer.values.index('C17')
+    assert airbus < boeing
+    assert ('warthog → A10', 'warthog') in completer.complete('wart')
+
+def test_large_catalog_completes_fast():
+    entries = [(i % 97, f"TYPE{i:05d}", f"T{i:05d}", [f"T{i:05d}", f"MAKER{i % 50} Model {i}"]) for i in range(20000)]
+    completer = TypeCompleter().build(entries)
+    started = time.perf_counter()
+    for query in ("t", "t1", "maker", "model 1", "del 12"):
+        assert len(completer.complete(query)) == 25
+    assert time.perf_counter() - started < 0.05  # five keystrokes, far under Discord's 3 s
+
+if __name__ == "__main__":
+    test_prefix_matches_codes_names_and_words()
+    test_infix_fallback_and_ranking_inputs()
+    test_large_catalog_completes_fast()
+    print("Type completer tests passed")
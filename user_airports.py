@@ -2,14 +2,15 @@
 """
 User Airport Management - Multi-user airport configuration with limits
 """
-import json
-import os
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
 
+from state_store import STORE, StateStore
+
 class UserAirportManager:
-    def __init__(self, config_file: str = "user_airports.json"):
+    def __init__(self, config_file: str = "user_airports.json", store: Optional[StateStore] = None):
         self.config_file = config_file
+        self.store = store or STORE
         self.max_airports_per_user = 3  # Optimized for API limits (3 users × 3 airports = 9 total)
         self.max_total_airports = 9     # Stay under OpenSky 4,000 daily limit
         
@@ -51,41 +52,25 @@ class UserAirportManager:
         self.user_airports = self.load_config()
         
     def load_config(self) -> Dict[str, List[str]]:
-        """Load user airport configuration from file"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    
-                # Ensure all users exist with defaults
-                default_config = {
-                    'gabe': ['ABE', 'UKT', 'MPO'],  # Reduced to 3 airports max
-                    'mike': [],
-                    'alex': []
-                }
-                
-                for user in default_config:
-                    if user not in config:
-                        config[user] = default_config[user]
-                        
-                return config
-            except Exception as e:
-                print(f"Error loading airport config: {e}")
-                
-        # Default configuration
-        return {
+        """Load user airport configuration through the shared state store"""
+        default_config = {
             'gabe': ['ABE', 'UKT', 'MPO'],  # Reduced to 3 airports max
             'mike': [],
             'alex': []
         }
+        self.state = self.store.collection(self.config_file, dict)
+        config = self.state.data
+        
+        # Ensure all users exist with defaults
+        for user in default_config:
+            if user not in config:
+                config[user] = default_config[user]
+                
+        return config
     
     def save_config(self):
-        """Save user airport configuration to file"""
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.user_airports, f, indent=2)
-        except Exception as e:
-            print(f"Error saving airport config: {e}")
+        """Save user airport configuration (debounced, written off the event loop)"""
+        self.state.save()
     
     def get_user_from_channel(self, channel_id: int) -> Optional[str]:
         """Get username from channel ID"""